@@ -0,0 +1,302 @@
+import threading
+import numpy as np
+from sqlalchemy import String, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+from app.data.versiones import versiones
+from app.domain.models.archivo_trayectos import trayectos_historial
+from app.domain.models.ruta import Ruta as RutaModelo
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+# Dimensiones categóricas: cada id se guarda como un código entero (-1 = sin asignar)
+RUTA = "ruta"
+VEHICULO = "vehiculo"
+CONDUCTOR = "conductor"
+
+SEGUNDOS_DIA = 24 * 3600
+
+# Columnas numéricas de la instantánea y su tipo
+TIPOS = {
+    "fecha": "datetime64[D]",
+    "salida": np.int32,
+    "llegada": np.int32,
+    "pasajeros": np.int32,
+    "kilometros": np.int32,
+    "capacidad": np.float64,
+    RUTA: np.int32,
+    VEHICULO: np.int32,
+    CONDUCTOR: np.int32,
+}
+
+def _segundos(horas):
+    """
+    Convierte textos 'HH:MM:SS[.ffffff]' a segundos del día sin iterar en Python.
+    """
+    if not horas:
+        return np.empty(0, dtype=np.int32)
+    digitos = (np.array(horas, dtype="S8").view(np.uint8).reshape(-1, 8) - ord("0")).astype(np.int32)
+    return (
+        (digitos[:, 0] * 10 + digitos[:, 1]) * 3600
+        + (digitos[:, 3] * 10 + digitos[:, 4]) * 60
+        + digitos[:, 6] * 10 + digitos[:, 7]
+    )
+
+class Categorias:
+    """
+    Asigna códigos enteros estables a los ids de una dimensión.
+    """
+
+    def __init__(self):
+        self.codigos = {}
+        self.ids = []
+        self.etiquetas = []
+
+    def codificar(self, ids, etiquetas=None):
+        resultado = np.empty(len(ids), dtype=np.int32)
+        for i, valor in enumerate(ids):
+            if valor is None:
+                resultado[i] = -1
+                continue
+            codigo = self.codigos.get(valor)
+            if codigo is None:
+                codigo = self.codigos[valor] = len(self.ids)
+                self.ids.append(valor)
+                self.etiquetas.append(None)
+            if etiquetas is not None and etiquetas[i] is not None:
+                self.etiquetas[codigo] = etiquetas[i]
+            resultado[i] = codigo
+        return resultado
+
+class InstantaneaTrayectos:
+    """
+    Copia columnar en memoria de trayectos ⨝ vehiculos ⨝ rutas para los
+    reportes pesados. Se refresca de forma perezosa al consultarla: si solo
+    hubo inserciones (en SQLite) se agregan las filas con rowid mayor al último
+    cargado; las modificaciones y eliminaciones de trayectos (ver `invalidar`)
+    o cualquier escritura en vehiculos o rutas provocan una recarga completa,
+    que lee la vista trayectos_historial para incluir los trayectos archivados.
+    Es local al proceso, como el índice de disponibilidad.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._sucia = True
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.columnas = {nombre: np.empty(0, dtype=tipo) for nombre, tipo in TIPOS.items()}
+        self.categorias = {RUTA: Categorias(), VEHICULO: Categorias(), CONDUCTOR: Categorias()}
+        self._ultimo_rowid = None
+
+    def invalidar(self):
+        """
+        Fuerza una recarga completa en la próxima consulta. Se llama tras
+        modificar o eliminar trayectos, que el refresco por rowid no detecta.
+        """
+        self._sucia = True
+
+    def _consulta(self, incremental):
+        # La carga completa lee la vista que incluye los trayectos archivados;
+        # la incremental, solo las filas nuevas de la tabla viva
+        tabla = TrayectoModelo.__table__ if incremental else trayectos_historial
+        columnas = [
+            cast(tabla.c.fecha, String),
+            cast(tabla.c.hora_salida, String),
+            cast(tabla.c.hora_llegada, String),
+            tabla.c.cantidad_pasajeros,
+            tabla.c.kilometraje,
+            VehiculoModelo.capacidad_pasajeros,
+            tabla.c.ruta_id,
+            RutaModelo.codigo,
+            tabla.c.vehiculo_id,
+            VehiculoModelo.placa,
+            tabla.c.conductor_id,
+        ]
+        if incremental:
+            rowid = literal_column("trayectos.rowid")
+            columnas.append(rowid)
+        consulta = (
+            select(*columnas)
+            .select_from(tabla)
+            .outerjoin(VehiculoModelo, tabla.c.vehiculo_id == VehiculoModelo.id)
+            .outerjoin(RutaModelo, tabla.c.ruta_id == RutaModelo.id)
+        )
+        if incremental:
+            consulta = consulta.order_by(rowid)
+            if self._ultimo_rowid is not None:
+                consulta = consulta.where(rowid > self._ultimo_rowid)
+        return consulta
+
+    def actualizar(self, db: Session):
+        """
+        Sincroniza la instantánea con la base de datos si hubo escrituras.
+        """
+        version = tuple(versiones.version(tabla) for tabla in ("trayectos", "vehiculos", "rutas"))
+        with self._lock:
+            if version == self._version and not self._sucia:
+                return
+            incremental = db.get_bind().dialect.name == "sqlite"
+            completa = self._sucia or self._version is None or version[1:] != self._version[1:] or not incremental
+            if completa:
+                self._reiniciar()
+            self._sucia = False
+            self._version = version
+
+            if completa and incremental:
+                # Último rowid de la tabla viva, leído en la misma transacción que la carga completa
+                self._ultimo_rowid = db.execute(
+                    select(func.max(literal_column("trayectos.rowid"))).select_from(TrayectoModelo)
+                ).scalar()
+            filas = db.execute(self._consulta(incremental and not completa)).all()
+            if not filas:
+                return
+            (fechas, salidas, llegadas, pasajeros, kilometros, capacidades,
+             rutas, codigos, vehiculos, placas, conductores, *rowids) = zip(*filas)
+            nuevas = {
+                "fecha": np.array(fechas, dtype="datetime64[D]"),
+                "salida": _segundos(salidas),
+                "llegada": _segundos(llegadas),
+                "pasajeros": np.array(pasajeros, dtype=np.int32),
+                "kilometros": np.array(kilometros, dtype=np.int32),
+                "capacidad": np.array([np.nan if c is None else c for c in capacidades], dtype=np.float64),
+                RUTA: self.categorias[RUTA].codificar(rutas, codigos),
+                VEHICULO: self.categorias[VEHICULO].codificar(vehiculos, placas),
+                CONDUCTOR: self.categorias[CONDUCTOR].codificar(conductores),
+            }
+            self.columnas = {
+                nombre: np.concatenate([self.columnas[nombre], valores])
+                for nombre, valores in nuevas.items()
+            }
+            if rowids:
+                self._ultimo_rowid = rowids[0][-1]
+
+    def seleccionar(self, db: Session, fecha_desde=None, fecha_hasta=None):
+        """
+        Retorna las columnas (y las categorías) de los trayectos en el rango de fechas.
+        """
+        self.actualizar(db)
+        with self._lock:
+            columnas, categorias = self.columnas, self.categorias
+        mascara = np.ones(len(columnas["fecha"]), dtype=bool)
+        if fecha_desde:
+            mascara &= columnas["fecha"] >= np.datetime64(fecha_desde, "D")
+        if fecha_hasta:
+            mascara &= columnas["fecha"] <= np.datetime64(fecha_hasta, "D")
+        return {nombre: valores[mascara] for nombre, valores in columnas.items()}, categorias
+
+instantanea_trayectos = InstantaneaTrayectos()
+
+def _agrupar(*codigos):
+    """
+    Combina varias columnas de códigos no negativos en un único grupo.
+    Retorna (claves únicas por columna, grupo de cada fila).
+    """
+    if not len(codigos[0]):
+        return [np.empty(0, dtype=np.int64) for _ in codigos], np.empty(0, dtype=np.int64)
+    combinados = np.stack([c.astype(np.int64) for c in codigos], axis=1)
+    unicos, grupo = np.unique(combinados, axis=0, return_inverse=True)
+    return [unicos[:, i] for i in range(len(codigos))], grupo.ravel()
+
+def _percentiles_por_grupo(grupo, valores, cuantiles):
+    """
+    Percentiles (interpolación lineal, como np.percentile) de `valores` en
+    cada grupo 0..n-1, ordenando una sola vez todas las filas.
+    """
+    orden = np.lexsort((valores, grupo))
+    ordenados = valores[orden]
+    conteos = np.bincount(grupo)
+    inicios = np.concatenate(([0], np.cumsum(conteos)[:-1]))
+    resultado = {}
+    for cuantil in cuantiles:
+        posicion = inicios + (conteos - 1) * (cuantil / 100)
+        bajo = np.floor(posicion).astype(np.int64)
+        alto = np.minimum(bajo + 1, inicios + conteos - 1)
+        fraccion = posicion - bajo
+        resultado[cuantil] = ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * fraccion
+    return resultado
+
+def _meses(fechas):
+    return fechas.astype("datetime64[M]").astype(np.int64)
+
+def _mes_texto(mes):
+    return str(np.datetime64(int(mes), "M"))
+
+def ocupacion_por_ruta_hora(db: Session, fecha_desde=None, fecha_hasta=None, percentiles=(50, 90, 95)):
+    """
+    Ocupación (pasajeros / capacidad del vehículo) por ruta y hora de salida:
+    viajes, promedio y percentiles. Omite trayectos sin ruta o sin capacidad.
+    """
+    columnas, categorias = instantanea_trayectos.seleccionar(db, fecha_desde, fecha_hasta)
+    validas = (columnas[RUTA] >= 0) & (columnas["capacidad"] > 0)
+    ocupacion = columnas["pasajeros"][validas] / columnas["capacidad"][validas]
+    (rutas, horas), grupo = _agrupar(columnas[RUTA][validas], columnas["salida"][validas] // 3600)
+    if not len(grupo):
+        return []
+    viajes = np.bincount(grupo)
+    promedio = np.bincount(grupo, weights=ocupacion) / viajes
+    valores = _percentiles_por_grupo(grupo, ocupacion, percentiles)
+    ruta = categorias[RUTA]
+    return [
+        {
+            "ruta_id": ruta.ids[rutas[i]],
+            "ruta_codigo": ruta.etiquetas[rutas[i]],
+            "hora": int(horas[i]),
+            "viajes": int(viajes[i]),
+            "ocupacion_promedio": float(promedio[i]),
+            "percentiles": {f"p{cuantil:g}": float(valores[cuantil][i]) for cuantil in percentiles},
+        }
+        for i in range(len(viajes))
+    ]
+
+def kilometros_por_vehiculo_mes(db: Session, fecha_desde=None, fecha_hasta=None):
+    """
+    Kilómetros recorridos y viajes por vehículo y mes.
+    """
+    columnas, categorias = instantanea_trayectos.seleccionar(db, fecha_desde, fecha_hasta)
+    validas = columnas[VEHICULO] >= 0
+    meses = _meses(columnas["fecha"][validas])
+    (vehiculos, meses), grupo = _agrupar(columnas[VEHICULO][validas], meses)
+    if not len(grupo):
+        return []
+    viajes = np.bincount(grupo)
+    kilometros = np.bincount(grupo, weights=columnas["kilometros"][validas])
+    vehiculo = categorias[VEHICULO]
+    return [
+        {
+            "vehiculo_id": vehiculo.ids[vehiculos[i]],
+            "placa": vehiculo.etiquetas[vehiculos[i]],
+            "mes": _mes_texto(meses[i]),
+            "viajes": int(viajes[i]),
+            "kilometros": int(kilometros[i]),
+        }
+        for i in range(len(viajes))
+    ]
+
+def horas_por_conductor(db: Session, fecha_desde=None, fecha_hasta=None, por_mes: bool = False):
+    """
+    Horas conducidas y viajes por conductor (y mes si `por_mes`). Un trayecto
+    que llega antes de su hora de salida se cuenta como que cruza la medianoche.
+    """
+    columnas, categorias = instantanea_trayectos.seleccionar(db, fecha_desde, fecha_hasta)
+    validas = columnas[CONDUCTOR] >= 0
+    duracion = columnas["llegada"][validas] - columnas["salida"][validas]
+    duracion = np.where(duracion < 0, duracion + SEGUNDOS_DIA, duracion)
+    codigos = [columnas[CONDUCTOR][validas]]
+    if por_mes:
+        codigos.append(_meses(columnas["fecha"][validas]))
+    claves, grupo = _agrupar(*codigos)
+    if not len(grupo):
+        return []
+    viajes = np.bincount(grupo)
+    horas = np.bincount(grupo, weights=duracion) / 3600
+    conductor = categorias[CONDUCTOR]
+    return [
+        {
+            "conductor_id": conductor.ids[claves[0][i]],
+            "mes": _mes_texto(claves[1][i]) if por_mes else None,
+            "viajes": int(viajes[i]),
+            "horas": round(float(horas[i]), 2),
+        }
+        for i in range(len(viajes))
+    ]
@@ -0,0 +1,117 @@
+import os
+import time
+from datetime import date, timedelta
+from sqlalchemy import Column, Index, MetaData, Table, delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+from app.domain.models.archivo_trayectos import ArchivoTrayectos, COLUMNAS_ARCHIVO, trayectos_historial
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+
+# Antigüedad (en días) a partir de la cual los trayectos se archivan
+ARCHIVO_HORIZONTE_DIAS = int(os.getenv("ARCHIVO_HORIZONTE_DIAS", "365"))
+
+# Filas que se mueven en cada transacción y pausa entre lotes, para no
+# retener el bloqueo de escritura ni competir con las peticiones
+ARCHIVO_TAMANO_LOTE = int(os.getenv("ARCHIVO_TAMANO_LOTE", "1000"))
+ARCHIVO_PAUSA_SEGUNDOS = float(os.getenv("ARCHIVO_PAUSA_SEGUNDOS", "0.05"))
+
+_trayectos = TrayectoModelo.__table__
+_COLUMNAS = [_trayectos.c[nombre] for nombre in COLUMNAS_ARCHIVO]
+
+def fecha_corte(horizonte_dias=None) -> date:
+    """
+    Se archivan los trayectos con fecha anterior a la fecha de corte.
+    """
+    return date.today() - timedelta(days=horizonte_dias or ARCHIVO_HORIZONTE_DIAS)
+
+def contar_archivables(db: Session, corte: date) -> int:
+    return db.execute(select(func.count()).select_from(_trayectos).where(_trayectos.c.fecha < corte)).scalar()
+
+def _nombre_tabla(mes: date) -> str:
+    return f"trayectos_archivo_{mes.year:04d}_{mes.month:02d}"
+
+def _tabla_archivo(nombre: str) -> Table:
+    # Mismas columnas que trayectos (sin versión ni claves foráneas) y los
+    # mismos índices de los filtros por fecha y por recurso
+    tabla = Table(
+        nombre,
+        MetaData(),
+        *[Column(columna.name, columna.type, primary_key=columna.primary_key, nullable=columna.nullable) for columna in _COLUMNAS],
+    )
+    Index(f"ix_{nombre}_fecha_hora", tabla.c.fecha, tabla.c.hora_salida, tabla.c.id)
+    for recurso in ("conductor_id", "vehiculo_id", "ruta_id"):
+        Index(f"ix_{nombre}_{recurso.removesuffix('_id')}_fecha", tabla.c[recurso], tabla.c.fecha, tabla.c.hora_salida)
+    return tabla
+
+def recrear_vista(db: Session):
+    """
+    Recrea la vista trayectos_historial como la unión de la tabla viva y las
+    tablas de archivo registradas. No hace commit.
+    """
+    columnas = ", ".join(COLUMNAS_ARCHIVO)
+    tablas = ["trayectos"] + list(db.execute(select(ArchivoTrayectos.tabla).order_by(ArchivoTrayectos.mes)).scalars())
+    union = " UNION ALL ".join(f"SELECT {columnas} FROM {tabla}" for tabla in tablas)
+    db.execute(text(f"DROP VIEW IF EXISTS {trayectos_historial.name}"))
+    db.execute(text(f"CREATE VIEW {trayectos_historial.name} AS {union}"))
+
+def _asegurar_tabla(db: Session, mes: date) -> Table:
+    nombre = _nombre_tabla(mes)
+    tabla = _tabla_archivo(nombre)
+    if db.get(ArchivoTrayectos, nombre) is None:
+        tabla.create(db.connection())
+        db.add(ArchivoTrayectos(tabla=nombre, mes=mes, filas=0))
+        db.flush()
+        recrear_vista(db)
+    return tabla
+
+def archivar_trayectos(
+    db: Session,
+    corte: date,
+    tamano_lote: int = ARCHIVO_TAMANO_LOTE,
+    pausa: float = ARCHIVO_PAUSA_SEGUNDOS,
+    al_confirmar=None,
+    al_progresar=None,
+) -> int:
+    """
+    Mueve los trayectos con fecha anterior a `corte` a su tabla de archivo
+    mensual, de a `tamano_lote` filas por transacción (copia y borrado en la
+    misma transacción) con una pausa entre lotes. Puede interrumpirse y
+    reanudarse en cualquier momento.
+
+    El resumen diario no se modifica: archivar no es eliminar. Tampoco se
+    registran tombstones para /sync, de modo que los clientes conservan los
+    trayectos archivados que ya tenían.
+
+    `al_confirmar(ids)` se llama tras cada commit y `al_progresar(movidos)`
+    con el total acumulado. Retorna la cantidad de trayectos archivados.
+    """
+    orden = [_trayectos.c.fecha, _trayectos.c.hora_salida, _trayectos.c.id]
+    movidos = 0
+    while True:
+        filas = db.execute(
+            select(*_COLUMNAS).where(_trayectos.c.fecha < corte).order_by(*orden).limit(tamano_lote)
+        ).mappings().all()
+        if not filas:
+            break
+        por_mes = {}
+        for fila in filas:
+            por_mes.setdefault(fila["fecha"].replace(day=1), []).append(dict(fila))
+        for mes, grupo in por_mes.items():
+            tabla = _asegurar_tabla(db, mes)
+            db.execute(insert(tabla), grupo)
+            db.execute(
+                update(ArchivoTrayectos)
+                .where(ArchivoTrayectos.tabla == tabla.name)
+                .values(filas=ArchivoTrayectos.filas + len(grupo))
+            )
+        ids = [fila["id"] for fila in filas]
+        db.execute(delete(_trayectos).where(_trayectos.c.id.in_(ids)))
+        db.commit()
+        movidos += len(ids)
+        if al_confirmar:
+            al_confirmar(ids)
+        if al_progresar:
+            al_progresar(movidos)
+        if len(filas) < tamano_lote:
+            break
+        time.sleep(pausa)
+    return movidos
@@ -0,0 +1,163 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.data.indice_disponibilidad import CONDUCTOR, VEHICULO, IndiceDisponibilidad, _a_segundos
+from app.domain.models.conductor import Conductor as ConductorModelo
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+# Valores (en minúsculas) de `estado` y `estado_operativo` que habilitan a un recurso
+ESTADOS_CONDUCTOR_ACTIVO = {"1", "true", "activo"}
+ESTADOS_VEHICULO_OPERATIVO = {"activo", "operativo"}
+
+SIN_RESERVA = float("inf")
+
+class _Recurso:
+    """
+    Un conductor o vehículo durante un día: sus reservas existentes ordenadas
+    y hasta cuándo está ocupado por lo ya asignado en este barrido.
+    """
+
+    __slots__ = ("id", "capacidad", "reservas", "siguiente", "orden")
+
+    def __init__(self, recurso_id, capacidad, reservas, orden):
+        self.id = recurso_id
+        self.capacidad = capacidad
+        self.reservas = reservas
+        self.siguiente = 0
+        self.orden = orden
+
+class _Barrido:
+    """
+    Asignación voraz de un tipo de recurso a los trayectos de un día, recorridos
+    por hora de salida (partición de intervalos):
+
+    - `ocupados`: heap de (libre_desde, orden, recurso) con los recursos ocupados.
+    - `libres`: por capacidad, listas ordenadas de (inicio de la próxima reserva,
+      orden, recurso) con los recursos libres en la hora actual.
+
+    Cada trayecto toma, entre las capacidades suficientes de menor a mayor, el
+    recurso libre cuya próxima reserva empieza antes pero después de la llegada
+    (best fit), de modo que los huecos largos quedan para los trayectos largos.
+    Cada paso cuesta O(log n) más el número de capacidades distintas.
+    """
+
+    def __init__(self, recursos):
+        self.ocupados = []
+        self.libres = {}
+        self.capacidades = sorted({recurso.capacidad for recurso in recursos})
+        for recurso in recursos:
+            self._ubicar(recurso, -1)
+
+    def _ubicar(self, recurso, ahora):
+        """
+        Coloca el recurso en `libres` u `ocupados` según sus reservas en `ahora`.
+        Un intervalo [a, b] choca con [s, e] si a <= e y b >= s (extremos incluidos).
+        """
+        reservas = recurso.reservas
+        while recurso.siguiente < len(reservas) and reservas[recurso.siguiente][1] < ahora:
+            recurso.siguiente += 1
+        if recurso.siguiente < len(reservas) and reservas[recurso.siguiente][0] <= ahora:
+            heapq.heappush(self.ocupados, (reservas[recurso.siguiente][1], recurso.orden, recurso))
+            recurso.siguiente += 1
+            return
+        inicio = reservas[recurso.siguiente][0] if recurso.siguiente < len(reservas) else SIN_RESERVA
+        insort(self.libres.setdefault(recurso.capacidad, []), (inicio, recurso.orden, recurso))
+
+    def _avanzar(self, salida):
+        while self.ocupados and self.ocupados[0][0] < salida:
+            _, _, recurso = heapq.heappop(self.ocupados)
+            self._ubicar(recurso, salida)
+        for libres in self.libres.values():
+            # Recursos cuya próxima reserva ya empezó: pasan a ocupados o avanzan de reserva
+            vencidos = bisect_right(libres, salida, key=lambda libre: libre[0])
+            if vencidos:
+                pendientes = libres[:vencidos]
+                del libres[:vencidos]
+                for _, _, recurso in pendientes:
+                    self._ubicar(recurso, salida)
+
+    def asignar(self, salida, llegada, requerida=0):
+        """
+        Retorna el recurso asignado al intervalo [salida, llegada] o None.
+        """
+        self._avanzar(salida)
+        for capacidad in self.capacidades[bisect_left(self.capacidades, requerida):]:
+            libres = self.libres.get(capacidad)
+            if not libres:
+                continue
+            posicion = bisect_right(libres, llegada, key=lambda libre: libre[0])
+            if posicion < len(libres):
+                _, _, recurso = libres.pop(posicion)
+                heapq.heappush(self.ocupados, (llegada, recurso.orden, recurso))
+                return recurso
+        return None
+
+def _recursos(db: Session, modelo, columna_estado, estados, columna_capacidad=None):
+    columnas = [modelo.id] + ([columna_capacidad] if columna_capacidad is not None else [])
+    filas = db.execute(select(*columnas).where(func.lower(columna_estado).in_(estados)).order_by(modelo.id)).all()
+    return [(fila[0], fila[1] if columna_capacidad is not None else 0) for fila in filas]
+
+def planificar(db: Session, indice: IndiceDisponibilidad, fecha_desde, fecha_hasta, conductores=True, vehiculos=True):
+    """
+    Calcula las asignaciones para los trayectos del rango sin conductor o sin
+    vehículo, sin escribir nada. Retorna (anteriores, nuevos, sin_asignar): las
+    filas completas antes y después de asignar y una lista de
+    (trayecto_id, motivo) con los que no pudieron completarse.
+    """
+    faltantes = []
+    if conductores:
+        faltantes.append(TrayectoModelo.conductor_id.is_(None))
+    if vehiculos:
+        faltantes.append(TrayectoModelo.vehiculo_id.is_(None))
+    if not faltantes:
+        return [], [], []
+    trayectos = [
+        fila._asdict()
+        for fila in db.execute(
+            select(*TrayectoModelo.__table__.columns)
+            .where(TrayectoModelo.fecha >= fecha_desde, TrayectoModelo.fecha <= fecha_hasta, or_(*faltantes))
+            .order_by(TrayectoModelo.fecha, TrayectoModelo.hora_salida, TrayectoModelo.id)
+        )
+    ]
+    tipos = []
+    if conductores:
+        tipos.append((CONDUCTOR, "conductor_id", _recursos(db, ConductorModelo, ConductorModelo.estado, ESTADOS_CONDUCTOR_ACTIVO)))
+    if vehiculos:
+        tipos.append((VEHICULO, "vehiculo_id", _recursos(
+            db, VehiculoModelo, VehiculoModelo.estado_operativo, ESTADOS_VEHICULO_OPERATIVO, VehiculoModelo.capacidad_pasajeros
+        )))
+
+    anteriores, nuevos, sin_asignar = [], [], []
+    por_fecha = {}
+    for trayecto in trayectos:
+        por_fecha.setdefault(trayecto["fecha"], []).append(trayecto)
+
+    for fecha, del_dia in por_fecha.items():
+        asignados = [dict(trayecto) for trayecto in del_dia]
+        motivos = [[] for _ in del_dia]
+        for tipo, columna, disponibles in tipos:
+            barrido = _Barrido([
+                _Recurso(recurso_id, capacidad, [(inicio, fin) for inicio, fin, _ in indice.intervalos(tipo, fecha, recurso_id)], orden)
+                for orden, (recurso_id, capacidad) in enumerate(disponibles)
+            ])
+            for posicion, trayecto in enumerate(asignados):
+                if trayecto[columna] is not None:
+                    continue
+                requerida = trayecto["cantidad_pasajeros"] if tipo == VEHICULO else 0
+                recurso = barrido.asignar(_a_segundos(trayecto["hora_salida"]), _a_segundos(trayecto["hora_llegada"]), requerida)
+                if recurso is None:
+                    motivos[posicion].append(
+                        "No hay conductores activos libres en ese horario" if tipo == CONDUCTOR
+                        else "No hay vehículos operativos libres con capacidad suficiente en ese horario"
+                    )
+                else:
+                    trayecto[columna] = recurso.id
+        for anterior, nuevo, motivo in zip(del_dia, asignados, motivos):
+            if motivo:
+                sin_asignar.append((anterior["id"], "; ".join(motivo)))
+            if nuevo != anterior:
+                anteriores.append(anterior)
+                nuevos.append(nuevo)
+    return anteriores, nuevos, sin_asignar
@@ -0,0 +1,155 @@
+from sqlalchemy import or_, select, text
+from sqlalchemy.orm import Session
+from app.data.database import Base
+
+# Entidades que se pueden buscar: tabla, columnas indexadas (las mismas de la
+# migración 0006), pesos de cada columna en el ranking y columnas que
+# identifican al registro (una coincidencia exacta en ellas va primero)
+ENTIDADES = {
+    "vehiculo": {
+        "tabla": "vehiculos",
+        "columnas": ("placa", "lateral", "marca", "modelo"),
+        "pesos": (10.0, 10.0, 1.0, 1.0),
+        "claves": ("placa", "lateral"),
+    },
+    "conductor": {
+        "tabla": "conductores",
+        "columnas": ("nombre", "cedula", "licencia"),
+        "pesos": (5.0, 10.0, 1.0),
+        "claves": ("cedula",),
+    },
+    "ruta": {
+        "tabla": "rutas",
+        "columnas": ("codigo", "nombre", "origen", "destino"),
+        "pesos": (10.0, 5.0, 2.0, 2.0),
+        "claves": ("codigo",),
+    },
+}
+
+# El tokenizador trigram solo indexa términos de al menos 3 caracteres
+MINIMO_TRIGRAMA = 3
+
+def _titulo(tipo, fila):
+    if tipo == "vehiculo":
+        return f"{fila['placa']} (lateral {fila['lateral']})", f"{fila['marca']} {fila['modelo']}"
+    if tipo == "conductor":
+        return fila["nombre"], f"Cédula {fila['cedula']}"
+    return f"{fila['codigo']} {fila['nombre']}", f"{fila['origen']} - {fila['destino']}"
+
+def _patron_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _buscar_sqlite(db: Session, entidad, palabras, limite):
+    tabla, columnas = entidad["tabla"], entidad["columnas"]
+    fts = f"{tabla}_busqueda"
+    seleccion = ", ".join(f"t.{columna}" for columna in columnas)
+    largas = [palabra for palabra in palabras if len(palabra) >= MINIMO_TRIGRAMA]
+    cortas = [palabra for palabra in palabras if len(palabra) < MINIMO_TRIGRAMA]
+    if largas:
+        # Cada palabra es una frase: coincide como subcadena en cualquier columna.
+        # Las palabras cortas, que el índice no puede buscar, se exigen con LIKE
+        # sobre las filas que ya coincidieron
+        consulta = " ".join('"' + palabra.replace('"', '""') + '"' for palabra in largas)
+        pesos = ", ".join(str(peso) for peso in entidad["pesos"])
+        filtros = "".join(
+            " AND (" + " OR ".join(f"t.{columna} LIKE :corta{i} ESCAPE '\\'" for columna in columnas) + ")"
+            for i in range(len(cortas))
+        )
+        sql = f"""
+            SELECT t.id, {seleccion}, -bm25({fts}, {pesos}) AS puntaje
+            FROM {fts} JOIN {tabla} t ON t.rowid = {fts}.rowid
+            WHERE {fts} MATCH :consulta{filtros}
+            ORDER BY puntaje DESC LIMIT :limite
+        """
+        parametros = {"consulta": consulta, "limite": limite}
+        parametros.update({f"corta{i}": f"%{_patron_like(palabra)}%" for i, palabra in enumerate(cortas)})
+    else:
+        # Consultas cortas: prefijo de alguna columna. El índice no sirve aquí
+        # (y la tabla FTS de contenido externo lee sus columnas de la maestra),
+        # así que es un recorrido de la tabla maestra
+        condicion = " OR ".join(f"{columna} LIKE :patron ESCAPE '\\'" for columna in columnas)
+        sql = f"""
+            SELECT id, {", ".join(columnas)}, 0.0 AS puntaje
+            FROM {tabla}
+            WHERE {condicion}
+            LIMIT :limite
+        """
+        parametros = {"patron": _patron_like(" ".join(palabras)) + "%", "limite": limite}
+    return db.execute(text(sql), parametros).mappings().all()
+
+def _buscar_postgres(db: Session, entidad, palabras, limite):
+    tabla, columnas = entidad["tabla"], entidad["columnas"]
+    # La misma expresión del índice GIN pg_trgm de la migración 0006
+    expresion = "(" + " || ' ' || ".join(columnas) + ")"
+    condiciones = " AND ".join(f"{expresion} ILIKE :patron{i}" for i in range(len(palabras)))
+    sql = f"""
+        SELECT id, {", ".join(columnas)}, similarity({expresion}, :consulta) AS puntaje
+        FROM {tabla}
+        WHERE {condiciones}
+        ORDER BY puntaje DESC LIMIT :limite
+    """
+    parametros = {f"patron{i}": f"%{_patron_like(palabra)}%" for i, palabra in enumerate(palabras)}
+    parametros.update(consulta=" ".join(palabras), limite=limite)
+    return db.execute(text(sql), parametros).mappings().all()
+
+def _buscar_generico(db: Session, entidad, palabras, limite):
+    # Otros motores: sin índice de texto, LIKE sobre la tabla maestra
+    tabla = Base.metadata.tables[entidad["tabla"]]
+    columnas = [tabla.c[columna] for columna in entidad["columnas"]]
+    consulta = select(tabla.c.id, *columnas)
+    for palabra in palabras:
+        patron = f"%{_patron_like(palabra)}%"
+        consulta = consulta.where(or_(*[columna.ilike(patron, escape="\\") for columna in columnas]))
+    return [{**fila, "puntaje": 0.0} for fila in db.execute(consulta.limit(limite)).mappings()]
+
+def buscar(db: Session, q: str, tipos=None, limite: int = 20):
+    """
+    Busca `q` en las entidades de `tipos` (todas por defecto). Cada palabra
+    de `q` debe aparecer, como subcadena, en alguna de las columnas indexadas.
+    Retorna hasta `limite` dicts con tipo, id, titulo, detalle y puntaje,
+    ordenados por relevancia; las coincidencias exactas con un identificador
+    (placa, lateral, cédula o código) van primero.
+    """
+    palabras = q.split()
+    if not palabras:
+        return []
+    dialecto = db.get_bind().dialect.name
+    buscar_en = {"sqlite": _buscar_sqlite, "postgresql": _buscar_postgres}.get(dialecto, _buscar_generico)
+    exacto = q.strip().casefold()
+    resultados = []
+    for tipo in tipos or ENTIDADES:
+        entidad = ENTIDADES[tipo]
+        for fila in buscar_en(db, entidad, palabras, limite):
+            titulo, detalle = _titulo(tipo, fila)
+            coincide = any(str(fila[clave]).casefold() == exacto for clave in entidad["claves"])
+            resultados.append((coincide, fila["puntaje"], {
+                "tipo": tipo,
+                "id": fila["id"],
+                "titulo": titulo,
+                "detalle": detalle,
+                "puntaje": round(fila["puntaje"], 6),
+            }))
+    resultados.sort(key=lambda resultado: (resultado[0], resultado[1]), reverse=True)
+    return [resultado for _, _, resultado in resultados[:limite]]
+
+def reconstruir(db: Session):
+    """
+    Reconstruye los índices FTS5 desde las tablas maestras. Necesario en SQLite
+    después de un VACUUM, que puede renumerar los rowid en los que se apoyan.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    for entidad in ENTIDADES.values():
+        fts = f"{entidad['tabla']}_busqueda"
+        db.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+
+if __name__ == "__main__":
+    # python -m app.data.busqueda: reconstruye los índices de búsqueda
+    from app.data.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        reconstruir(db)
+        db.commit()
+    finally:
+        db.close()
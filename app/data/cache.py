@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configuración de las cachés de datos maestros
+CACHE_CAPACIDAD = int(os.getenv("CACHE_CAPACIDAD", "10000"))
+CACHE_TTL_SEGUNDOS = float(os.getenv("CACHE_TTL_SEGUNDOS", "300"))
+
+class Cache:
+    """
+    Interfaz de las cachés de lectura. Permite reemplazar el backend en
+    memoria por otro (por ejemplo uno compartido entre procesos) registrándolo
+    con `registrar_cache`.
+    """
+
+    def obtener(self, clave):
+        raise NotImplementedError
+
+    def guardar(self, clave, valor, generacion=None):
+        """
+        Guarda el valor; con `generacion` (leída antes de cargarlo) lo descarta
+        si la caché se invalidó mientras tanto, pues pudo leerse antes de la escritura.
+        """
+        raise NotImplementedError
+
+    def invalidar(self):
+        raise NotImplementedError
+
+    def generacion(self) -> int:
+        """
+        Contador que cambia con cada invalidación.
+        """
+        raise NotImplementedError
+
+    def estadisticas(self) -> dict:
+        raise NotImplementedError
+
+    def obtener_o_cargar(self, clave, cargar):
+        """
+        Lectura a través de la caché: si la clave no está, la carga con
+        `cargar()` y la guarda. Los resultados None no se guardan.
+        """
+        valor = self.obtener(clave)
+        if valor is None:
+            generacion = self.generacion()
+            valor = cargar()
+            if valor is not None:
+                self.guardar(clave, valor, generacion)
+        return valor
+
+    def obtener_varios(self, claves, cargar) -> dict:
+        """
+        Igual que `obtener_o_cargar` para varias claves: las faltantes se
+        cargan juntas con `cargar(faltantes)`, que retorna {clave: valor}.
+        """
+        encontrados = {}
+        faltantes = []
+        for clave in claves:
+            valor = self.obtener(clave)
+            if valor is None:
+                faltantes.append(clave)
+            else:
+                encontrados[clave] = valor
+        if faltantes:
+            generacion = self.generacion()
+            for clave, valor in cargar(faltantes).items():
+                self.guardar(clave, valor, generacion)
+                encontrados[clave] = valor
+        return encontrados
+
+class CacheLRU(Cache):
+    """
+    Caché en memoria acotada por cantidad de entradas (desalojo LRU) y por
+    antigüedad (TTL). Es local al proceso y segura entre hilos.
+    """
+
+    def __init__(self, capacidad: int = CACHE_CAPACIDAD, ttl: float = CACHE_TTL_SEGUNDOS):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._entradas[clave]
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, generacion=None):
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._generacion += 1
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"entradas": len(self._entradas), "aciertos": self.aciertos, "fallos": self.fallos}
+
+_caches = {}
+
+def registrar_cache(nombre: str, cache: Cache):
+    _caches[nombre] = cache
+
+def obtener_cache(nombre: str) -> Cache:
+    if nombre not in _caches:
+        registrar_cache(nombre, CacheLRU())
+    return _caches[nombre]
+
+def estadisticas_caches() -> dict:
+    return {nombre: cache.estadisticas() for nombre, cache in _caches.items()}
@@ -0,0 +1,31 @@
+from app.data.cache import obtener_cache
+from app.data.eventos import bus_eventos
+from app.data.versiones import versiones
+
+def notificar_cambio(tabla: str, tipo: str = "actualizado", ids=None, **datos):
+    """
+    Se llama después de confirmar cualquier escritura sobre `tabla`: incrementa
+    su versión local (usada por la instantánea de analítica), invalida su caché
+    de lectura y publica el evento `tipo` (creado, actualizado, eliminado o
+    carga) para /events.
+    """
+    versiones.incrementar(tabla)
+    obtener_cache(tabla).invalidar()
+    if ids is not None:
+        datos["ids"] = list(ids)
+    bus_eventos.publicar(tabla, tipo, datos)
+
+def sincronizar_tablas(estados: dict):
+    """
+    Recibe {tabla: estado} leído de la base de datos. Las tablas cuyo estado
+    cambió desde la última lectura (por ejemplo, por escrituras de otro
+    proceso) incrementan su versión e invalidan su caché local, sin publicar
+    eventos. Retorna esas tablas.
+    """
+    cambiadas = []
+    for tabla, estado in estados.items():
+        if versiones.observar(tabla, estado):
+            versiones.incrementar(tabla)
+            obtener_cache(tabla).invalidar()
+            cambiadas.append(tabla)
+    return cambiadas
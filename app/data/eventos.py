@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from app.data.versiones import ARRANQUE
+
+# Eventos recientes que se conservan para reanudar con Last-Event-ID
+EVENTOS_BUFFER = int(os.getenv("EVENTOS_BUFFER", "1000"))
+
+# Eventos pendientes por cliente antes de desconectarlo por lento
+EVENTOS_COLA_CLIENTE = int(os.getenv("EVENTOS_COLA_CLIENTE", "100"))
+
+# Tópicos publicados: uno por tabla
+TOPICOS = ("vehiculos", "conductores", "rutas", "trayectos")
+
+class Evento:
+    __slots__ = ("numero", "topico", "tipo", "datos")
+
+    def __init__(self, numero, topico, tipo, datos):
+        self.numero = numero
+        self.topico = topico
+        self.tipo = tipo
+        self.datos = datos
+
+    @property
+    def id(self):
+        return f"{ARRANQUE}-{self.numero}"
+
+class Suscripcion:
+    """
+    Cola de un cliente, ligada al event loop que la consume. Si el cliente no
+    consume a tiempo y la cola se llena, se marca como desbordada: el flujo se
+    cierra y el cliente se reconecta con Last-Event-ID para recuperar lo perdido
+    del buffer, en lugar de frenar a quienes publican.
+    """
+
+    def __init__(self, topicos, limite):
+        self.topicos = topicos
+        self.limite = limite
+        self.cola = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.desbordada = False
+
+    def _entregar(self, evento):
+        if self.desbordada:
+            return
+        if self.cola.qsize() >= self.limite:
+            self.desbordada = True
+            # Despierta al consumidor para que cierre el flujo
+            self.cola.put_nowait(None)
+            return
+        self.cola.put_nowait(evento)
+
+    def entregar(self, evento):
+        if self.topicos is None or evento.topico in self.topicos:
+            self.loop.call_soon_threadsafe(self._entregar, evento)
+
+class BusEventos:
+    """
+    Pub/sub en memoria de los cambios confirmados, con un buffer circular de
+    los últimos eventos. Es local al proceso: con varios workers cada uno
+    tiene su propio bus y sus propios ids de evento.
+    """
+
+    def __init__(self, capacidad=EVENTOS_BUFFER):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=capacidad)
+        self._numero = 0
+        self._suscripciones = set()
+
+    def publicar(self, topico, tipo, datos=None):
+        """
+        Publica un evento; puede llamarse desde cualquier hilo.
+        """
+        with self._lock:
+            self._numero += 1
+            evento = Evento(self._numero, topico, tipo, datos or {})
+            self._buffer.append(evento)
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            if suscripcion.desbordada:
+                # Cliente ya desconectado o que nunca empezó a leer
+                self.desuscribir(suscripcion)
+                continue
+            try:
+                suscripcion.entregar(evento)
+            except RuntimeError:
+                # El event loop del cliente ya se cerró
+                self.desuscribir(suscripcion)
+
+    def suscribir(self, topicos=None, ultimo_id=None, limite=EVENTOS_COLA_CLIENTE):
+        """
+        Registra un cliente desde su event loop. Retorna (suscripcion, pendientes,
+        completo): los eventos del buffer posteriores a `ultimo_id`, y si el
+        buffer cubre todo lo ocurrido desde ese id (si no, el cliente debe
+        recargar su estado).
+        """
+        suscripcion = Suscripcion(topicos, limite)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            if ultimo_id is None:
+                return suscripcion, [], True
+            numero = self._numero_de(ultimo_id)
+            primero = self._buffer[0].numero if self._buffer else self._numero + 1
+            completo = numero is not None and numero >= primero - 1 and numero <= self._numero
+            pendientes = [
+                evento for evento in self._buffer
+                if completo and evento.numero > numero and (topicos is None or evento.topico in topicos)
+            ]
+        return suscripcion, pendientes, completo
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    @staticmethod
+    def _numero_de(ultimo_id):
+        arranque, _, numero = ultimo_id.rpartition("-")
+        if arranque != ARRANQUE or not numero.isdigit():
+            return None
+        return int(numero)
+
+bus_eventos = BusEventos()
@@ -0,0 +1,208 @@
+import heapq
+import threading
+from bisect import bisect_right, insort
+from datetime import date, time
+from sqlalchemy.orm import Session
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+
+CONDUCTOR = "conductor"
+VEHICULO = "vehiculo"
+
+def _a_fecha(valor):
+    if isinstance(valor, str):
+        return date.fromisoformat(valor)
+    return valor
+
+def _a_segundos(valor):
+    if isinstance(valor, str):
+        valor = time.fromisoformat(valor)
+    return valor.hour * 3600 + valor.minute * 60 + valor.second
+
+class IndiceDisponibilidad:
+    """
+    Índice en memoria de los horarios ocupados por cada conductor y vehículo.
+    Por cada (tipo, fecha, recurso) guarda una lista de intervalos ordenada por
+    hora de salida, de modo que la búsqueda de traslapes cuesta O(log n + k).
+    El índice es local al proceso: se reconstruye desde la base de datos al
+    iniciar y los endpoints de trayectos lo mantienen sincronizado. Entre
+    procesos, los traslapes los impide la base de datos (migración 0009).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cargado = False
+        self._intervalos = {}
+        self._duracion_maxima = {}
+        self._trayectos = {}
+
+    def reconstruir(self, db: Session):
+        """
+        Carga desde cero todos los trayectos con conductor o vehículo asignado.
+        """
+        filas = db.query(
+            TrayectoModelo.id,
+            TrayectoModelo.fecha,
+            TrayectoModelo.hora_salida,
+            TrayectoModelo.hora_llegada,
+            TrayectoModelo.conductor_id,
+            TrayectoModelo.vehiculo_id,
+        ).all()
+        with self._lock:
+            self._intervalos = {}
+            self._duracion_maxima = {}
+            self._trayectos = {}
+            for fila in filas:
+                self.agregar(*fila)
+            self.cargado = True
+
+    def bloqueo(self):
+        """
+        Candado (reentrante) del índice: quien lo toma puede validar, escribir
+        e indexar trayectos sin que otra solicitud del proceso se intercale.
+        """
+        return self._lock
+
+    def asegurar_cargado(self, db: Session):
+        if not self.cargado:
+            self.reconstruir(db)
+
+    def _claves(self, fecha, conductor_id, vehiculo_id):
+        claves = []
+        if conductor_id:
+            claves.append((CONDUCTOR, fecha, conductor_id))
+        if vehiculo_id:
+            claves.append((VEHICULO, fecha, vehiculo_id))
+        return claves
+
+    def agregar(self, trayecto_id, fecha, hora_salida, hora_llegada, conductor_id=None, vehiculo_id=None):
+        fecha = _a_fecha(fecha)
+        inicio, fin = _a_segundos(hora_salida), _a_segundos(hora_llegada)
+        with self._lock:
+            self.eliminar(trayecto_id)
+            claves = self._claves(fecha, conductor_id, vehiculo_id)
+            for clave in claves:
+                insort(self._intervalos.setdefault(clave, []), (inicio, fin, trayecto_id))
+                self._duracion_maxima[clave] = max(self._duracion_maxima.get(clave, 0), fin - inicio)
+            if claves:
+                self._trayectos[trayecto_id] = (fecha, inicio, fin, conductor_id, vehiculo_id)
+
+    def eliminar(self, trayecto_id):
+        with self._lock:
+            datos = self._trayectos.pop(trayecto_id, None)
+            if datos is None:
+                return
+            fecha, inicio, fin, conductor_id, vehiculo_id = datos
+            for clave in self._claves(fecha, conductor_id, vehiculo_id):
+                intervalos = self._intervalos.get(clave, [])
+                try:
+                    intervalos.remove((inicio, fin, trayecto_id))
+                except ValueError:
+                    pass
+                if not intervalos:
+                    self._intervalos.pop(clave, None)
+                    self._duracion_maxima.pop(clave, None)
+
+    def obtener(self, trayecto_id):
+        """
+        Retorna (fecha, inicio, fin, conductor_id, vehiculo_id) de un trayecto indexado.
+        """
+        with self._lock:
+            return self._trayectos.get(trayecto_id)
+
+    def intervalos(self, tipo, fecha, recurso):
+        """
+        Copia de los intervalos (inicio, fin, trayecto_id) que ocupan a un recurso en una fecha.
+        """
+        with self._lock:
+            return list(self._intervalos.get((tipo, _a_fecha(fecha), recurso), ()))
+
+    def _traslape(self, clave, inicio, fin, excluir_id=None):
+        intervalos = self._intervalos.get(clave)
+        if not intervalos:
+            return None
+        # Candidatos: intervalos que salen antes (o justo cuando) termina el nuevo
+        posicion = bisect_right(intervalos, fin, key=lambda intervalo: intervalo[0])
+        limite = inicio - self._duracion_maxima[clave]
+        for i in range(posicion - 1, -1, -1):
+            salida, llegada, trayecto_id = intervalos[i]
+            if salida < limite:
+                break
+            if llegada >= inicio and trayecto_id != excluir_id:
+                return trayecto_id
+        return None
+
+    def buscar_conflicto(self, fecha, hora_salida, hora_llegada, conductor_id=None, vehiculo_id=None, excluir_id=None):
+        """
+        Retorna (tipo, trayecto_id) del primer trayecto que se traslapa con el
+        horario dado para el conductor o el vehículo, o None si ambos están libres.
+        """
+        fecha = _a_fecha(fecha)
+        inicio, fin = _a_segundos(hora_salida), _a_segundos(hora_llegada)
+        with self._lock:
+            for clave in self._claves(fecha, conductor_id, vehiculo_id):
+                trayecto_id = self._traslape(clave, inicio, fin, excluir_id)
+                if trayecto_id:
+                    return clave[0], trayecto_id
+        return None
+
+    def conflictos_lote(self, filas):
+        """
+        Valida un lote completo de trayectos en una sola pasada.
+        Cada fila es (fecha, hora_salida, hora_llegada, conductor_id, vehiculo_id, excluir_id).
+        Por cada clave (tipo, fecha, recurso) del lote ordena juntos los intervalos
+        existentes y los nuevos y los recorre con una línea de barrido, de modo que
+        también se detectan los traslapes entre filas del mismo lote; en ese caso
+        se marca la fila posterior, solo si la anterior no fue rechazada (una fila
+        que no se insertará no ocupa el horario). Retorna {posicion: [(tipo,
+        trayecto_id, fila)]}, donde trayecto_id es None si el conflicto es con
+        otra fila del lote.
+        """
+        por_clave = {}
+        excluidos = set()
+        for posicion, (fecha, hora_salida, hora_llegada, conductor_id, vehiculo_id, excluir_id) in enumerate(filas):
+            fecha = _a_fecha(fecha)
+            intervalo = (_a_segundos(hora_salida), _a_segundos(hora_llegada), posicion)
+            if excluir_id:
+                excluidos.add(excluir_id)
+            for clave in self._claves(fecha, conductor_id, vehiculo_id):
+                por_clave.setdefault(clave, []).append(intervalo)
+
+        conflictos = {}
+        # Traslapes entre filas del lote: {fila posterior: [(tipo, fila anterior)]}
+        en_lote = {}
+        with self._lock:
+            for clave, nuevos in por_clave.items():
+                eventos = [
+                    (inicio, fin, None, trayecto_id)
+                    for inicio, fin, trayecto_id in self._intervalos.get(clave, [])
+                    if trayecto_id not in excluidos
+                ]
+                eventos.extend((inicio, fin, posicion, None) for inicio, fin, posicion in nuevos)
+                eventos.sort(key=lambda evento: (evento[0], -1 if evento[2] is None else evento[2]))
+
+                activos = []
+                for orden, (inicio, fin, posicion, trayecto_id) in enumerate(eventos):
+                    # Los intervalos que terminan antes de esta salida ya no se traslapan
+                    while activos and activos[0][0] < inicio:
+                        heapq.heappop(activos)
+                    for _, _, otra_posicion, otro_id in activos:
+                        if posicion is None and otra_posicion is None:
+                            continue
+                        if posicion is None:
+                            conflictos.setdefault(otra_posicion, []).append((clave[0], trayecto_id, None))
+                        elif otra_posicion is None:
+                            conflictos.setdefault(posicion, []).append((clave[0], otro_id, None))
+                        else:
+                            anterior, posterior = sorted((posicion, otra_posicion))
+                            en_lote.setdefault(posterior, []).append((clave[0], anterior))
+                    heapq.heappush(activos, (fin, orden, posicion, trayecto_id))
+
+        # En orden de posición, cada fila choca solo con las anteriores aceptadas:
+        # el rechazo de una fila depende únicamente de filas previas, ya resueltas
+        for posicion in sorted(en_lote):
+            for tipo, anterior in en_lote[posicion]:
+                if anterior not in conflictos:
+                    conflictos.setdefault(posicion, []).append((tipo, None, anterior))
+        return conflictos
+
+indice_disponibilidad = IndiceDisponibilidad()
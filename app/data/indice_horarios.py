@@ -0,0 +1,139 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import time
+from itertools import islice
+from sqlalchemy.orm import Session
+from app.data.indice_disponibilidad import _a_fecha, _a_segundos
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+
+def _a_hora(segundos):
+    return time(segundos // 3600, segundos % 3600 // 60, segundos % 60)
+
+class IndiceHorarios:
+    """
+    Índice en memoria de las salidas de cada ruta. Por cada (ruta, fecha)
+    guarda una lista de salidas ordenada por hora, y por cada ruta la lista
+    ordenada de fechas con salidas, de modo que las próximas k salidas desde
+    un instante cuestan O(log n + k). Es local al proceso: se reconstruye
+    desde la base de datos al iniciar y los endpoints de trayectos lo
+    mantienen sincronizado.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cargado = False
+        self._salidas = {}
+        self._fechas = {}
+        self._trayectos = {}
+
+    def reconstruir(self, db: Session):
+        """
+        Carga desde cero todos los trayectos con ruta asignada.
+        """
+        filas = db.query(
+            TrayectoModelo.id,
+            TrayectoModelo.fecha,
+            TrayectoModelo.hora_salida,
+            TrayectoModelo.hora_llegada,
+            TrayectoModelo.ruta_id,
+        ).filter(TrayectoModelo.ruta_id.isnot(None)).all()
+        salidas, trayectos = {}, {}
+        for trayecto_id, fecha, hora_salida, hora_llegada, ruta_id in filas:
+            salida, llegada = _a_segundos(hora_salida), _a_segundos(hora_llegada)
+            salidas.setdefault((ruta_id, fecha), []).append((salida, llegada, trayecto_id))
+            trayectos[trayecto_id] = (ruta_id, fecha, salida, llegada)
+        # Ordenar una vez cada lista es más rápido que insertar fila por fila
+        fechas = {}
+        for (ruta_id, fecha), lista in salidas.items():
+            lista.sort()
+            fechas.setdefault(ruta_id, []).append(fecha)
+        for lista in fechas.values():
+            lista.sort()
+        with self._lock:
+            self._salidas = salidas
+            self._fechas = fechas
+            self._trayectos = trayectos
+            self.cargado = True
+
+    def asegurar_cargado(self, db: Session):
+        if not self.cargado:
+            self.reconstruir(db)
+
+    def agregar(self, trayecto_id, fecha, hora_salida, hora_llegada, ruta_id=None):
+        fecha = _a_fecha(fecha)
+        salida, llegada = _a_segundos(hora_salida), _a_segundos(hora_llegada)
+        with self._lock:
+            self.eliminar(trayecto_id)
+            if not ruta_id:
+                return
+            clave = (ruta_id, fecha)
+            lista = self._salidas.get(clave)
+            if lista is None:
+                lista = self._salidas[clave] = []
+                insort(self._fechas.setdefault(ruta_id, []), fecha)
+            insort(lista, (salida, llegada, trayecto_id))
+            self._trayectos[trayecto_id] = (ruta_id, fecha, salida, llegada)
+
+    def eliminar(self, trayecto_id):
+        with self._lock:
+            datos = self._trayectos.pop(trayecto_id, None)
+            if datos is None:
+                return
+            ruta_id, fecha, salida, llegada = datos
+            lista = self._salidas.get((ruta_id, fecha), [])
+            try:
+                lista.remove((salida, llegada, trayecto_id))
+            except ValueError:
+                pass
+            if not lista:
+                self._salidas.pop((ruta_id, fecha), None)
+                fechas = self._fechas.get(ruta_id, [])
+                posicion = bisect_left(fechas, fecha)
+                if posicion < len(fechas) and fechas[posicion] == fecha:
+                    del fechas[posicion]
+                if not fechas:
+                    self._fechas.pop(ruta_id, None)
+
+    def eliminar_ruta(self, ruta_id):
+        """
+        Quita todas las salidas de una ruta (al eliminarla, sus trayectos quedan sin ruta).
+        """
+        with self._lock:
+            for fecha in self._fechas.pop(ruta_id, []):
+                for _, _, trayecto_id in self._salidas.pop((ruta_id, fecha), []):
+                    self._trayectos.pop(trayecto_id, None)
+
+    def _recorrer(self, ruta_id, fecha, segundos):
+        # Salidas de la ruta desde (fecha, segundos) en adelante, en orden
+        fechas = self._fechas.get(ruta_id, [])
+        for posicion in range(bisect_left(fechas, fecha), len(fechas)):
+            dia = fechas[posicion]
+            lista = self._salidas[(ruta_id, dia)]
+            inicio = bisect_left(lista, (segundos,)) if dia == fecha else 0
+            for i in range(inicio, len(lista)):
+                salida, llegada, trayecto_id = lista[i]
+                yield dia, salida, llegada, trayecto_id, ruta_id
+
+    def proximas(self, ruta_ids, fecha, hora, limite: int):
+        """
+        Las `limite` salidas siguientes a (fecha, hora), inclusive, de
+        cualquiera de las rutas dadas, mezcladas en orden de fecha y hora.
+        Retorna dicts con trayecto_id, ruta_id, fecha, hora_salida y hora_llegada.
+        """
+        fecha, segundos = _a_fecha(fecha), _a_segundos(hora)
+        with self._lock:
+            recorridos = [self._recorrer(ruta_id, fecha, segundos) for ruta_id in set(ruta_ids)]
+            salidas = list(islice(heapq.merge(*recorridos), limite))
+        return [
+            {
+                "trayecto_id": trayecto_id,
+                "ruta_id": ruta_id,
+                "fecha": dia,
+                "hora_salida": _a_hora(salida),
+                "hora_llegada": _a_hora(llegada),
+            }
+            for dia, salida, llegada, trayecto_id, ruta_id in salidas
+        ]
+
+indice_horarios = IndiceHorarios()
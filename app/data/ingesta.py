@@ -0,0 +1,206 @@
+import csv
+import os
+from collections import deque
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.data.upsert import upsert
+
+# Cantidad de filas que se insertan y confirman en cada transacción
+TAMANO_LOTE = 1000
+
+# Máximo de errores que se detallan en la respuesta; el resto solo se cuenta
+MAXIMO_ERRORES = 1000
+
+# Lotes que se convierten por adelantado en el pool de procesos
+LOTES_EN_VUELO = int(os.getenv("INGESTA_LOTES_EN_VUELO", str(2 * (os.cpu_count() or 1))))
+
+def _leer_csv(archivo, delimitador: str = ";"):
+    # Decodifica línea por línea para conocer el byte donde termina cada fila:
+    # el lector de csv toma exactamente las líneas de cada registro
+    binario = getattr(archivo, "file", archivo)
+    binario.seek(0)
+    posicion = 0
+
+    def lineas():
+        nonlocal posicion
+        for linea in binario:
+            posicion += len(linea)
+            yield linea.decode("utf-8")
+
+    for fila in csv.DictReader(lineas(), delimiter=delimitador):
+        yield fila, posicion
+
+def leer_csv(archivo, delimitador: str = ";"):
+    """
+    Itera las filas de un CSV (un UploadFile o un archivo binario abierto)
+    decodificándolo de forma incremental, sin cargar el archivo completo en memoria.
+    """
+    for fila, _ in _leer_csv(archivo, delimitador):
+        yield fila
+
+def _leer_lotes(archivo, desde_fila: int, tamano_lote: int):
+    # Cada lote va con el byte del archivo en el que termina su última fila
+    lote = []
+    for numero, (fila, posicion) in enumerate(_leer_csv(archivo), start=1):
+        if numero <= desde_fila:
+            continue
+        lote.append((numero, fila))
+        if len(lote) >= tamano_lote:
+            yield lote, posicion
+            lote = []
+    if lote:
+        yield lote, posicion
+
+def convertir_lote(convertir, lote):
+    """
+    Aplica `convertir` a cada (numero, fila) del lote. Retorna (convertidos,
+    errores) como listas de (numero, valores) y (numero, mensaje). Se ejecuta
+    en los procesos del pool, por lo que `convertir` debe ser una función de
+    módulo (serializable con pickle).
+    """
+    convertidos, errores = [], []
+    for numero, fila in lote:
+        try:
+            convertidos.append((numero, convertir(fila)))
+        except KeyError as e:
+            errores.append((numero, f"Falta la columna {e}"))
+        except Exception as e:
+            errores.append((numero, str(e)))
+    return convertidos, errores
+
+def _convertir_lotes(lotes, convertir, pool):
+    """
+    Convierte los lotes en orden. Con un pool de procesos se adelanta la
+    conversión de unos pocos lotes mientras se escriben los anteriores, sin
+    leer el archivo completo.
+    """
+    if pool is None:
+        for lote, posicion in lotes:
+            yield lote, posicion, convertir_lote(convertir, lote)
+        return
+    pendientes = deque()
+    for lote, posicion in lotes:
+        pendientes.append((lote, posicion, pool.submit(convertir_lote, convertir, lote)))
+        if len(pendientes) >= LOTES_EN_VUELO:
+            lote, posicion, futuro = pendientes.popleft()
+            yield lote, posicion, futuro.result()
+    while pendientes:
+        lote, posicion, futuro = pendientes.popleft()
+        yield lote, posicion, futuro.result()
+
+def _registrar_error(resultado, numero, mensaje):
+    resultado["total_errores"] += 1
+    if len(resultado["errores"]) < MAXIMO_ERRORES:
+        resultado["errores"].append({"fila": numero, "error": mensaje})
+
+def _ejecutar(db: Session, tabla, filas, resultado, clave, on_conflict, al_insertar, al_actualizar):
+    if on_conflict:
+        conteos = upsert(db, tabla, filas, clave, on_conflict, al_actualizar)
+    else:
+        db.execute(insert(tabla), filas)
+        conteos = {"insertados": len(filas)}
+        if al_insertar:
+            al_insertar(db, filas)
+    db.commit()
+    for nombre, cantidad in conteos.items():
+        resultado[nombre] += cantidad
+
+def _insertar_lote(db: Session, tabla, lote, resultado, al_confirmar, clave=None, on_conflict=None, al_insertar=None, al_actualizar=None, al_rechazar=None):
+    """
+    Inserta un lote con una única sentencia (executemany, o INSERT ... ON CONFLICT
+    si se indica `on_conflict`). Si alguna fila viola una restricción, reintenta
+    el lote fila por fila para reportar solo las inválidas.
+    """
+    if not lote:
+        return
+    try:
+        _ejecutar(db, tabla, [valores for _, valores in lote], resultado, clave, on_conflict, al_insertar, al_actualizar)
+        insertadas = lote
+    except IntegrityError:
+        db.rollback()
+        insertadas = []
+        for numero, valores in lote:
+            try:
+                _ejecutar(db, tabla, [valores], resultado, clave, on_conflict, al_insertar, al_actualizar)
+                insertadas.append((numero, valores))
+            except IntegrityError as e:
+                db.rollback()
+                _registrar_error(resultado, numero, f"Registro duplicado o inválido: {e.orig}")
+                if al_rechazar:
+                    al_rechazar(valores)
+    if al_confirmar and insertadas:
+        al_confirmar([valores for _, valores in insertadas])
+
+def ingerir_csv(
+    db: Session,
+    archivo,
+    tabla,
+    convertir,
+    tamano_lote: int = TAMANO_LOTE,
+    desde_fila: int = 0,
+    validar=None,
+    al_insertar=None,
+    al_actualizar=None,
+    al_confirmar=None,
+    clave=None,
+    on_conflict=None,
+    pool=None,
+    al_progresar=None,
+    al_rechazar=None,
+):
+    """
+    Procesa un CSV en streaming, confirmando una transacción por cada lote.
+
+    - `convertir(fila)` transforma una fila del CSV en el diccionario a insertar
+      y lanza una excepción si la fila es inválida.
+    - `validar(db, valores, numeros)` retorna {posicion: [mensajes]} con las filas
+      del lote que deben descartarse.
+    - `al_insertar(db, valores)` se ejecuta en la misma transacción de cada
+      lote insertado, antes del commit (solo sin `on_conflict`).
+    - `al_actualizar(db, anteriores, valores)` se ejecuta igual para las filas
+      que sobrescribe `on_conflict=update` (ver upsert).
+    - `al_confirmar(valores)` recibe las filas efectivamente insertadas tras cada commit.
+    - `al_rechazar(valores)` recibe cada fila que pasó `validar` pero que la base
+      de datos rechazó al escribirla.
+
+    `on_conflict` (skip|update) convierte cada lote en un upsert sobre el índice
+    único `clave` en lugar de fallar ante registros existentes.
+
+    `desde_fila` permite reanudar una carga interrumpida: se omiten las filas
+    con número menor o igual, usando el valor `ultima_fila_confirmada` de la
+    respuesta anterior. `bytes_confirmados` es el byte del archivo en el que
+    termina esa fila.
+
+    Con `pool` (un ProcessPoolExecutor) la conversión de los lotes se reparte
+    entre procesos; la validación y las escrituras siguen en este hilo y en el
+    orden del archivo. `al_progresar(resultado)` se llama tras cada lote confirmado.
+    """
+    resultado = {
+        "insertados": 0,
+        "actualizados": 0,
+        "omitidos": 0,
+        "filas_procesadas": 0,
+        "ultima_fila_confirmada": desde_fila,
+        "bytes_confirmados": 0,
+        "total_errores": 0,
+        "errores": [],
+    }
+    for lote, fin_lote, (convertidos, errores) in _convertir_lotes(_leer_lotes(archivo, desde_fila, tamano_lote), convertir, pool):
+        resultado["filas_procesadas"] += len(lote)
+        for numero, mensaje in errores:
+            _registrar_error(resultado, numero, mensaje)
+        validos = convertidos
+        if validar and convertidos:
+            rechazados = validar(db, [valores for _, valores in convertidos], [n for n, _ in convertidos])
+            for posicion, mensajes in sorted(rechazados.items()):
+                for mensaje in mensajes:
+                    _registrar_error(resultado, convertidos[posicion][0], mensaje)
+            validos = [fila for posicion, fila in enumerate(convertidos) if posicion not in rechazados]
+        _insertar_lote(db, tabla, validos, resultado, al_confirmar, clave, on_conflict, al_insertar, al_actualizar, al_rechazar)
+        resultado["ultima_fila_confirmada"] = lote[-1][0]
+        resultado["bytes_confirmados"] = fin_lote
+        if al_progresar:
+            al_progresar(resultado)
+
+    return resultado
@@ -0,0 +1,94 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.data.cache import obtener_cache
+from app.domain.models.conductor import Conductor as ConductorModelo
+from app.domain.models.ruta import Ruta as RutaModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+from app.domain.schemas.conductor_schemas import Conductor
+from app.domain.schemas.ruta_schemas import Ruta
+from app.domain.schemas.vehiculo_schemas import Vehiculo
+
+# Tabla de cada entidad maestra: modelo ORM, esquema de respuesta y caché asociada
+MAESTROS = {
+    "vehiculos": (VehiculoModelo, Vehiculo),
+    "conductores": (ConductorModelo, Conductor),
+    "rutas": (RutaModelo, Ruta),
+}
+
+def _a_esquema(esquema, objeto):
+    return esquema.model_validate({campo: getattr(objeto, campo) for campo in esquema.model_fields})
+
+def columnas_respuesta(tabla: str):
+    """
+    Columnas del modelo de `tabla` en el orden de los campos de su esquema de
+    respuesta, para listar con consultas de columnas (sin objetos ORM).
+    """
+    modelo, esquema = MAESTROS[tabla]
+    return [getattr(modelo, campo) for campo in esquema.model_fields]
+
+def obtener_por_campo(db: Session, tabla: str, campo: str, valor):
+    """
+    Busca un registro maestro por un campo (id, placa, ...) pasando por la caché.
+    Retorna el esquema de respuesta o None si no existe.
+    """
+    modelo, esquema = MAESTROS[tabla]
+
+    def cargar():
+        objeto = db.query(modelo).filter(getattr(modelo, campo) == valor).first()
+        return _a_esquema(esquema, objeto) if objeto else None
+
+    return obtener_cache(tabla).obtener_o_cargar((campo, valor), cargar)
+
+def obtener_por_ids(db: Session, tabla: str, ids) -> dict:
+    """
+    Retorna {id: esquema} para los ids dados; los que no están en caché se
+    cargan con una sola consulta.
+    """
+    modelo, esquema = MAESTROS[tabla]
+
+    def cargar(claves):
+        objetos = db.query(modelo).filter(modelo.id.in_([valor for _, valor in claves])).all()
+        return {("id", objeto.id): _a_esquema(esquema, objeto) for objeto in objetos}
+
+    encontrados = obtener_cache(tabla).obtener_varios([("id", i) for i in set(ids) if i], cargar)
+    return {valor: esquema for (_, valor), esquema in encontrados.items()}
+
+async def obtener_por_campo_async(db: AsyncSession, tabla: str, campo: str, valor):
+    """
+    Versión de `obtener_por_campo` para los endpoints que usan la sesión asíncrona.
+    """
+    modelo, esquema = MAESTROS[tabla]
+    cache = obtener_cache(tabla)
+    encontrado = cache.obtener((campo, valor))
+    if encontrado is None:
+        generacion = cache.generacion()
+        objeto = (await db.execute(select(modelo).where(getattr(modelo, campo) == valor))).scalars().first()
+        if objeto:
+            encontrado = _a_esquema(esquema, objeto)
+            cache.guardar((campo, valor), encontrado, generacion)
+    return encontrado
+
+async def obtener_por_ids_async(db: AsyncSession, tabla: str, ids) -> dict:
+    """
+    Versión de `obtener_por_ids` para los endpoints que usan la sesión asíncrona.
+    """
+    modelo, esquema = MAESTROS[tabla]
+    cache = obtener_cache(tabla)
+    encontrados = {}
+    faltantes = []
+    for valor in set(ids):
+        if not valor:
+            continue
+        encontrado = cache.obtener(("id", valor))
+        if encontrado is None:
+            faltantes.append(valor)
+        else:
+            encontrados[valor] = encontrado
+    if faltantes:
+        generacion = cache.generacion()
+        objetos = (await db.execute(select(modelo).where(modelo.id.in_(faltantes)))).scalars()
+        for objeto in objetos:
+            encontrados[objeto.id] = _a_esquema(esquema, objeto)
+            cache.guardar(("id", objeto.id), encontrados[objeto.id], generacion)
+    return encontrados
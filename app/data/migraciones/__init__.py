@@ -0,0 +1,14 @@
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+
+def aplicar_migraciones(url: str = None, revision: str = "head"):
+    """
+    Aplica las migraciones pendientes. Equivale a `alembic upgrade head`
+    y sirve para preparar bases de datos desde código (por ejemplo en los benchmarks).
+    """
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).parent))
+    if url:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(config, revision)
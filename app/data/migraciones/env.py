@@ -0,0 +1,38 @@
+from logging.config import fileConfig
+from alembic import context
+from app.data.database import Base, DATABASE_URL, crear_motor
+from app.domain.models import conductor, ruta, trayecto, vehiculo  # noqa: F401 (registra los modelos)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def _url():
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+def run_migrations_offline():
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    motor = crear_motor(_url())
+    with motor.connect() as connection:
+        # render_as_batch permite alterar tablas en SQLite
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+    motor.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
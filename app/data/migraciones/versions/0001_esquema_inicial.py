@@ -0,0 +1,73 @@
+"""Esquema inicial: vehiculos, rutas, conductores y trayectos
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Las bases existentes (como transporte.db) ya tienen estas tablas,
+    # creadas antes por create_all; solo se crean las que falten
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "vehiculos" not in existentes:
+        op.create_table(
+            "vehiculos",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("marca", sa.String(), nullable=False),
+            sa.Column("placa", sa.String(), nullable=False),
+            sa.Column("modelo", sa.String(), nullable=False),
+            sa.Column("lateral", sa.String(), nullable=False),
+            sa.Column("año_de_fabricacion", sa.Integer(), nullable=False),
+            sa.Column("capacidad_pasajeros", sa.Integer(), nullable=False),
+            sa.Column("estado_operativo", sa.String(), nullable=False),
+        )
+    if "rutas" not in existentes:
+        op.create_table(
+            "rutas",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("nombre", sa.String(), nullable=False),
+            sa.Column("codigo", sa.String(), nullable=False),
+            sa.Column("origen", sa.String(), nullable=False),
+            sa.Column("destino", sa.String(), nullable=False),
+            sa.Column("duracion_estimada", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_rutas_codigo", "rutas", ["codigo"], unique=True)
+    if "conductores" not in existentes:
+        op.create_table(
+            "conductores",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("nombre", sa.String(), nullable=False),
+            sa.Column("cedula", sa.String(), nullable=False),
+            sa.Column("licencia", sa.String(), nullable=False),
+            sa.Column("telefono", sa.String(), nullable=False),
+            sa.Column("estado", sa.String(), nullable=False),
+        )
+        op.create_index("ix_conductores_cedula", "conductores", ["cedula"], unique=True)
+    if "trayectos" not in existentes:
+        op.create_table(
+            "trayectos",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("fecha", sa.Date(), nullable=False),
+            sa.Column("hora_salida", sa.Time(), nullable=False),
+            sa.Column("hora_llegada", sa.Time(), nullable=False),
+            sa.Column("cantidad_pasajeros", sa.Integer(), nullable=False),
+            sa.Column("kilometraje", sa.Integer(), nullable=False),
+            sa.Column("observaciones", sa.String(), nullable=True),
+            sa.Column("ruta_id", sa.String(), sa.ForeignKey("rutas.id"), nullable=True),
+            sa.Column("conductor_id", sa.String(), sa.ForeignKey("conductores.id"), nullable=True),
+            sa.Column("vehiculo_id", sa.String(), sa.ForeignKey("vehiculos.id"), nullable=True),
+        )
+
+def downgrade():
+    op.drop_table("trayectos")
+    op.drop_table("conductores")
+    op.drop_table("rutas")
+    op.drop_table("vehiculos")
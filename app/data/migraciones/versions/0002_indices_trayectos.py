@@ -0,0 +1,65 @@
+"""Índice único de placa e índices compuestos de trayectos
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas, único)
+INDICES = [
+    ("ix_vehiculos_placa", "vehiculos", ["placa"], True),
+    ("ix_vehiculos_estado_operativo", "vehiculos", ["estado_operativo", "id"], False),
+    ("ix_conductores_estado", "conductores", ["estado", "id"], False),
+    ("ix_trayectos_id", "trayectos", ["id"], False),
+    # Orden de los listados y filtros por rango de fechas
+    ("ix_trayectos_fecha_hora", "trayectos", ["fecha", "hora_salida", "id"], False),
+    # Verificación de disponibilidad y filtros por recurso
+    ("ix_trayectos_conductor_fecha", "trayectos", ["conductor_id", "fecha", "hora_salida"], False),
+    ("ix_trayectos_vehiculo_fecha", "trayectos", ["vehiculo_id", "fecha", "hora_salida"], False),
+    ("ix_trayectos_ruta_fecha", "trayectos", ["ruta_id", "fecha", "hora_salida"], False),
+]
+
+# Máximo de valores repetidos que se listan al abortar un índice único
+MAXIMO_REPETIDOS = 20
+
+def _verificar_unicos(conexion, nombre, tabla, columnas):
+    # Sin esta verificación, CREATE UNIQUE INDEX aborta con un IntegrityError
+    # que no dice qué filas lo impiden
+    agrupadas = ", ".join(columnas)
+    repetidos = conexion.execute(sa.text(
+        f"SELECT {agrupadas}, COUNT(*) AS cantidad FROM {tabla} GROUP BY {agrupadas} "
+        f"HAVING COUNT(*) > 1 ORDER BY {agrupadas} LIMIT {MAXIMO_REPETIDOS + 1}"
+    )).all()
+    if not repetidos:
+        return
+    lista = "\n".join(
+        f"  {', '.join(str(valor) for valor in fila[:-1])} ({fila[-1]} filas)" for fila in repetidos[:MAXIMO_REPETIDOS]
+    )
+    if len(repetidos) > MAXIMO_REPETIDOS:
+        lista += "\n  ..."
+    raise RuntimeError(
+        f"No se puede crear el índice único {nombre}: {tabla} tiene valores repetidos en ({agrupadas}):\n{lista}\n"
+        f"Corrija o elimine los registros repetidos (por ejemplo, asignando otro valor de {agrupadas} a los que sobran) "
+        f"y vuelva a ejecutar alembic upgrade head."
+    )
+
+def upgrade():
+    conexion = op.get_bind()
+    inspector = sa.inspect(conexion)
+    for nombre, tabla, columnas, unico in INDICES:
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabla)}
+        if nombre not in existentes:
+            if unico:
+                _verificar_unicos(conexion, nombre, tabla, columnas)
+            op.create_index(nombre, tabla, columnas, unique=unico)
+
+def downgrade():
+    for nombre, tabla, _, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
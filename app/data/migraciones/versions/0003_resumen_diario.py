@@ -0,0 +1,43 @@
+"""Tabla resumen_diario con los totales de operación por día
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "resumen_diario",
+        sa.Column("fecha", sa.Date(), primary_key=True),
+        sa.Column("dimension", sa.String(), primary_key=True),
+        sa.Column("clave", sa.String(), primary_key=True),
+        sa.Column("viajes", sa.Integer(), nullable=False),
+        sa.Column("pasajeros", sa.Integer(), nullable=False),
+        sa.Column("kilometros", sa.Integer(), nullable=False),
+        sa.Column("suma_ocupacion", sa.Float(), nullable=False),
+        sa.Column("viajes_con_capacidad", sa.Integer(), nullable=False),
+    )
+    # Carga inicial con los trayectos existentes
+    for dimension, columna in [("dia", None), ("ruta", "ruta_id"), ("vehiculo", "vehiculo_id"), ("conductor", "conductor_id")]:
+        clave = "''" if columna is None else f"t.{columna}"
+        filtro = "" if columna is None else f"WHERE t.{columna} IS NOT NULL"
+        op.execute(f"""
+            INSERT INTO resumen_diario
+                (fecha, dimension, clave, viajes, pasajeros, kilometros, suma_ocupacion, viajes_con_capacidad)
+            SELECT t.fecha, '{dimension}', {clave}, COUNT(*), SUM(t.cantidad_pasajeros), SUM(t.kilometraje),
+                   COALESCE(SUM(t.cantidad_pasajeros * 1.0 / NULLIF(v.capacidad_pasajeros, 0)), 0),
+                   COUNT(NULLIF(v.capacidad_pasajeros, 0))
+            FROM trayectos t LEFT JOIN vehiculos v ON v.id = t.vehiculo_id
+            {filtro}
+            GROUP BY t.fecha, {clave}
+        """)
+
+def downgrade():
+    op.drop_table("resumen_diario")
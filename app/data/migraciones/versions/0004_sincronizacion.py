@@ -0,0 +1,44 @@
+"""Columna version en las tablas sincronizadas, contador global y tombstones
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLAS = ("vehiculos", "conductores", "rutas", "trayectos")
+
+def upgrade():
+    # Las filas existentes quedan con versión 0: llegan en la primera sincronización completa
+    for tabla in TABLAS:
+        with op.batch_alter_table(tabla) as batch:
+            batch.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+        op.create_index(f"ix_{tabla}_version", tabla, ["version"])
+    op.create_table(
+        "version_sincronizacion",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False),
+    )
+    op.execute("INSERT INTO version_sincronizacion (id, valor) VALUES (1, 0)")
+    op.create_table(
+        "eliminaciones",
+        sa.Column("tabla", sa.String(), primary_key=True),
+        sa.Column("registro_id", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_eliminaciones_version", "eliminaciones", ["version"])
+
+def downgrade():
+    op.drop_index("ix_eliminaciones_version", table_name="eliminaciones")
+    op.drop_table("eliminaciones")
+    op.drop_table("version_sincronizacion")
+    for tabla in reversed(TABLAS):
+        op.drop_index(f"ix_{tabla}_version", table_name=tabla)
+        with op.batch_alter_table(tabla) as batch:
+            batch.drop_column("version")
@@ -0,0 +1,42 @@
+"""Tabla trabajos para las cargas masivas en segundo plano
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "trabajos",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("estado", sa.String(), nullable=False),
+        sa.Column("archivo", sa.String(), nullable=False),
+        sa.Column("parametros", sa.JSON(), nullable=False),
+        sa.Column("bytes_totales", sa.Integer(), nullable=False),
+        sa.Column("bytes_procesados", sa.Integer(), nullable=False),
+        sa.Column("filas_procesadas", sa.Integer(), nullable=False),
+        sa.Column("insertados", sa.Integer(), nullable=False),
+        sa.Column("actualizados", sa.Integer(), nullable=False),
+        sa.Column("omitidos", sa.Integer(), nullable=False),
+        sa.Column("total_errores", sa.Integer(), nullable=False),
+        sa.Column("ultima_fila_confirmada", sa.Integer(), nullable=False),
+        sa.Column("errores", sa.JSON(), nullable=False),
+        sa.Column("mensaje", sa.String(), nullable=True),
+        sa.Column("creado", sa.DateTime(), nullable=False),
+        sa.Column("iniciado", sa.DateTime(), nullable=True),
+        sa.Column("terminado", sa.DateTime(), nullable=True),
+        sa.Column("actualizado", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_trabajos_estado", "trabajos", ["estado", "creado"])
+
+def downgrade():
+    op.drop_index("ix_trabajos_estado", table_name="trabajos")
+    op.drop_table("trabajos")
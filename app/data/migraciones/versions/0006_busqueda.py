@@ -0,0 +1,70 @@
+"""Índices de búsqueda de texto sobre vehículos, conductores y rutas
+
+En SQLite, una tabla virtual FTS5 (tokenizador trigram) por tabla maestra,
+de contenido externo y mantenida por triggers. En PostgreSQL, índices GIN
+pg_trgm sobre la concatenación de las mismas columnas.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Columnas indexadas de cada tabla (deben coincidir con app/data/busqueda.py)
+COLUMNAS = {
+    "vehiculos": ("placa", "lateral", "marca", "modelo"),
+    "conductores": ("nombre", "cedula", "licencia"),
+    "rutas": ("codigo", "nombre", "origen", "destino"),
+}
+
+def _upgrade_sqlite(tabla, columnas):
+    fts = f"{tabla}_busqueda"
+    lista = ", ".join(columnas)
+    nuevos = ", ".join(f"new.{columna}" for columna in columnas)
+    viejos = ", ".join(f"old.{columna}" for columna in columnas)
+    op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({lista}, content='{tabla}', content_rowid='rowid', tokenize='trigram')")
+    op.execute(f"""
+        CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN
+            INSERT INTO {fts} (rowid, {lista}) VALUES (new.rowid, {nuevos});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.rowid, {viejos});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {fts}_au AFTER UPDATE ON {tabla} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.rowid, {viejos});
+            INSERT INTO {fts} (rowid, {lista}) VALUES (new.rowid, {nuevos});
+        END
+    """)
+    # Carga inicial con las filas existentes
+    op.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def upgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for tabla, columnas in COLUMNAS.items():
+        if dialecto == "sqlite":
+            _upgrade_sqlite(tabla, columnas)
+        elif dialecto == "postgresql":
+            expresion = " || ' ' || ".join(columnas)
+            op.execute(f"CREATE INDEX ix_{tabla}_busqueda ON {tabla} USING gin (({expresion}) gin_trgm_ops)")
+
+def downgrade():
+    dialecto = op.get_bind().dialect.name
+    for tabla in COLUMNAS:
+        if dialecto == "sqlite":
+            fts = f"{tabla}_busqueda"
+            for sufijo in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{sufijo}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif dialecto == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{tabla}_busqueda")
@@ -0,0 +1,39 @@
+"""Archivo mensual de trayectos y vista trayectos_historial
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+COLUMNAS = (
+    "id", "fecha", "hora_salida", "hora_llegada", "cantidad_pasajeros", "kilometraje",
+    "observaciones", "ruta_id", "conductor_id", "vehiculo_id",
+)
+
+def upgrade():
+    # Los trabajos que no procesan un archivo subido (como el archivado) no tienen archivo
+    with op.batch_alter_table("trabajos") as batch:
+        batch.alter_column("archivo", existing_type=sa.String(), nullable=True)
+    op.create_table(
+        "archivos_trayectos",
+        sa.Column("tabla", sa.String(), primary_key=True),
+        sa.Column("mes", sa.Date(), nullable=False, unique=True),
+        sa.Column("filas", sa.Integer(), nullable=False),
+        sa.Column("actualizado", sa.DateTime(), nullable=False),
+    )
+    # Sin meses archivados la vista es la tabla viva
+    op.execute(f"CREATE VIEW trayectos_historial AS SELECT {', '.join(COLUMNAS)} FROM trayectos")
+
+def downgrade():
+    # Las tablas trayectos_archivo_AAAA_MM se conservan con sus datos
+    op.execute("DROP VIEW IF EXISTS trayectos_historial")
+    op.drop_table("archivos_trayectos")
+    with op.batch_alter_table("trabajos") as batch:
+        batch.alter_column("archivo", existing_type=sa.String(), nullable=False)
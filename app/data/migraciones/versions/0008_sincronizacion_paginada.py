@@ -0,0 +1,30 @@
+"""Índices (version, id) para paginar /sync por keyset
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TABLAS = ("vehiculos", "conductores", "rutas", "trayectos")
+
+def upgrade():
+    # Las páginas se ordenan por (version, id): muchas filas comparten versión
+    # (una carga masiva, o la versión 0 de las filas previas a la sincronización)
+    for tabla in TABLAS:
+        op.drop_index(f"ix_{tabla}_version", table_name=tabla)
+        op.create_index(f"ix_{tabla}_version", tabla, ["version", "id"])
+    op.drop_index("ix_eliminaciones_version", table_name="eliminaciones")
+    op.create_index("ix_eliminaciones_tabla_version", "eliminaciones", ["tabla", "version", "registro_id"])
+
+def downgrade():
+    op.drop_index("ix_eliminaciones_tabla_version", table_name="eliminaciones")
+    op.create_index("ix_eliminaciones_version", "eliminaciones", ["version"])
+    for tabla in TABLAS:
+        op.drop_index(f"ix_{tabla}_version", table_name=tabla)
+        op.create_index(f"ix_{tabla}_version", tabla, ["version"])
@@ -0,0 +1,99 @@
+"""Impide en la base de datos los trayectos traslapados de un conductor o vehículo
+
+El índice de disponibilidad es local a cada proceso; estos triggers aplican
+la misma regla (intervalos cerrados del mismo día) a toda escritura. En
+SQLite las escrituras ya están serializadas; en PostgreSQL cada trigger
+toma un advisory lock por recurso y fecha antes de buscar el traslape, de
+modo que dos transacciones concurrentes no pueden ocupar el mismo horario.
+Solo se valida la fila escrita y solo si cambia su horario o sus recursos:
+los traslapes previos a esta migración no impiden editar otros campos.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# (columna del recurso, mensaje) en el orden en que se validan
+RECURSOS = (
+    ("conductor_id", "El conductor ya está asignado a otro trayecto en ese horario"),
+    ("vehiculo_id", "El vehículo ya está asignado a otro trayecto en ese horario"),
+)
+
+CAMPOS_HORARIO = ("fecha", "hora_salida", "hora_llegada", "conductor_id", "vehiculo_id")
+
+def _traslape(columna):
+    return f"""
+        SELECT 1 FROM trayectos t
+        WHERE t.{columna} = NEW.{columna} AND t.fecha = NEW.fecha
+          AND t.hora_salida <= NEW.hora_llegada AND t.hora_llegada >= NEW.hora_salida
+          AND t.id <> NEW.id
+    """
+
+def _upgrade_sqlite():
+    validaciones = "".join(
+        f"SELECT RAISE(ABORT, '{mensaje}') WHERE NEW.{columna} IS NOT NULL AND EXISTS ({_traslape(columna)});\n"
+        for columna, mensaje in RECURSOS
+    )
+    cambio = " OR ".join(f"NEW.{campo} IS NOT OLD.{campo}" for campo in CAMPOS_HORARIO)
+    op.execute(f"""
+        CREATE TRIGGER trayectos_traslape_ai BEFORE INSERT ON trayectos BEGIN
+            {validaciones}
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER trayectos_traslape_au BEFORE UPDATE OF {", ".join(CAMPOS_HORARIO)} ON trayectos
+        WHEN {cambio} BEGIN
+            {validaciones}
+        END
+    """)
+
+def _upgrade_postgresql():
+    validaciones = "".join(
+        f"""
+        IF NEW.{columna} IS NOT NULL THEN
+            PERFORM pg_advisory_xact_lock(hashtext('{columna}:' || NEW.{columna} || ':' || NEW.fecha));
+            IF EXISTS ({_traslape(columna)}) THEN
+                RAISE EXCEPTION '{mensaje}' USING ERRCODE = 'exclusion_violation';
+            END IF;
+        END IF;
+        """
+        for columna, mensaje in RECURSOS
+    )
+    cambio = " OR ".join(f"NEW.{campo} IS DISTINCT FROM OLD.{campo}" for campo in CAMPOS_HORARIO)
+    op.execute(f"""
+        CREATE FUNCTION trayectos_traslape() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NOT ({cambio}) THEN
+                RETURN NEW;
+            END IF;
+            {validaciones}
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        CREATE TRIGGER trayectos_traslape BEFORE INSERT OR UPDATE OF {", ".join(CAMPOS_HORARIO)} ON trayectos
+        FOR EACH ROW EXECUTE FUNCTION trayectos_traslape()
+    """)
+
+def upgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        _upgrade_sqlite()
+    elif dialecto == "postgresql":
+        _upgrade_postgresql()
+
+def downgrade():
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS trayectos_traslape_ai")
+        op.execute("DROP TRIGGER IF EXISTS trayectos_traslape_au")
+    elif dialecto == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS trayectos_traslape ON trayectos")
+        op.execute("DROP FUNCTION IF EXISTS trayectos_traslape()")
@@ -0,0 +1,46 @@
+"""Versiones de sincronización sin contador bloqueante en PostgreSQL
+
+Hasta ahora cada transacción que escribía incrementaba la única fila de
+version_sincronizacion y la mantenía bloqueada hasta el commit, lo que
+serializaba todas las escrituras. En PostgreSQL la versión pasa a ser el id
+de la transacción (txid_current(), de 64 bits) más un desplazamiento guardado
+en version_sincronizacion.valor, que esta migración calcula para que las
+versiones nuevas superen a las ya asignadas. En SQLite no cambia nada: las
+escrituras ya están serializadas por la base de datos.
+
+Si la base de datos se restaura en otro clúster (pg_dump), los ids de
+transacción vuelven a empezar: hay que repetir el ajuste del desplazamiento
+con el máximo de las versiones existentes.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+TABLAS = ("vehiculos", "conductores", "rutas", "trayectos", "eliminaciones")
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for tabla in TABLAS:
+        op.alter_column(tabla, "version", type_=sa.BigInteger(), existing_nullable=False)
+    op.alter_column("version_sincronizacion", "valor", type_=sa.BigInteger(), existing_nullable=False)
+    # Las transacciones posteriores tienen un txid mayor que el de esta, de modo
+    # que txid + desplazamiento supera al contador que se deja de usar
+    op.execute("UPDATE version_sincronizacion SET valor = GREATEST(valor - txid_current(), 0)")
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # El contador sigue desde la mayor versión asignada
+    op.execute("UPDATE version_sincronizacion SET valor = valor + txid_current()")
+    op.alter_column("version_sincronizacion", "valor", type_=sa.Integer(), existing_nullable=False)
+    for tabla in reversed(TABLAS):
+        op.alter_column(tabla, "version", type_=sa.Integer(), existing_nullable=False)
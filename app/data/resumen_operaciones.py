@@ -0,0 +1,201 @@
+from datetime import date
+from enum import Enum
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.orm import Session
+from app.data.upsert import insert_dialecto
+from app.domain.models.archivo_trayectos import trayectos_historial
+from app.domain.models.resumen_diario import ResumenDiario
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+class Dimension(str, Enum):
+    dia = "dia"
+    ruta = "ruta"
+    vehiculo = "vehiculo"
+    conductor = "conductor"
+
+# Columna de trayectos que identifica cada dimensión (el total del día no tiene clave)
+COLUMNAS_DIMENSION = {
+    Dimension.dia: None,
+    Dimension.ruta: "ruta_id",
+    Dimension.vehiculo: "vehiculo_id",
+    Dimension.conductor: "conductor_id",
+}
+
+def _a_fecha(valor):
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+def aplicar_trayectos(db: Session, trayectos, signo: int = 1):
+    """
+    Suma (signo=1) o resta (signo=-1) al resumen diario los trayectos dados,
+    como diccionarios con las columnas de la tabla. Debe llamarse dentro de la
+    misma transacción que escribe los trayectos, antes del commit.
+    """
+    if signo < 0:
+        aplicar_cambios(db, trayectos, [])
+    else:
+        aplicar_cambios(db, [], trayectos)
+
+def _ocupacion(capacidad):
+    # Aporte de cada pasajero a suma_ocupacion y de cada viaje a viajes_con_capacidad
+    return (1.0 / capacidad, 1) if capacidad else (0.0, 0)
+
+def aplicar_cambios(db: Session, anteriores, nuevos):
+    """
+    Resta `anteriores` y suma `nuevos` con una sola sentencia (por ejemplo, el
+    estado previo y el nuevo de trayectos modificados). Las claves cuyo delta
+    es cero se omiten, así que editar solo las observaciones no escribe nada.
+    La ocupación usa la capacidad actual del vehículo, leída en la misma
+    transacción: los cambios de capacidad se reaplican con aplicar_capacidades.
+    """
+    vehiculo_ids = {t.get("vehiculo_id") for t in anteriores + nuevos if t.get("vehiculo_id")}
+    capacidades = dict(db.execute(
+        select(VehiculoModelo.id, VehiculoModelo.capacidad_pasajeros).where(VehiculoModelo.id.in_(vehiculo_ids))
+    ).all()) if vehiculo_ids else {}
+
+    deltas = {}
+    for signo, trayectos in ((-1, anteriores), (1, nuevos)):
+        for t in trayectos:
+            por_pasajero, con_capacidad = _ocupacion(capacidades.get(t.get("vehiculo_id")))
+            for dimension, columna in COLUMNAS_DIMENSION.items():
+                clave = "" if columna is None else t.get(columna)
+                if clave is None:
+                    continue
+                delta = deltas.setdefault((_a_fecha(t["fecha"]), dimension.value, clave), [0, 0, 0, 0.0, 0])
+                delta[0] += signo
+                delta[1] += signo * t["cantidad_pasajeros"]
+                delta[2] += signo * t["kilometraje"]
+                delta[3] += signo * t["cantidad_pasajeros"] * por_pasajero
+                delta[4] += signo * con_capacidad
+    _escribir_deltas(db, deltas, limpiar=bool(anteriores))
+
+def aplicar_capacidades(db: Session, cambios):
+    """
+    Reaplica la ocupación de los trayectos (incluidos los archivados) de los
+    vehículos cuya capacidad cambió. `cambios` es {vehiculo_id: (capacidad
+    anterior, capacidad nueva)}; la nueva es None si el vehículo se elimina.
+    Debe llamarse en la misma transacción que modifica los vehículos.
+    """
+    cambios = {vehiculo_id: par for vehiculo_id, par in cambios.items() if _ocupacion(par[0]) != _ocupacion(par[1])}
+    if not cambios:
+        return
+    t = trayectos_historial.c
+    grupos = db.execute(
+        select(t.vehiculo_id, t.fecha, t.ruta_id, t.conductor_id, func.count(), func.sum(t.cantidad_pasajeros))
+        .where(t.vehiculo_id.in_(list(cambios)))
+        .group_by(t.vehiculo_id, t.fecha, t.ruta_id, t.conductor_id)
+    )
+    deltas = {}
+    for vehiculo_id, fecha, ruta_id, conductor_id, viajes, pasajeros in grupos:
+        anterior, nueva = (_ocupacion(capacidad) for capacidad in cambios[vehiculo_id])
+        claves = {"vehiculo_id": vehiculo_id, "ruta_id": ruta_id, "conductor_id": conductor_id}
+        for dimension, columna in COLUMNAS_DIMENSION.items():
+            clave = "" if columna is None else claves[columna]
+            if clave is None:
+                continue
+            delta = deltas.setdefault((_a_fecha(fecha), dimension.value, clave), [0, 0, 0, 0.0, 0])
+            delta[3] += pasajeros * (nueva[0] - anterior[0])
+            delta[4] += viajes * (nueva[1] - anterior[1])
+    _escribir_deltas(db, deltas, limpiar=False)
+
+def _escribir_deltas(db: Session, deltas, limpiar: bool):
+    # Suma los deltas al resumen; con `limpiar` se borran las claves que quedan sin viajes
+    deltas = {clave: delta for clave, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    tabla = ResumenDiario.__table__
+    sentencia = insert_dialecto(db)(tabla)
+    columnas = ["viajes", "pasajeros", "kilometros", "suma_ocupacion", "viajes_con_capacidad"]
+    # Una sentencia compilada una vez y ejecutada con executemany
+    db.execute(
+        sentencia.on_conflict_do_update(
+            index_elements=["fecha", "dimension", "clave"],
+            set_={columna: tabla.c[columna] + sentencia.excluded[columna] for columna in columnas},
+        ),
+        [
+            {
+                "fecha": fecha,
+                "dimension": dimension,
+                "clave": clave,
+                "viajes": viajes,
+                "pasajeros": pasajeros,
+                "kilometros": kilometros,
+                "suma_ocupacion": suma_ocupacion,
+                "viajes_con_capacidad": viajes_con_capacidad,
+            }
+            for (fecha, dimension, clave), (viajes, pasajeros, kilometros, suma_ocupacion, viajes_con_capacidad) in deltas.items()
+        ],
+    )
+    if limpiar:
+        db.execute(delete(tabla).where(
+            tabla.c.fecha.in_({fecha for fecha, _, _ in deltas}),
+            tabla.c.viajes <= 0,
+        ))
+
+def reconstruir(db: Session):
+    """
+    Recalcula el resumen completo a partir de todos los trayectos, incluidos
+    los archivados (vista trayectos_historial).
+    """
+    tabla = ResumenDiario.__table__
+    db.execute(delete(tabla))
+    t = trayectos_historial.c
+    capacidad = VehiculoModelo.capacidad_pasajeros
+    for dimension, columna in COLUMNAS_DIMENSION.items():
+        clave = None if columna is None else t[columna]
+        consulta = (
+            select(
+                t.fecha,
+                literal(dimension.value),
+                literal("") if clave is None else clave,
+                func.count(),
+                func.sum(t.cantidad_pasajeros),
+                func.sum(t.kilometraje),
+                func.coalesce(func.sum(t.cantidad_pasajeros * 1.0 / func.nullif(capacidad, 0)), 0.0),
+                func.count(func.nullif(capacidad, 0)),
+            )
+            .select_from(trayectos_historial)
+            .outerjoin(VehiculoModelo, t.vehiculo_id == VehiculoModelo.id)
+            .group_by(t.fecha)
+        )
+        if clave is not None:
+            consulta = consulta.where(clave.is_not(None)).group_by(clave)
+        db.execute(tabla.insert().from_select(
+            ["fecha", "dimension", "clave", "viajes", "pasajeros", "kilometros", "suma_ocupacion", "viajes_con_capacidad"],
+            consulta,
+        ))
+
+def consultar(db: Session, dimension: Dimension, fecha_desde=None, fecha_hasta=None, clave=None, por_dia: bool = True):
+    """
+    Retorna los totales de una dimensión en el rango de fechas, por día y clave
+    o acumulados por clave si `por_dia` es False.
+    """
+    r = ResumenDiario
+    grupos = ([r.fecha] if por_dia else []) + ([] if dimension == Dimension.dia else [r.clave])
+    consulta = select(
+        *grupos,
+        func.sum(r.viajes).label("viajes"),
+        func.sum(r.pasajeros).label("pasajeros"),
+        func.sum(r.kilometros).label("kilometros"),
+        (func.sum(r.suma_ocupacion) / func.nullif(func.sum(r.viajes_con_capacidad), 0)).label("ocupacion_promedio"),
+    ).where(r.dimension == dimension.value)
+    if fecha_desde:
+        consulta = consulta.where(r.fecha >= fecha_desde)
+    if fecha_hasta:
+        consulta = consulta.where(r.fecha <= fecha_hasta)
+    if clave:
+        consulta = consulta.where(r.clave == clave)
+    if grupos:
+        consulta = consulta.group_by(*grupos).order_by(*grupos)
+    return [fila._asdict() for fila in db.execute(consulta) if fila.viajes]
+
+if __name__ == "__main__":
+    # python -m app.data.resumen_operaciones: reconstruye el resumen (backfill)
+    from app.data.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        reconstruir(db)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+from sqlalchemy import event, func, literal, select, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from app.data.database import Base
+from app.data.upsert import insert_dialecto
+from app.domain.models.sincronizacion import Eliminacion, VersionSincronizacion
+
+# Tablas con columna `version` que se sincronizan con GET /sync
+TABLAS_SINCRONIZADAS = ("vehiculos", "conductores", "rutas", "trayectos")
+
+# Clave en `Connection.info` con la versión de la transacción en curso
+_CLAVE_VERSION = "version_sincronizacion"
+
+def version_transaccion(conexion) -> int:
+    """
+    Versión de la transacción en curso en `conexion`, que se asigna en su
+    primera escritura.
+
+    En SQLite la transacción incrementa el contador global; esa fila queda
+    bloqueada hasta el commit, pero las escrituras ya están serializadas por la
+    base de datos, de modo que las versiones se confirman en orden.
+
+    En PostgreSQL un contador así serializaría a todos los escritores. La
+    versión es el id de la transacción más el desplazamiento fijo guardado en
+    version_sincronizacion (ver la migración 0010): no bloquea nada, pero las
+    versiones ya no se confirman en orden, y `version_actual` solo entrega
+    hasta la menor transacción aún abierta.
+    """
+    version = conexion.info.get(_CLAVE_VERSION)
+    if version is None:
+        contador = VersionSincronizacion.__table__
+        if conexion.dialect.name == "postgresql":
+            consulta = select(func.txid_current() + contador.c.valor)
+        else:
+            consulta = update(contador).values(valor=contador.c.valor + 1).returning(contador.c.valor)
+        version = conexion.execute(consulta).scalar_one()
+        conexion.info[_CLAVE_VERSION] = version
+    return version
+
+def version_fila(contexto) -> int:
+    """
+    Valor por defecto (`default` y `onupdate`) de las columnas `version`, de modo
+    que cualquier INSERT o UPDATE que no la asigne explícitamente la mantiene.
+    """
+    return version_transaccion(contexto.connection)
+
+def _olvidar_version(conexion):
+    conexion.info.pop(_CLAVE_VERSION, None)
+
+def _olvidar_version_registro(dbapi_connection, connection_record):
+    connection_record.info.pop(_CLAVE_VERSION, None)
+
+# La versión vale solo para una transacción
+event.listen(Engine, "commit", _olvidar_version)
+event.listen(Engine, "rollback", _olvidar_version)
+event.listen(Pool, "checkin", _olvidar_version_registro)
+
+def registrar_eliminacion(db: Session, tabla: str, ids):
+    """
+    Guarda los tombstones de los registros eliminados, en la misma transacción
+    que el DELETE. Un id reutilizado que se elimina otra vez ya tiene tombstone:
+    se actualiza su versión. No hace commit.
+    """
+    version = version_transaccion(db.connection())
+    insert = insert_dialecto(db)
+    sentencia = insert(Eliminacion).values(
+        [{"tabla": tabla, "registro_id": registro_id, "version": version} for registro_id in ids]
+    )
+    db.execute(sentencia.on_conflict_do_update(
+        index_elements=[Eliminacion.tabla, Eliminacion.registro_id],
+        set_={"version": sentencia.excluded.version},
+    ))
+
+def version_actual(db: Session) -> int:
+    """
+    Mayor versión hasta la cual todas las transacciones ya terminaron: ninguna
+    escritura confirmada después tendrá una versión menor o igual. En
+    PostgreSQL es la anterior a la transacción abierta más antigua (el xmin de
+    la instantánea), por lo que una transacción larga retrasa el token pero no
+    hace que se pierdan cambios.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        horizonte = func.txid_snapshot_xmin(func.txid_current_snapshot()) - 1
+        return db.execute(select(horizonte + VersionSincronizacion.valor)).scalar()
+    return db.execute(select(VersionSincronizacion.valor)).scalar() or 0
+
+def _despues_de(columnas, despues):
+    # Keyset sobre (version, id): continúa después de la última fila entregada
+    version, identificador = despues
+    return tuple_(*columnas) > tuple_(literal(version, columnas[0].type), literal(identificador, columnas[1].type))
+
+def cambios_desde(db: Session, tabla: str, desde, hasta: int, despues=None, limite=None):
+    """
+    Filas de `tabla` escritas después de la versión `desde` (todas si es None)
+    y hasta `hasta` (incluida), en orden de (version, id). `despues` es el par
+    (version, id) de la última fila de la página anterior. Cada fila incluye
+    su `version`.
+    """
+    columnas = Base.metadata.tables[tabla].c
+    orden = [columnas.version, columnas.id]
+    consulta = select(*columnas).where(columnas.version <= hasta)
+    if despues is not None:
+        # Implica version > desde, y así el índice arranca en la última fila entregada
+        consulta = consulta.where(_despues_de(orden, despues))
+    elif desde is not None:
+        consulta = consulta.where(columnas.version > desde)
+    return [fila._asdict() for fila in db.execute(consulta.order_by(*orden).limit(limite))]
+
+def eliminados_desde(db: Session, tabla: str, desde: int, hasta: int, despues=None, limite=None):
+    """
+    Tombstones (registro_id, version) de `tabla` con versión en (desde, hasta],
+    en orden de (version, registro_id), continuando después de `despues`.
+    """
+    orden = [Eliminacion.version, Eliminacion.registro_id]
+    consulta = select(Eliminacion.registro_id, Eliminacion.version).where(
+        Eliminacion.tabla == tabla,
+        Eliminacion.version <= hasta,
+    )
+    if despues is not None:
+        consulta = consulta.where(_despues_de(orden, despues))
+    else:
+        consulta = consulta.where(Eliminacion.version > desde)
+    return db.execute(consulta.order_by(*orden).limit(limite)).all()
@@ -0,0 +1,222 @@
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import uuid
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.data.database import SessionLocal
+from app.data.ingesta import MAXIMO_ERRORES
+from app.domain.models.trabajo import Trabajo as TrabajoModelo
+
+logger = logging.getLogger(__name__)
+
+# Directorio donde se guardan los archivos subidos hasta que termina su trabajo
+TRABAJOS_DIRECTORIO = Path(os.getenv("TRABAJOS_DIRECTORIO", "./trabajos"))
+
+# Procesos para convertir y validar las filas; 0 lo hace en el hilo del trabajo
+TRABAJOS_PROCESOS = int(os.getenv("TRABAJOS_PROCESOS", str(os.cpu_count() if (os.cpu_count() or 1) > 1 else 0)))
+
+# Un trabajo en proceso sin avances durante este tiempo se considera abandonado
+# (por ejemplo, porque el servidor se detuvo) y se reanuda al iniciar
+TRABAJOS_ABANDONO_SEGUNDOS = int(os.getenv("TRABAJOS_ABANDONO_SEGUNDOS", "300"))
+
+PENDIENTE = "pendiente"
+EN_PROCESO = "en_proceso"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+
+CONTEOS = ("filas_procesadas", "insertados", "actualizados", "omitidos", "total_errores")
+
+class EjecutorTrabajos:
+    """
+    Cola de trabajos respaldada por la tabla `trabajos`. Los trabajos se
+    ejecutan de a uno en un hilo del proceso, de modo que las escrituras de
+    cada carga se confirman por lotes y en orden; la conversión de las filas
+    se reparte en un pool de procesos.
+
+    Cada tipo de trabajo se registra con `registrar(tipo, funcion)`, donde
+    `funcion(db, archivo, parametros, pool=..., al_progresar=...)` procesa el
+    archivo (abierto en binario, o None si el trabajo no tiene archivo) y
+    retorna un resultado como el de `ingerir_csv`.
+    """
+
+    def __init__(self):
+        self._tipos = {}
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._pool = None
+
+    def registrar(self, tipo: str, funcion):
+        self._tipos[tipo] = funcion
+
+    def encolar(self, db: Session, tipo: str, archivo, parametros: dict) -> str:
+        """
+        Copia el archivo subido (un UploadFile, o None) al directorio de trabajos,
+        registra el trabajo como pendiente y lo pone en la cola. Retorna su id.
+        """
+        trabajo_id = str(uuid.uuid4())
+        ruta = None
+        if archivo is not None:
+            TRABAJOS_DIRECTORIO.mkdir(parents=True, exist_ok=True)
+            ruta = TRABAJOS_DIRECTORIO / f"{trabajo_id}.csv"
+            archivo.file.seek(0)
+            with open(ruta, "wb") as destino:
+                shutil.copyfileobj(archivo.file, destino, 1024 * 1024)
+        trabajo = TrabajoModelo(
+            id=trabajo_id,
+            tipo=tipo,
+            estado=PENDIENTE,
+            archivo=None if ruta is None else str(ruta),
+            parametros=parametros,
+            bytes_totales=0 if ruta is None else ruta.stat().st_size,
+            ultima_fila_confirmada=parametros.get("desde_fila", 0),
+        )
+        db.add(trabajo)
+        db.commit()
+        self._cola.put(trabajo_id)
+        return trabajo_id
+
+    def reintentar(self, db: Session, trabajo_id: str) -> bool:
+        """
+        Vuelve a encolar un trabajo fallido, que continúa desde su última fila
+        confirmada. Retorna False si el trabajo no está fallido o si ya no
+        está su archivo.
+        """
+        trabajo = db.get(TrabajoModelo, trabajo_id)
+        if trabajo is None or trabajo.estado != FALLIDO:
+            return False
+        if trabajo.archivo is not None and not os.path.exists(trabajo.archivo):
+            return False
+        reencolado = db.execute(
+            update(TrabajoModelo)
+            .where(TrabajoModelo.id == trabajo_id, TrabajoModelo.estado == FALLIDO)
+            .values(estado=PENDIENTE, mensaje=None, terminado=None)
+        ).rowcount
+        db.commit()
+        if reencolado:
+            self._cola.put(trabajo_id)
+        return bool(reencolado)
+
+    def iniciar(self):
+        """
+        Arranca el hilo de ejecución y vuelve a encolar los trabajos pendientes
+        o abandonados cuyo archivo está en este servidor.
+        """
+        if self._hilo is not None:
+            return
+        db = SessionLocal()
+        try:
+            limite = datetime.now() - timedelta(seconds=TRABAJOS_ABANDONO_SEGUNDOS)
+            db.execute(
+                update(TrabajoModelo)
+                .where(TrabajoModelo.estado == EN_PROCESO, TrabajoModelo.actualizado < limite)
+                .values(estado=PENDIENTE)
+            )
+            db.commit()
+            pendientes = db.execute(
+                select(TrabajoModelo.id, TrabajoModelo.archivo)
+                .where(TrabajoModelo.estado == PENDIENTE)
+                .order_by(TrabajoModelo.creado)
+            ).all()
+        finally:
+            db.close()
+        for trabajo_id, archivo in pendientes:
+            if archivo is None or os.path.exists(archivo):
+                self._cola.put(trabajo_id)
+        self._hilo = threading.Thread(target=self._bucle, name="trabajos", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join()
+        self._hilo = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _pool_procesos(self):
+        if TRABAJOS_PROCESOS <= 0:
+            return None
+        if self._pool is None:
+            # spawn: los procesos no heredan los hilos ni las conexiones abiertas del servidor
+            self._pool = ProcessPoolExecutor(TRABAJOS_PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _bucle(self):
+        while (trabajo_id := self._cola.get()) is not None:
+            try:
+                self._ejecutar(trabajo_id)
+            except Exception:
+                logger.exception("Error inesperado en el trabajo %s", trabajo_id)
+
+    def _ejecutar(self, trabajo_id: str):
+        db = SessionLocal()
+        try:
+            # Reclamar el trabajo: con varios procesos solo uno lo ejecuta
+            reclamado = db.execute(
+                update(TrabajoModelo)
+                .where(TrabajoModelo.id == trabajo_id, TrabajoModelo.estado == PENDIENTE)
+                .values(estado=EN_PROCESO, iniciado=datetime.now())
+            ).rowcount
+            db.commit()
+            if not reclamado:
+                return
+            trabajo = db.get(TrabajoModelo, trabajo_id)
+            # Al reanudar, los conteos y errores de la ejecución anterior se conservan
+            previos = {nombre: getattr(trabajo, nombre) for nombre in CONTEOS}
+            errores_previos = list(trabajo.errores or [])
+            parametros = {**trabajo.parametros, "desde_fila": trabajo.ultima_fila_confirmada}
+            funcion = self._tipos[trabajo.tipo]
+
+            def valores(resultado):
+                return {
+                    **{nombre: previos[nombre] + resultado[nombre] for nombre in CONTEOS},
+                    "ultima_fila_confirmada": resultado["ultima_fila_confirmada"],
+                    "errores": (errores_previos + resultado["errores"])[:MAXIMO_ERRORES],
+                }
+
+            with open(trabajo.archivo, "rb") if trabajo.archivo else nullcontext() as archivo:
+
+                def al_progresar(resultado):
+                    # Avance hasta la última fila confirmada: la posición del archivo
+                    # puede ir por delante, en los lotes que se convierten por adelantado
+                    avance = {} if archivo is None else {"bytes_procesados": resultado["bytes_confirmados"]}
+                    db.execute(
+                        update(TrabajoModelo)
+                        .where(TrabajoModelo.id == trabajo_id)
+                        .values(**avance, **valores(resultado))
+                    )
+                    db.commit()
+
+                resultado = funcion(db, archivo, parametros, pool=self._pool_procesos(), al_progresar=al_progresar)
+            db.execute(
+                update(TrabajoModelo)
+                .where(TrabajoModelo.id == trabajo_id)
+                .values(estado=COMPLETADO, terminado=datetime.now(), bytes_procesados=TrabajoModelo.bytes_totales, **valores(resultado))
+            )
+            db.commit()
+        except Exception as e:
+            # El archivo se conserva para reanudar desde la última fila confirmada
+            db.rollback()
+            logger.exception("Falló el trabajo %s", trabajo_id)
+            db.execute(
+                update(TrabajoModelo)
+                .where(TrabajoModelo.id == trabajo_id)
+                .values(estado=FALLIDO, terminado=datetime.now(), mensaje=str(e))
+            )
+            db.commit()
+            return
+        finally:
+            db.close()
+        (TRABAJOS_DIRECTORIO / f"{trabajo_id}.csv").unlink(missing_ok=True)
+
+ejecutor_trabajos = EjecutorTrabajos()
@@ -0,0 +1,95 @@
+import uuid
+from collections import Counter
+from enum import Enum
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Máximo de parámetros por sentencia: el límite de SQLite anterior a 3.32,
+# el más bajo de los motores soportados
+MAXIMO_PARAMETROS = 999
+
+class ModoConflicto(str, Enum):
+    skip = "skip"
+    update = "update"
+
+def insert_dialecto(db: Session):
+    """
+    Retorna la construcción insert() del dialecto activo, que soporta ON CONFLICT.
+    """
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"El dialecto {dialecto} no soporta INSERT ... ON CONFLICT")
+    return insert
+
+def upsert(db: Session, tabla, filas, clave: str, modo: ModoConflicto, al_actualizar=None):
+    """
+    Inserta las filas con sentencias INSERT ... ON CONFLICT sobre el índice
+    único `clave`, en bloques de filas que no excedan MAXIMO_PARAMETROS. En modo
+    skip las filas existentes se omiten; en modo update se sobrescriben todas
+    sus columnas salvo el id, y `al_actualizar(db, anteriores, bloque)` recibe
+    el estado previo de las filas sobrescritas y los valores del bloque.
+    No hace commit. Retorna los conteos de insertados, actualizados y omitidos.
+    Una clave repetida en el lote cuenta como actualizada solo si ya existía en
+    la tabla; si es nueva, sus filas anteriores a la última se omiten.
+    """
+    # Dentro del mismo lote prevalece la primera fila (skip) o la última (update)
+    unicas = {}
+    repeticiones = Counter()
+    for fila in filas:
+        valor = fila[clave]
+        if valor in unicas:
+            repeticiones[valor] += 1
+            if modo == ModoConflicto.skip:
+                continue
+        unicas[valor] = {"id": str(uuid.uuid4()), **fila}
+    repetidas = sum(repeticiones.values())
+    if not unicas:
+        return {"insertados": 0, "actualizados": 0, "omitidos": repetidas}
+
+    insertados = actualizados = 0
+    valores = list(unicas.values())
+    # Cada fila usa un parámetro por columna (las omitidas toman su valor por defecto)
+    filas_por_sentencia = max(1, MAXIMO_PARAMETROS // len(tabla.c))
+    for inicio in range(0, len(valores), filas_por_sentencia):
+        bloque = valores[inicio:inicio + filas_por_sentencia]
+        existentes = _upsert_lote(db, tabla, bloque, clave, modo, al_actualizar)
+        insertados += len(bloque) - len(existentes)
+        if modo == ModoConflicto.update:
+            actualizados += sum(1 + repeticiones[valor] for valor in existentes)
+        else:
+            actualizados += len(existentes)
+
+    if modo == ModoConflicto.skip:
+        return {"insertados": insertados, "actualizados": 0, "omitidos": actualizados + repetidas}
+    return {"insertados": insertados, "actualizados": actualizados, "omitidos": len(filas) - insertados - actualizados}
+
+def _upsert_lote(db: Session, tabla, filas, clave: str, modo: ModoConflicto, al_actualizar=None):
+    """
+    Ejecuta el INSERT ... ON CONFLICT de un lote y retorna el conjunto de sus
+    claves que ya existían en la tabla.
+    """
+    condicion = tabla.c[clave].in_([fila[clave] for fila in filas])
+    anteriores = None
+    if al_actualizar and modo == ModoConflicto.update:
+        anteriores = [dict(fila) for fila in db.execute(select(tabla).where(condicion)).mappings()]
+        existentes = {fila[clave] for fila in anteriores}
+    else:
+        existentes = set(db.execute(select(tabla.c[clave]).where(condicion)).scalars())
+
+    insert = insert_dialecto(db)
+    sentencia = insert(tabla).values(filas)
+    if modo == ModoConflicto.skip:
+        sentencia = sentencia.on_conflict_do_nothing(index_elements=[clave])
+    else:
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=[clave],
+            set_={c.name: sentencia.excluded[c.name] for c in tabla.c if c.name not in ("id", clave)},
+        )
+    db.execute(sentencia)
+    if anteriores:
+        al_actualizar(db, anteriores, filas)
+    return existentes
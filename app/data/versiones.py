@@ -0,0 +1,38 @@
+import threading
+import uuid
+
+# Identificador del proceso, para que los ids de eventos de un arranque
+# anterior (o de otro proceso) nunca coincidan con los actuales
+ARRANQUE = uuid.uuid4().hex[:8]
+
+class VersionesTablas:
+    """
+    Contadores de versión por tabla, incrementados después de cada escritura
+    confirmada. Son locales al proceso: con varios workers cada uno lleva sus
+    propios contadores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versiones = {}
+        self._observados = {}
+
+    def incrementar(self, tabla: str):
+        with self._lock:
+            self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+
+    def version(self, tabla: str) -> int:
+        with self._lock:
+            return self._versiones.get(tabla, 0)
+
+    def observar(self, tabla: str, estado) -> bool:
+        """
+        Registra el estado de `tabla` leído de la base de datos y retorna True
+        si difiere del último registrado (o si es el primero).
+        """
+        with self._lock:
+            anterior = self._observados.get(tabla)
+            self._observados[tabla] = estado
+            return anterior != estado
+
+versiones = VersionesTablas()
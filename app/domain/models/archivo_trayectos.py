@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Date, Integer, DateTime, MetaData, Table
+from app.data.database import Base
+from app.domain.models.trayecto import Trayecto
+
+class ArchivoTrayectos(Base):
+    """
+    Tabla de archivo de un mes de trayectos (trayectos_archivo_AAAA_MM), con
+    la cantidad de filas que se movieron a ella.
+    """
+    __tablename__ = "archivos_trayectos"
+    tabla = Column(String, primary_key=True)
+    mes = Column(Date, nullable=False, unique=True)
+    filas = Column(Integer, nullable=False, default=0)
+    actualizado = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+# Columnas que se conservan al archivar (la versión de sincronización no aplica)
+COLUMNAS_ARCHIVO = [columna.name for columna in Trayecto.__table__.columns if columna.name != "version"]
+
+# Vista con los trayectos vivos y los archivados (UNION ALL), para la
+# analítica y la exportación. Se define fuera de Base.metadata porque es una
+# vista: la crea la migración 0007 y la recrea el archivado en cada mes nuevo.
+trayectos_historial = Table(
+    "trayectos_historial",
+    MetaData(),
+    *[Column(nombre, Trayecto.__table__.c[nombre].type) for nombre in COLUMNAS_ARCHIVO],
+)
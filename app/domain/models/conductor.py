@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, BigInteger, Integer, Index
 from app.data.database import Base
+from app.data.sincronizacion import version_fila
 import uuid
 
 class Conductor(Base):
@@ -9,4 +10,11 @@ class Conductor(Base):
     cedula = Column(String, unique=True, index=True, nullable=False)
     licencia = Column(String, nullable=False)
     telefono = Column(String, nullable=False)
-    estado = Column(String, nullable=False)
\ No newline at end of file
+    estado = Column(String, nullable=False)
+    # Versión de la última escritura, para GET /sync
+    version = Column(BigInteger, nullable=False, default=version_fila, onupdate=version_fila, server_default="0")
+
+    __table_args__ = (
+        Index("ix_conductores_estado", "estado", "id"),
+        Index("ix_conductores_version", "version", "id"),
+    )
\ No newline at end of file
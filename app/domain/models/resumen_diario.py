@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Date, Integer, Float
+from app.data.database import Base
+
+class ResumenDiario(Base):
+    """
+    Totales de operación por día y por dimensión (dia, ruta, vehiculo o conductor),
+    mantenidos de forma incremental por las escrituras de trayectos.
+    """
+    __tablename__ = "resumen_diario"
+    fecha = Column(Date, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    clave = Column(String, primary_key=True)
+    viajes = Column(Integer, nullable=False, default=0)
+    pasajeros = Column(Integer, nullable=False, default=0)
+    kilometros = Column(Integer, nullable=False, default=0)
+    # Suma de cantidad_pasajeros / capacidad_pasajeros de los viajes con vehículo
+    suma_ocupacion = Column(Float, nullable=False, default=0)
+    viajes_con_capacidad = Column(Integer, nullable=False, default=0)
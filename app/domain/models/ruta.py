@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, BigInteger, Integer, Index
 from sqlalchemy.orm import relationship
 from app.data.database import Base
+from app.data.sincronizacion import version_fila
 import uuid
 
 class Ruta(Base):
@@ -11,4 +12,10 @@ class Ruta(Base):
     origen = Column(String, nullable=False)
     destino = Column(String, nullable=False)
     duracion_estimada = Column(Integer, nullable=False)
-    trayectos = relationship("Trayecto", back_populates="ruta")
\ No newline at end of file
+    # Versión de la última escritura, para GET /sync
+    version = Column(BigInteger, nullable=False, default=version_fila, onupdate=version_fila, server_default="0")
+    trayectos = relationship("Trayecto", back_populates="ruta")
+
+    __table_args__ = (
+        Index("ix_rutas_version", "version", "id"),
+    )
\ No newline at end of file
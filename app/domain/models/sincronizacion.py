@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, BigInteger, Integer, Index
+from app.data.database import Base
+
+class VersionSincronizacion(Base):
+    """
+    Contador global (una sola fila) del que sale la versión de cada transacción
+    que escribe vehículos, conductores, rutas o trayectos. En PostgreSQL guarda
+    el desplazamiento que se suma al id de la transacción.
+    """
+    __tablename__ = "version_sincronizacion"
+    id = Column(Integer, primary_key=True)
+    valor = Column(BigInteger, nullable=False, default=0)
+
+class Eliminacion(Base):
+    """
+    Registro (tombstone) de un vehículo, conductor, ruta o trayecto eliminado,
+    con la versión de la transacción que lo eliminó por última vez.
+    """
+    __tablename__ = "eliminaciones"
+    tabla = Column(String, primary_key=True)
+    registro_id = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+    # Páginas de /sync por tabla, en orden de (version, registro_id)
+    __table_args__ = (
+        Index("ix_eliminaciones_tabla_version", "tabla", "version", "registro_id"),
+    )
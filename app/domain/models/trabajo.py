@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Index
+from app.data.database import Base
+import uuid
+
+class Trabajo(Base):
+    """
+    Trabajo en segundo plano (cargas CSV masivas o archivado de trayectos)
+    con su progreso, conteos y errores por fila.
+    """
+    __tablename__ = "trabajos"
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tipo = Column(String, nullable=False)
+    estado = Column(String, nullable=False, default="pendiente")
+    # Copia en disco del archivo subido (si el trabajo tiene uno) y parámetros
+    archivo = Column(String, nullable=True)
+    parametros = Column(JSON, nullable=False, default=dict)
+    bytes_totales = Column(Integer, nullable=False, default=0)
+    bytes_procesados = Column(Integer, nullable=False, default=0)
+    filas_procesadas = Column(Integer, nullable=False, default=0)
+    insertados = Column(Integer, nullable=False, default=0)
+    actualizados = Column(Integer, nullable=False, default=0)
+    omitidos = Column(Integer, nullable=False, default=0)
+    total_errores = Column(Integer, nullable=False, default=0)
+    ultima_fila_confirmada = Column(Integer, nullable=False, default=0)
+    errores = Column(JSON, nullable=False, default=list)
+    mensaje = Column(String, nullable=True)
+    creado = Column(DateTime, nullable=False, default=datetime.now)
+    iniciado = Column(DateTime, nullable=True)
+    terminado = Column(DateTime, nullable=True)
+    actualizado = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index("ix_trabajos_estado", "estado", "creado"),
+    )
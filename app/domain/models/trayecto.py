@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Date, Time, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Date, Time, BigInteger, Integer, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.data.database import Base
+from app.data.sincronizacion import version_fila
 from app.domain.models.ruta import Ruta
 from app.domain.models.conductor import Conductor
 from app.domain.models.vehiculo import Vehiculo
@@ -18,8 +19,19 @@ class Trayecto(Base):
     ruta_id = Column(String, ForeignKey("rutas.id"), nullable=True)
     conductor_id = Column(String, ForeignKey("conductores.id"), nullable=True)
     vehiculo_id = Column(String, ForeignKey("vehiculos.id"), nullable=True)
+    # Versión de la última escritura, para GET /sync
+    version = Column(BigInteger, nullable=False, default=version_fila, onupdate=version_fila, server_default="0")
     
     # Relaciones
     ruta = relationship("Ruta", back_populates="trayectos")
     conductor = relationship("Conductor", foreign_keys=[conductor_id])
-    vehiculo = relationship("Vehiculo", foreign_keys=[vehiculo_id])
\ No newline at end of file
+    vehiculo = relationship("Vehiculo", foreign_keys=[vehiculo_id])
+
+    # Índices para el orden de los listados y los filtros por recurso y fecha
+    __table_args__ = (
+        Index("ix_trayectos_fecha_hora", "fecha", "hora_salida", "id"),
+        Index("ix_trayectos_conductor_fecha", "conductor_id", "fecha", "hora_salida"),
+        Index("ix_trayectos_vehiculo_fecha", "vehiculo_id", "fecha", "hora_salida"),
+        Index("ix_trayectos_ruta_fecha", "ruta_id", "fecha", "hora_salida"),
+        Index("ix_trayectos_version", "version", "id"),
+    )
\ No newline at end of file
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, BigInteger, Integer, Index
 from app.data.database import Base
+from app.data.sincronizacion import version_fila
 import uuid
 
 class Vehiculo(Base):
@@ -11,4 +12,11 @@ class Vehiculo(Base):
     lateral = Column(String, nullable=False)
     año_de_fabricacion = Column(Integer, nullable=False)
     capacidad_pasajeros = Column(Integer, nullable=False)
-    estado_operativo = Column(String, nullable=False)
\ No newline at end of file
+    estado_operativo = Column(String, nullable=False)
+    # Versión de la última escritura, para GET /sync
+    version = Column(BigInteger, nullable=False, default=version_fila, onupdate=version_fila, server_default="0")
+
+    __table_args__ = (
+        Index("ix_vehiculos_estado_operativo", "estado_operativo", "id"),
+        Index("ix_vehiculos_version", "version", "id"),
+    )
\ No newline at end of file
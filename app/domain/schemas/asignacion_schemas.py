@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+class SolicitudAsignacion(BaseModel):
+    fecha_desde: date
+    fecha_hasta: date
+    asignar_conductores: bool = True
+    asignar_vehiculos: bool = True
+    simular: bool = False
+
+class TrayectoAsignado(BaseModel):
+    trayecto_id: str
+    conductor_id: Optional[str] = None
+    vehiculo_id: Optional[str] = None
+
+class TrayectoSinAsignar(BaseModel):
+    trayecto_id: str
+    motivo: str
+
+class ResultadoAsignacion(BaseModel):
+    asignados: int
+    simulado: bool
+    asignaciones: List[TrayectoAsignado]
+    sin_asignar: List[TrayectoSinAsignar]
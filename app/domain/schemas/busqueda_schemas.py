@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class ResultadoBusqueda(BaseModel):
+    tipo: str
+    id: str
+    titulo: str
+    detalle: str
+    puntaje: float
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class ResumenUpsert(BaseModel):
+    insertados: int
+    actualizados: int
+    omitidos: int
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import date
+
+class ResumenOperacion(BaseModel):
+    fecha: Optional[date] = None
+    clave: Optional[str] = None
+    viajes: int
+    pasajeros: int
+    kilometros: int
+    ocupacion_promedio: Optional[float] = None
+
+class OcupacionRutaHora(BaseModel):
+    ruta_id: str
+    ruta_codigo: Optional[str] = None
+    hora: int
+    viajes: int
+    ocupacion_promedio: float
+    percentiles: Dict[str, float]
+
+class KilometrosVehiculoMes(BaseModel):
+    vehiculo_id: str
+    placa: Optional[str] = None
+    mes: str
+    viajes: int
+    kilometros: int
+
+class HorasConductor(BaseModel):
+    conductor_id: str
+    mes: Optional[str] = None
+    viajes: int
+    horas: float
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import date, time
 
 class RutaCrear(BaseModel):
     nombre: str
@@ -21,4 +22,11 @@ class RutaActualizar(BaseModel):
     codigo: Optional[str] = None
     origen: Optional[str] = None
     destino: Optional[str] = None
-    duracion_estimada: Optional[int] = None
\ No newline at end of file
+    duracion_estimada: Optional[int] = None
+
+class Salida(BaseModel):
+    trayecto_id: str
+    ruta_id: str
+    fecha: date
+    hora_salida: time
+    hora_llegada: time
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+from app.domain.schemas.conductor_schemas import Conductor
+from app.domain.schemas.ruta_schemas import Ruta
+from app.domain.schemas.trayecto_schemas import TrayectoBase
+from app.domain.schemas.vehiculo_schemas import Vehiculo
+
+T = TypeVar("T")
+
+class TrayectoPlano(TrayectoBase):
+    id: str
+
+class CambiosTabla(BaseModel, Generic[T]):
+    cambios: List[T]
+    eliminados: List[str]
+
+class Sincronizacion(BaseModel):
+    token: int
+    continuar: Optional[str] = None
+    vehiculos: Optional[CambiosTabla[Vehiculo]] = None
+    conductores: Optional[CambiosTabla[Conductor]] = None
+    rutas: Optional[CambiosTabla[Ruta]] = None
+    trayectos: Optional[CambiosTabla[TrayectoPlano]] = None
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class TrabajoAceptado(BaseModel):
+    trabajo_id: str
+    estado: str
+
+class ErrorFila(BaseModel):
+    fila: int
+    error: str
+
+class Trabajo(BaseModel):
+    id: str
+    tipo: str
+    estado: str
+    progreso: float
+    filas_procesadas: int
+    insertados: int
+    actualizados: int
+    omitidos: int
+    total_errores: int
+    ultima_fila_confirmada: int
+    errores: List[ErrorFila]
+    mensaje: Optional[str] = None
+    creado: datetime
+    iniciado: Optional[datetime] = None
+    terminado: Optional[datetime] = None
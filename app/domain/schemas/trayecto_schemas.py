@@ -37,4 +37,7 @@ class TrayectoActualizar(BaseModel):
     observaciones: Optional[str] = None
     ruta_id: Optional[str] = None
     conductor_id: Optional[str] = None
-    vehiculo_id: Optional[str] = None
\ No newline at end of file
+    vehiculo_id: Optional[str] = None
+
+class TrayectoActualizarLote(TrayectoActualizar):
+    id: str
@@ -1,23 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.data.database import engine
-from app.domain.models.vehiculo import Base as VehiculoBase
-from app.domain.models.ruta import Base as RutaBase
-from app.domain.models.conductor import Base as ConductorBase
-from app.domain.models.trayecto import Base as TrayectoBase
+from app.data.database import async_engine, engine, engine_lectura, SessionLocal
+from app.data.indice_disponibilidad import indice_disponibilidad
+from app.data.indice_horarios import indice_horarios
+from app.data.trabajos import ejecutor_trabajos
+from app.presentation.condicional import MiddlewareCondicional
+from app.presentation.metricas import MiddlewareMetricas, instrumentar_motor
+from app.presentation.metricas import router as metricas_router
+from app.presentation.paginacion import ENCABEZADO_CURSOR
 from app.presentation.api_vehiculo import router as vehiculo_router
 from app.presentation.api_ruta import router as ruta_router
 from app.presentation.api_conductor import router as conductor_router
 from app.presentation.api_trayecto import router as trayecto_router
+from app.presentation.api_analitica import router as analitica_router
+from app.presentation.api_eventos import router as eventos_router
+from app.presentation.api_sincronizacion import router as sincronizacion_router
+from app.presentation.api_trabajos import router as trabajos_router
+from app.presentation.api_busqueda import router as busqueda_router
 
-# Crear todas las tablas en la base de datos
-VehiculoBase.metadata.create_all(bind=engine)
-RutaBase.metadata.create_all(bind=engine)
-ConductorBase.metadata.create_all(bind=engine)
-TrayectoBase.metadata.create_all(bind=engine)
+# El esquema se crea y evoluciona con las migraciones (alembic upgrade head),
+# que se ejecutan fuera del arranque de la aplicación
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reconstruir los índices en memoria: disponibilidad de conductores y
+    # vehículos y horarios de salida por ruta
+    db = SessionLocal()
+    try:
+        indice_disponibilidad.reconstruir(db)
+        indice_horarios.reconstruir(db)
+    finally:
+        db.close()
+    # Ejecutor de las cargas masivas en segundo plano
+    ejecutor_trabajos.iniciar()
+    yield
+    ejecutor_trabajos.detener()
+    await async_engine.dispose()
 
 # Inicializar la aplicación FastAPI
-app = FastAPI(description="API para el transporte publico de Manizales")
+app = FastAPI(description="API para el transporte publico de Manizales", lifespan=lifespan)
 
 # Se agrega el middleware CORS en el backend para permitir las peticiones desde el frontend
 app.add_middleware(
@@ -26,13 +48,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos los métodos HTTP
     allow_headers=["*"],  # Permite todos los headers
+    expose_headers=[ENCABEZADO_CURSOR, "ETag", "Location"],  # Permite al frontend leer el cursor de paginación, el ETag y la URL de los trabajos
 )
 
+# GET condicionales con If-None-Match: *, resueltos después del endpoint
+app.add_middleware(MiddlewareCondicional)
+
+# Métricas por ruta (latencia, SQL, filas y serialización) expuestas en /metrics
+for motor in (engine, engine_lectura, async_engine.sync_engine):
+    instrumentar_motor(motor)
+app.add_middleware(MiddlewareMetricas)
+
 # Incluir los routers de los endpoints
 app.include_router(vehiculo_router)
 app.include_router(ruta_router)
 app.include_router(conductor_router)
 app.include_router(trayecto_router)
+app.include_router(analitica_router)
+app.include_router(eventos_router)
+app.include_router(sincronizacion_router)
+app.include_router(trabajos_router)
+app.include_router(busqueda_router)
+app.include_router(metricas_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,69 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.data.database import get_db_lectura
+from app.data import analitica_columnar
+from app.data.resumen_operaciones import Dimension, consultar
+from app.domain.schemas.resumen_schemas import HorasConductor, KilometrosVehiculoMes, OcupacionRutaHora, ResumenOperacion
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from typing import List, Optional
+
+router = APIRouter(route_class=RutaMedida)
+
+@router.get("/analytics/resumen/{dimension}", response_model=List[ResumenOperacion], tags=["Analitica"], dependencies=[Depends(etag_condicional("trayectos", "vehiculos"))])
+def leer_resumen(
+    dimension: Dimension,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    clave: Optional[str] = None,
+    por_dia: bool = True,
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Pasajeros, kilómetros, viajes y ocupación promedio por día (`dia`) o por
+    ruta, vehículo o conductor, leídos de la tabla de resumen diario.
+    Con `por_dia=false` se acumulan los totales de todo el rango por clave.
+    """
+    return consultar(db, dimension, fecha_desde, fecha_hasta, clave, por_dia)
+
+# Tablas que alimentan la instantánea columnar de trayectos
+TABLAS_INSTANTANEA = ("trayectos", "vehiculos", "rutas")
+
+@router.get("/analytics/ocupacion", response_model=List[OcupacionRutaHora], tags=["Analitica"], dependencies=[Depends(etag_condicional(*TABLAS_INSTANTANEA))])
+def leer_ocupacion(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    percentiles: List[float] = Query([50, 90, 95]),
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Ocupación por ruta y hora de salida (promedio y percentiles), calculada
+    sobre la instantánea columnar de trayectos.
+    """
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise HTTPException(status_code=400, detail="Los percentiles deben estar entre 0 y 100.")
+    return analitica_columnar.ocupacion_por_ruta_hora(db, fecha_desde, fecha_hasta, percentiles)
+
+@router.get("/analytics/kilometros-vehiculos", response_model=List[KilometrosVehiculoMes], tags=["Analitica"], dependencies=[Depends(etag_condicional(*TABLAS_INSTANTANEA))])
+def leer_kilometros_vehiculos(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Kilómetros recorridos por vehículo y mes.
+    """
+    return analitica_columnar.kilometros_por_vehiculo_mes(db, fecha_desde, fecha_hasta)
+
+@router.get("/analytics/horas-conductores", response_model=List[HorasConductor], tags=["Analitica"], dependencies=[Depends(etag_condicional(*TABLAS_INSTANTANEA))])
+def leer_horas_conductores(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    por_mes: bool = False,
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Horas conducidas por conductor, en total o por mes.
+    """
+    return analitica_columnar.horas_por_conductor(db, fecha_desde, fecha_hasta, por_mes)
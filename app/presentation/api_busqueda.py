@@ -0,0 +1,42 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.data.busqueda import ENTIDADES, buscar
+from app.data.database import get_db_lectura
+from app.domain.schemas.busqueda_schemas import ResultadoBusqueda
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+
+router = APIRouter(route_class=RutaMedida)
+
+# Máximo de resultados por búsqueda
+LIMITE_BUSQUEDA = 100
+
+@router.get(
+    "/buscar",
+    response_model=List[ResultadoBusqueda],
+    tags=["Busqueda"],
+    dependencies=[Depends(etag_condicional(*[entidad["tabla"] for entidad in ENTIDADES.values()]))],
+)
+def buscar_entidades(
+    q: str = Query(..., min_length=1, max_length=100),
+    tipos: Optional[str] = None,
+    limite: int = Query(20, ge=1, le=LIMITE_BUSQUEDA),
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Búsqueda de texto en vehículos (placa, lateral, marca, modelo), conductores
+    (nombre, cédula, licencia) y rutas (código, nombre, origen, destino).
+    Encuentra coincidencias parciales, por ejemplo parte de una placa.
+    `tipos` limita las entidades (separadas por comas).
+    """
+    seleccion = list(ENTIDADES)
+    if tipos:
+        seleccion = [tipo.strip() for tipo in tipos.split(",") if tipo.strip()]
+        invalidos = set(seleccion) - set(ENTIDADES)
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipos no válidos: {', '.join(sorted(invalidos))}. Use {', '.join(ENTIDADES)}.",
+            )
+    return buscar(db, q, seleccion, limite)
@@ -1,78 +1,132 @@
-import csv
-from io import StringIO
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.domain.models.conductor import Conductor as ConductorModelo
+from app.domain.schemas.carga_schemas import ResumenUpsert
 from app.domain.schemas.conductor_schemas import ConductorCrear, Conductor, ConductorActualizar
-from app.data.database import get_db
-from typing import List
+from app.data.database import get_db, get_db_async, get_db_lectura
+from app.data.maestros import columnas_respuesta, obtener_por_campo_async
+from app.data.cambios import notificar_cambio
+from app.data.sincronizacion import registrar_eliminacion
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from app.data.ingesta import ingerir_csv, TAMANO_LOTE
+from app.data.trabajos import ejecutor_trabajos
+from app.domain.schemas.trabajo_schemas import TrabajoAceptado
+from app.presentation.api_trabajos import aceptar_trabajo
+from app.data.upsert import upsert, ModoConflicto
+from app.presentation.negociacion import Negociacion
+from app.presentation.paginacion import Paginacion, paginar
+from typing import List, Optional, Union
 
-router = APIRouter()
+router = APIRouter(route_class=RutaMedida)
 
-@router.post("/conductores/", response_model=List[Conductor], tags=["Conductores"])
-def crear_conductores(conductores: List[ConductorCrear], db: Session = Depends(get_db)): 
+@router.post("/conductores/", response_model=Union[List[Conductor], ResumenUpsert], tags=["Conductores"])
+def crear_conductores(
+    conductores: List[ConductorCrear],
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    if on_conflict:
+        # Una sola sentencia INSERT ... ON CONFLICT sobre el índice único
+        filas = [conductor.model_dump() for conductor in conductores]
+        try:
+            resumen = upsert(db, ConductorModelo.__table__, filas, "cedula", on_conflict)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Error: los datos violan una restricción de la base de datos.")
+        notificar_cambio("conductores", "carga", **resumen)
+        return resumen
     db_conductores = []
     for conductor in conductores:
         db_conductor = ConductorModelo(**conductor.model_dump())
         db.add(db_conductor)
         db_conductores.append(db_conductor)
     try:    
+        db.flush()
+        ids = [db_conductor.id for db_conductor in db_conductores]
         db.commit()
+        notificar_cambio("conductores", "creado", ids)
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error: Conductor duplicado.")        
     return db_conductores
 
-@router.post("/conductores/bulk", tags=["Conductores"])
-async def crear_conductores_bulk(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    decoded_contents = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded_contents), delimiter=';')
-
-    db_conductores = []
-    errores = []
+def _convertir_conductor(row):
+    return {
+        "nombre": row['nombre'],
+        "cedula": row['cedula'],
+        "licencia": row['licencia'],
+        "telefono": row['telefono'],
+        "estado": row['estado'],
+    }
 
-    for row in csv_reader:
-        try:
-            db_conductor = ConductorModelo(
-                nombre=row['nombre'],
-                cedula=row['cedula'],
-                licencia=row['licencia'],
-                telefono=row['telefono'],
-                estado=row['estado'],
-            )
-            db.add(db_conductor)
-            db_conductores.append(db_conductor)
-        except Exception as e:
-            errores.append(f"Error al procesar el conductor {row['cedula']}: {str(e)}")
+def _cargar_conductores(db: Session, archivo, parametros, **opciones):
+    # Cada lote confirmado se notifica al momento: invalida la caché y los
+    # ETag mientras la carga sigue en curso
+    return ingerir_csv(
+        db,
+        archivo,
+        ConductorModelo.__table__,
+        _convertir_conductor,
+        parametros["tamano_lote"],
+        parametros["desde_fila"],
+        clave="cedula",
+        on_conflict=parametros["on_conflict"] and ModoConflicto(parametros["on_conflict"]),
+        al_confirmar=lambda filas: notificar_cambio("conductores", "carga", filas=len(filas)),
+        **opciones,
+    )
 
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Error: Conductor duplicado.")
+ejecutor_trabajos.registrar("carga_conductores", _cargar_conductores)
 
-    return {"conductores_insertados": len(db_conductores), "errores": errores}
+@router.post("/conductores/bulk", status_code=202, response_model=TrabajoAceptado, tags=["Conductores"])
+def crear_conductores_bulk(
+    response: Response,
+    file: UploadFile = File(...),
+    tamano_lote: int = Query(TAMANO_LOTE, gt=0),
+    desde_fila: int = Query(0, ge=0),
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Encola la carga del CSV y responde de inmediato con el id del trabajo;
+    el avance se consulta en GET /jobs/{id}.
+    """
+    trabajo_id = ejecutor_trabajos.encolar(
+        db, "carga_conductores", file, {"tamano_lote": tamano_lote, "desde_fila": desde_fila, "on_conflict": on_conflict}
+    )
+    return aceptar_trabajo(trabajo_id, response)
 
-@router.get("/conductores/", response_model=List[Conductor], tags=["Conductores"])
-def leer_conductores(db: Session = Depends(get_db)):
-    conductores = db.query(ConductorModelo).all()
-    return [Conductor.model_validate(conductor.__dict__) for conductor in conductores]
+@router.get("/conductores/", response_model=List[Conductor], tags=["Conductores"], dependencies=[Depends(etag_condicional("conductores"))])
+def leer_conductores(
+    response: Response,
+    estado: Optional[str] = None,
+    paginacion: Paginacion = Depends(),
+    negociacion: Negociacion = Depends(),
+    db: Session = Depends(get_db_lectura),
+):
+    query = db.query(*columnas_respuesta("conductores"))
+    if estado:
+        query = query.filter(ConductorModelo.estado == estado)
+    conductores = paginar(query, [ConductorModelo.id], paginacion, response)
+    return negociacion.responder([fila._asdict() for fila in conductores], confiable=True)
 
 @router.put("/conductor/{conductor_id}", response_model=Conductor, tags=["Conductores"])
-async def modificar_conductor(conductor_id: str, conductor: Conductor, db: Session = Depends(get_db)):
+def modificar_conductor(conductor_id: str, conductor: Conductor, db: Session = Depends(get_db)):
     db_conductor = db.query(ConductorModelo).filter(ConductorModelo.id == conductor_id).first()
     if not db_conductor:
         raise HTTPException(status_code=404, detail="Conductor no encontrado.")
     for key, value in conductor.model_dump().items():
         setattr(db_conductor, key, value)
     db.commit()
+    notificar_cambio("conductores", "actualizado", [conductor_id])
     conductor_dict = {k: getattr(db_conductor, k) for k in Conductor.model_fields.keys()}
     return Conductor.model_validate(db_conductor.__dict__)
 
 @router.patch("/conductor/{conductor_id}", response_model=Conductor, tags=["Conductores"])
-async def modificar_conductor_parcial(conductor_id: str, conductor: ConductorActualizar, db: Session = Depends(get_db)):
+def modificar_conductor_parcial(conductor_id: str, conductor: ConductorActualizar, db: Session = Depends(get_db)):
     db_conductor = db.query(ConductorModelo).filter(ConductorModelo.id == conductor_id).first()
     if not db_conductor:
         raise HTTPException(status_code=404, detail="Conductor no encontrado.")
@@ -83,6 +137,7 @@ async def modificar_conductor_parcial(conductor_id: str, conductor: ConductorAct
             setattr(db_conductor, key, value)
     
     db.commit()
+    notificar_cambio("conductores", "actualizado", [conductor_id])
     
     # Crear un diccionario con los valores actualizados
     conductor_dict = {
@@ -96,18 +151,20 @@ async def modificar_conductor_parcial(conductor_id: str, conductor: ConductorAct
     
     return Conductor.model_validate(conductor_dict)
 
-@router.get("/conductor/{conductor_id}", response_model=Conductor, tags=["Conductores"])
-async def obtener_conductor(conductor_id: str, db: Session = Depends(get_db)):
-    db_conductor = db.query(ConductorModelo).filter(ConductorModelo.id == conductor_id).first()
+@router.get("/conductor/{conductor_id}", response_model=Conductor, tags=["Conductores"], dependencies=[Depends(etag_condicional("conductores"))])
+async def obtener_conductor(conductor_id: str, db: AsyncSession = Depends(get_db_async)):
+    db_conductor = await obtener_por_campo_async(db, "conductores", "id", conductor_id)
     if not db_conductor:
         raise HTTPException(status_code=404, detail="Conductor no encontrado.")
-    return Conductor.model_validate(db_conductor.__dict__)
+    return db_conductor
 
 @router.delete("/conductor/{conductor_id}", response_model=dict, tags=["Conductores"])
-async def eliminar_conductor(conductor_id: str, db: Session = Depends(get_db)):
+def eliminar_conductor(conductor_id: str, db: Session = Depends(get_db)):
     db_conductor = db.query(ConductorModelo).filter(ConductorModelo.id == conductor_id).first()
     if not db_conductor:
         raise HTTPException(status_code=404, detail="Conductor no encontrado.")
     db.delete(db_conductor)
+    registrar_eliminacion(db, "conductores", [conductor_id])
     db.commit()
+    notificar_cambio("conductores", "eliminado", [conductor_id])
     return {"detail": "Conductor eliminado exitosamente."}
\ No newline at end of file
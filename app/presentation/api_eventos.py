@@ -0,0 +1,71 @@
+import asyncio
+import os
+from typing import Optional
+import orjson
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.data.eventos import TOPICOS, bus_eventos
+from app.presentation.metricas import RutaMedida
+
+router = APIRouter(route_class=RutaMedida)
+
+# Segundos sin eventos tras los que se envía un comentario para mantener viva la conexión
+EVENTOS_PING_SEGUNDOS = float(os.getenv("EVENTOS_PING_SEGUNDOS", "15"))
+
+# Milisegundos que el navegador espera antes de reconectarse
+EVENTOS_REINTENTO_MS = 3000
+
+def _formatear(evento):
+    datos = orjson.dumps({"tipo": evento.tipo, "topico": evento.topico, **evento.datos})
+    return b"id: " + evento.id.encode() + b"\nevent: " + evento.topico.encode() + b"\ndata: " + datos + b"\n\n"
+
+async def _flujo(request: Request, suscripcion, pendientes, completo):
+    try:
+        yield f"retry: {EVENTOS_REINTENTO_MS}\n\n".encode()
+        if not completo:
+            # El buffer ya no cubre el Last-Event-ID: el cliente debe recargar su estado
+            yield b"event: reinicio\ndata: {}\n\n"
+        for evento in pendientes:
+            yield _formatear(evento)
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), timeout=EVENTOS_PING_SEGUNDOS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": ping\n\n"
+                continue
+            if evento is None:
+                # Cola desbordada: se cierra y el cliente se reanuda con Last-Event-ID
+                break
+            yield _formatear(evento)
+    finally:
+        bus_eventos.desuscribir(suscripcion)
+
+@router.get("/events", tags=["Eventos"])
+async def leer_eventos(
+    request: Request,
+    topicos: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Flujo Server-Sent Events con las creaciones, modificaciones y eliminaciones
+    confirmadas. `topicos` filtra por tabla (separadas por comas). Al
+    reconectarse, el encabezado Last-Event-ID reenvía lo ocurrido desde ese
+    evento; si ya salió del buffer se envía un evento `reinicio`.
+    """
+    filtro = None
+    if topicos:
+        filtro = {topico.strip() for topico in topicos.split(",") if topico.strip()}
+        invalidos = filtro - set(TOPICOS)
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tópicos no válidos: {', '.join(sorted(invalidos))}. Use {', '.join(TOPICOS)}.",
+            )
+    suscripcion, pendientes, completo = bus_eventos.suscribir(filtro, last_event_id)
+    return StreamingResponse(
+        _flujo(request, suscripcion, pendientes, completo),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,78 +1,136 @@
-import csv
-from io import StringIO
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.domain.models.ruta import Ruta as RutaModelo
-from app.domain.schemas.ruta_schemas import RutaCrear, Ruta, RutaActualizar
-from app.data.database import get_db
-from typing import List
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+from app.domain.schemas.carga_schemas import ResumenUpsert
+from app.domain.schemas.ruta_schemas import RutaCrear, Ruta, RutaActualizar, Salida
+from app.data.database import get_db, get_db_async, get_db_lectura
+from app.data.maestros import columnas_respuesta, obtener_por_campo, obtener_por_campo_async
+from app.data.cache import obtener_cache
+from app.data.indice_horarios import indice_horarios
+from app.data.cambios import notificar_cambio
+from app.data.sincronizacion import registrar_eliminacion
+from app.data.resumen_operaciones import aplicar_cambios
+from app.data.analitica_columnar import instantanea_trayectos
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from app.data.ingesta import ingerir_csv, TAMANO_LOTE
+from app.data.trabajos import ejecutor_trabajos
+from app.domain.schemas.trabajo_schemas import TrabajoAceptado
+from app.presentation.api_trabajos import aceptar_trabajo
+from app.data.upsert import upsert, ModoConflicto
+from app.presentation.negociacion import Negociacion
+from app.presentation.paginacion import Paginacion, paginar
+from datetime import datetime
+from typing import List, Optional, Union
 
-router = APIRouter()
+router = APIRouter(route_class=RutaMedida)
 
-@router.post("/rutas/", response_model=List[Ruta], tags=["Rutas"])
-def crear_rutas(rutas: List[RutaCrear], db: Session = Depends(get_db)): 
+@router.post("/rutas/", response_model=Union[List[Ruta], ResumenUpsert], tags=["Rutas"])
+def crear_rutas(
+    rutas: List[RutaCrear],
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    if on_conflict:
+        # Una sola sentencia INSERT ... ON CONFLICT sobre el índice único
+        filas = [ruta.model_dump() for ruta in rutas]
+        try:
+            resumen = upsert(db, RutaModelo.__table__, filas, "codigo", on_conflict)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Error: los datos violan una restricción de la base de datos.")
+        notificar_cambio("rutas", "carga", **resumen)
+        return resumen
     db_rutas = []
     for ruta in rutas:
         db_ruta = RutaModelo(**ruta.model_dump())
         db.add(db_ruta)
         db_rutas.append(db_ruta)
     try:    
+        db.flush()
+        ids = [db_ruta.id for db_ruta in db_rutas]
         db.commit()
+        notificar_cambio("rutas", "creado", ids)
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error: Ruta duplicada.")        
     return db_rutas
 
-@router.post("/rutas/bulk", tags=["Rutas"])
-async def crear_rutas_bulk(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    decoded_contents = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded_contents), delimiter=';')
+def _convertir_ruta(row):
+    return {
+        "nombre": row['nombre'],
+        "codigo": row['codigo'],
+        "origen": row['origen'],
+        "destino": row['destino'],
+        "duracion_estimada": int(row['duracion_estimada']),
+    }
 
-    db_rutas = []
-    errores = []
+def _cargar_rutas(db: Session, archivo, parametros, **opciones):
+    # Cada lote confirmado se notifica al momento: invalida la caché y los
+    # ETag mientras la carga sigue en curso
+    return ingerir_csv(
+        db,
+        archivo,
+        RutaModelo.__table__,
+        _convertir_ruta,
+        parametros["tamano_lote"],
+        parametros["desde_fila"],
+        clave="codigo",
+        on_conflict=parametros["on_conflict"] and ModoConflicto(parametros["on_conflict"]),
+        al_confirmar=lambda filas: notificar_cambio("rutas", "carga", filas=len(filas)),
+        **opciones,
+    )
 
-    for row in csv_reader:
-        try:
-            db_ruta = RutaModelo(
-                nombre=row['nombre'],
-                codigo=row['codigo'],
-                origen=row['origen'],
-                destino=row['destino'],
-                duracion_estimada=int(row['duracion_estimada']),
-            )
-            db.add(db_ruta)
-            db_rutas.append(db_ruta)
-        except Exception as e:
-            errores.append(f"Error al procesar la ruta {row['codigo']}: {str(e)}")
-
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Error: Ruta duplicada.")
+ejecutor_trabajos.registrar("carga_rutas", _cargar_rutas)
 
-    return {"rutas_insertadas": len(db_rutas), "errores": errores}
+@router.post("/rutas/bulk", status_code=202, response_model=TrabajoAceptado, tags=["Rutas"])
+def crear_rutas_bulk(
+    response: Response,
+    file: UploadFile = File(...),
+    tamano_lote: int = Query(TAMANO_LOTE, gt=0),
+    desde_fila: int = Query(0, ge=0),
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Encola la carga del CSV y responde de inmediato con el id del trabajo;
+    el avance se consulta en GET /jobs/{id}.
+    """
+    trabajo_id = ejecutor_trabajos.encolar(
+        db, "carga_rutas", file, {"tamano_lote": tamano_lote, "desde_fila": desde_fila, "on_conflict": on_conflict}
+    )
+    return aceptar_trabajo(trabajo_id, response)
 
-@router.get("/rutas/", response_model=List[Ruta], tags=["Rutas"])
-def leer_rutas(db: Session = Depends(get_db)):
-    rutas = db.query(RutaModelo).all()
-    return [Ruta.model_validate(ruta.__dict__) for ruta in rutas]
+@router.get("/rutas/", response_model=List[Ruta], tags=["Rutas"], dependencies=[Depends(etag_condicional("rutas"))])
+def leer_rutas(
+    response: Response,
+    paginacion: Paginacion = Depends(),
+    negociacion: Negociacion = Depends(),
+    db: Session = Depends(get_db_lectura),
+):
+    query = db.query(*columnas_respuesta("rutas"))
+    rutas = paginar(query, [RutaModelo.id], paginacion, response)
+    return negociacion.responder([fila._asdict() for fila in rutas], confiable=True)
 
 @router.put("/ruta/{ruta_id}", response_model=Ruta, tags=["Rutas"])
-async def modificar_ruta(ruta_id: str, ruta: Ruta, db: Session = Depends(get_db)):
+def modificar_ruta(ruta_id: str, ruta: Ruta, db: Session = Depends(get_db)):
     db_ruta = db.query(RutaModelo).filter(RutaModelo.id == ruta_id).first()
     if not db_ruta:
         raise HTTPException(status_code=404, detail="Ruta no encontrada.")
     for key, value in ruta.model_dump().items():
         setattr(db_ruta, key, value)
     db.commit()
+    notificar_cambio("rutas", "actualizado", [ruta_id])
     ruta_dict = {k: getattr(db_ruta, k) for k in Ruta.model_fields.keys()}
     return Ruta.model_validate(db_ruta.__dict__)
 
 @router.patch("/ruta/{ruta_id}", response_model=Ruta, tags=["Rutas"])
-async def modificar_ruta_parcial(ruta_id: str, ruta: RutaActualizar, db: Session = Depends(get_db)):
+def modificar_ruta_parcial(ruta_id: str, ruta: RutaActualizar, db: Session = Depends(get_db)):
     db_ruta = db.query(RutaModelo).filter(RutaModelo.id == ruta_id).first()
     if not db_ruta:
         raise HTTPException(status_code=404, detail="Ruta no encontrada.")
@@ -83,6 +141,7 @@ async def modificar_ruta_parcial(ruta_id: str, ruta: RutaActualizar, db: Session
             setattr(db_ruta, key, value)
     
     db.commit()
+    notificar_cambio("rutas", "actualizado", [ruta_id])
     
     # Crear un diccionario con los valores actualizados
     ruta_dict = {
@@ -96,18 +155,81 @@ async def modificar_ruta_parcial(ruta_id: str, ruta: RutaActualizar, db: Session
     
     return Ruta.model_validate(ruta_dict)
 
-@router.get("/ruta/{ruta_id}", response_model=Ruta, tags=["Rutas"])
-async def obtener_ruta(ruta_id: str, db: Session = Depends(get_db)):
-    db_ruta = db.query(RutaModelo).filter(RutaModelo.id == ruta_id).first()
+@router.get("/ruta/{ruta_id}", response_model=Ruta, tags=["Rutas"], dependencies=[Depends(etag_condicional("rutas"))])
+async def obtener_ruta(ruta_id: str, db: AsyncSession = Depends(get_db_async)):
+    db_ruta = await obtener_por_campo_async(db, "rutas", "id", ruta_id)
     if not db_ruta:
         raise HTTPException(status_code=404, detail="Ruta no encontrado.")
-    return Ruta.model_validate(db_ruta.__dict__)
+    return db_ruta
 
 @router.delete("/ruta/{ruta_id}", response_model=dict, tags=["Rutas"])
-async def eliminar_ruta(ruta_id: str, db: Session = Depends(get_db)):
+def eliminar_ruta(ruta_id: str, db: Session = Depends(get_db)):
     db_ruta = db.query(RutaModelo).filter(RutaModelo.id == ruta_id).first()
     if not db_ruta:
         raise HTTPException(status_code=404, detail="Ruta no encontrada.")
+    # Sus trayectos quedan sin ruta: se descuentan del resumen por ruta en la
+    # misma transacción (los archivados conservan la ruta, como en reconstruir)
+    anteriores = [dict(fila) for fila in db.execute(
+        select(
+            TrayectoModelo.id,
+            TrayectoModelo.fecha,
+            TrayectoModelo.cantidad_pasajeros,
+            TrayectoModelo.kilometraje,
+            TrayectoModelo.ruta_id,
+            TrayectoModelo.conductor_id,
+            TrayectoModelo.vehiculo_id,
+        ).where(TrayectoModelo.ruta_id == ruta_id)
+    ).mappings()]
+    if anteriores:
+        db.execute(update(TrayectoModelo).where(TrayectoModelo.ruta_id == ruta_id).values(ruta_id=None))
+        aplicar_cambios(db, anteriores, [{**trayecto, "ruta_id": None} for trayecto in anteriores])
     db.delete(db_ruta)
+    registrar_eliminacion(db, "rutas", [ruta_id])
     db.commit()
-    return {"detail": "Ruta eliminada exitosamente."}
\ No newline at end of file
+    indice_horarios.eliminar_ruta(ruta_id)
+    notificar_cambio("rutas", "eliminado", [ruta_id])
+    if anteriores:
+        instantanea_trayectos.invalidar()
+        notificar_cambio("trayectos", "actualizado", [trayecto["id"] for trayecto in anteriores])
+    return {"detail": "Ruta eliminada exitosamente."}
+
+# Máximo de salidas por consulta
+LIMITE_SALIDAS = 100
+
+@router.get("/rutas/{ruta_id}/salidas", response_model=List[Salida], tags=["Rutas"])
+def leer_salidas_ruta(
+    ruta_id: str,
+    desde: Optional[datetime] = None,
+    limite: int = Query(10, ge=1, le=LIMITE_SALIDAS),
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Próximas salidas de la ruta a partir de `desde` (por defecto, ahora),
+    incluidas las de los días siguientes, leídas del índice de horarios en memoria.
+    """
+    if not obtener_por_campo(db, "rutas", "id", ruta_id):
+        raise HTTPException(status_code=404, detail="Ruta no encontrada.")
+    desde = desde or datetime.now()
+    indice_horarios.asegurar_cargado(db)
+    return indice_horarios.proximas([ruta_id], desde.date(), desde.time(), limite)
+
+def _rutas_por_origen(db: Session, origen: str):
+    def cargar():
+        return db.execute(select(RutaModelo.id).where(RutaModelo.origen == origen)).scalars().all()
+
+    # Se guarda en la caché de rutas, que se invalida con cada escritura de rutas
+    return obtener_cache("rutas").obtener_o_cargar(("origen", origen), cargar)
+
+@router.get("/salidas", response_model=List[Salida], tags=["Rutas"])
+def leer_salidas_origen(
+    origen: str,
+    desde: Optional[datetime] = None,
+    limite: int = Query(10, ge=1, le=LIMITE_SALIDAS),
+    db: Session = Depends(get_db_lectura),
+):
+    """
+    Próximas salidas de todas las rutas que parten de `origen`, en orden de fecha y hora.
+    """
+    desde = desde or datetime.now()
+    indice_horarios.asegurar_cargado(db)
+    return indice_horarios.proximas(_rutas_por_origen(db, origen), desde.date(), desde.time(), limite)
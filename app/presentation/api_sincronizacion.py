@@ -0,0 +1,100 @@
+import base64
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.data.database import get_db_lectura
+from app.data.sincronizacion import TABLAS_SINCRONIZADAS, cambios_desde, eliminados_desde, version_actual
+from app.domain.schemas.sincronizacion_schemas import Sincronizacion
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from app.presentation.negociacion import Negociacion
+from app.presentation.paginacion import codificar_cursor
+
+router = APIRouter(route_class=RutaMedida)
+
+# Filas (cambios más eliminados, de todas las tablas) por página de /sync
+LIMITE_SINCRONIZACION = 1000
+LIMITE_SINCRONIZACION_MAXIMO = 10000
+
+CAMBIOS = "cambios"
+ELIMINADOS = "eliminados"
+
+def _decodificar_continuacion(continuar: str):
+    # [since, token, tablas, tabla en curso, fase, version, id]
+    try:
+        since, token, seleccion, tabla, fase, version, identificador = json.loads(base64.urlsafe_b64decode(continuar.encode()))
+        if not set(seleccion) <= set(TABLAS_SINCRONIZADAS) or tabla not in range(len(seleccion)) or fase not in (CAMBIOS, ELIMINADOS):
+            raise ValueError
+        despues = None if version is None else (int(version), str(identificador))
+        return since, int(token), seleccion, tabla, fase, despues
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Token de continuación inválido.")
+
+@router.get("/sync", response_model=Sincronizacion, tags=["Sincronizacion"], dependencies=[Depends(etag_condicional(*TABLAS_SINCRONIZADAS))])
+def sincronizar(
+    since: Optional[int] = Query(None, ge=0),
+    tablas: Optional[str] = None,
+    limite: int = Query(LIMITE_SINCRONIZACION, gt=0, le=LIMITE_SINCRONIZACION_MAXIMO),
+    continuar: Optional[str] = Query(None, description="Valor `continuar` de la página anterior"),
+    db: Session = Depends(get_db_lectura),
+    negociacion: Negociacion = Depends(),
+):
+    """
+    Cambios desde el token `since` de una sincronización anterior: por tabla,
+    las filas creadas o modificadas (`cambios`) y los ids eliminados
+    (`eliminados`), junto con el `token` para la siguiente llamada. Sin `since`
+    se descargan todas las filas. `tablas` limita las tablas (separadas por comas).
+
+    Cada respuesta trae a lo sumo `limite` filas. Si quedan más, `continuar`
+    trae el valor para pedir la siguiente página (con los mismos since, tablas
+    y token); el `token` se guarda solo cuando `continuar` llega en null.
+    """
+    if continuar:
+        since, token, seleccion, indice, fase, despues = _decodificar_continuacion(continuar)
+    else:
+        seleccion = list(TABLAS_SINCRONIZADAS)
+        if tablas:
+            seleccion = [tabla.strip() for tabla in tablas.split(",") if tabla.strip()]
+            invalidas = set(seleccion) - set(TABLAS_SINCRONIZADAS)
+            if invalidas:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Tablas no válidas: {', '.join(sorted(invalidas))}. Use {', '.join(TABLAS_SINCRONIZADAS)}.",
+                )
+        # El token se lee antes que las filas: lo escrito después llega en la siguiente sincronización
+        token = version_actual(db)
+        indice, fase, despues = 0, CAMBIOS, None
+    if since is not None and since > token:
+        raise HTTPException(status_code=410, detail="Token de sincronización desconocido: sincronice de nuevo sin since.")
+
+    # Recorre tabla por tabla los cambios y luego los eliminados, cada uno en
+    # orden de (version, id), hasta llenar la página
+    respuesta = {"token": token, "continuar": None}
+    restantes = limite
+    fases = [CAMBIOS] if since is None else [CAMBIOS, ELIMINADOS]
+    for posicion in range(indice, len(seleccion)):
+        tabla = seleccion[posicion]
+        respuesta[tabla] = {CAMBIOS: [], ELIMINADOS: []}
+        for actual in fases[fases.index(fase) if posicion == indice else 0:]:
+            if actual == CAMBIOS:
+                filas = cambios_desde(db, tabla, since, token, despues, restantes + 1)
+                claves = [(fila["version"], fila["id"]) for fila in filas]
+            else:
+                filas = eliminados_desde(db, tabla, since, token, despues, restantes + 1)
+                claves = [(version, registro_id) for registro_id, version in filas]
+            despues = None
+            if len(filas) > restantes:
+                # Página llena: continúa después de la última fila entregada
+                filas, claves = filas[:restantes], claves[:restantes]
+                ultima = claves[-1] if claves else (None, None)
+                respuesta["continuar"] = codificar_cursor([since, token, seleccion, posicion, actual, *ultima])
+            if actual == CAMBIOS:
+                # La versión solo se usa para el token de continuación
+                respuesta[tabla][CAMBIOS] = [{k: v for k, v in fila.items() if k != "version"} for fila in filas]
+            else:
+                respuesta[tabla][ELIMINADOS] = [registro_id for registro_id, _ in filas]
+            restantes -= len(filas)
+            if respuesta["continuar"]:
+                return negociacion.responder(respuesta)
+    return negociacion.responder(respuesta)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+from app.data.database import get_db
+from app.data.trabajos import COMPLETADO, PENDIENTE, ejecutor_trabajos
+from app.domain.models.trabajo import Trabajo as TrabajoModelo
+from app.domain.schemas.trabajo_schemas import Trabajo, TrabajoAceptado
+from app.presentation.metricas import RutaMedida
+
+router = APIRouter(route_class=RutaMedida)
+
+def aceptar_trabajo(trabajo_id: str, response: Response):
+    """
+    Respuesta 202 de los endpoints que encolan un trabajo: su id y la URL de
+    consulta en el encabezado Location.
+    """
+    response.headers["Location"] = f"/jobs/{trabajo_id}"
+    return {"trabajo_id": trabajo_id, "estado": PENDIENTE}
+
+@router.get("/jobs/{trabajo_id}", response_model=Trabajo, tags=["Trabajos"])
+def obtener_trabajo(trabajo_id: str, db: Session = Depends(get_db)):
+    """
+    Estado de un trabajo en segundo plano: progreso (porcentaje del archivo
+    o de las filas procesadas), conteos y errores por fila.
+    """
+    # Se consulta la base principal: una réplica podría mostrar un progreso atrasado
+    trabajo = db.get(TrabajoModelo, trabajo_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    # Los trabajos con archivo avanzan por bytes leídos; los demás, por filas
+    filas_totales = trabajo.parametros.get("filas_totales")
+    if trabajo.estado == COMPLETADO:
+        progreso = 100.0
+    elif trabajo.bytes_totales:
+        progreso = 100.0 * trabajo.bytes_procesados / trabajo.bytes_totales
+    elif filas_totales:
+        progreso = min(100.0, 100.0 * trabajo.filas_procesadas / filas_totales)
+    else:
+        progreso = 0.0
+    return Trabajo.model_validate({
+        **{columna.key: getattr(trabajo, columna.key) for columna in TrabajoModelo.__table__.columns},
+        "progreso": round(progreso, 1),
+    })
+
+@router.post("/jobs/{trabajo_id}/reintentar", status_code=202, response_model=TrabajoAceptado, tags=["Trabajos"])
+def reintentar_trabajo(trabajo_id: str, response: Response, db: Session = Depends(get_db)):
+    """
+    Vuelve a encolar un trabajo fallido; continúa desde su última fila
+    confirmada, con los conteos y errores que ya tenía.
+    """
+    if not db.get(TrabajoModelo, trabajo_id):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    if not ejecutor_trabajos.reintentar(db, trabajo_id):
+        raise HTTPException(status_code=409, detail="Solo se pueden reintentar trabajos fallidos que conservan su archivo.")
+    return aceptar_trabajo(trabajo_id, response)
@@ -1,210 +1,643 @@
 import csv
+import uuid
+import orjson
+from enum import Enum
 from io import StringIO
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.domain.models.trayecto import Trayecto as TrayectoModelo
-from app.domain.schemas.trayecto_schemas import TrayectoCrear, Trayecto, TrayectoActualizar
-from app.data.database import get_db
-from typing import List
-from sqlalchemy.orm import joinedload
-from sqlalchemy import and_, or_
+from app.domain.models.ruta import Ruta as RutaModelo
+from app.domain.models.conductor import Conductor as ConductorModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+from app.domain.schemas.asignacion_schemas import ResultadoAsignacion, SolicitudAsignacion
+from app.domain.schemas.trayecto_schemas import TrayectoCrear, Trayecto, TrayectoActualizar, TrayectoActualizarLote
+from app.data.database import get_db, get_db_async, get_db_lectura, SessionLectura
+from app.data.maestros import obtener_por_ids, obtener_por_ids_async
+from app.data.cambios import notificar_cambio
+from app.data.sincronizacion import registrar_eliminacion
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from app.data.ingesta import ingerir_csv, TAMANO_LOTE
+from app.data.trabajos import ejecutor_trabajos
+from app.domain.schemas.trabajo_schemas import TrabajoAceptado
+from app.presentation.api_trabajos import aceptar_trabajo
+from app.presentation.negociacion import Negociacion
+from app.presentation.paginacion import Paginacion, paginar
+from typing import List, Optional
+from app.data.indice_disponibilidad import indice_disponibilidad, CONDUCTOR
+from app.data.indice_horarios import indice_horarios
+from app.data import asignacion, resumen_operaciones
+from app.data.archivo import ARCHIVO_TAMANO_LOTE, archivar_trayectos, contar_archivables, fecha_corte
+from app.domain.models.archivo_trayectos import trayectos_historial
+from app.data.analitica_columnar import instantanea_trayectos
 
-router = APIRouter()
+router = APIRouter(route_class=RutaMedida)
 
-def verificar_disponibilidad(db: Session, fecha, hora_salida, hora_llegada, conductor_id=None, vehiculo_id=None, trayecto_id=None):
+# Tablas que componen una respuesta de trayecto, para el cálculo del ETag
+TABLAS_TRAYECTO = ("trayectos", "rutas", "conductores", "vehiculos")
+
+def _mensaje_conflicto(tipo, trayecto_id, fila):
+    recurso = "El conductor" if tipo == CONDUCTOR else "El vehículo"
+    if trayecto_id:
+        return f"{recurso} ya está asignado a otro trayecto en ese horario (ID: {trayecto_id})"
+    return f"{recurso} ya está asignado al trayecto de la fila {fila} en ese horario"
+
+def validar_lote_trayectos(db: Session, trayectos, trayecto_ids=None, numeros=None):
     """
-    Verifica si un conductor o vehículo está disponible en el horario especificado
+    Verifica la disponibilidad de todo un lote de trayectos (como diccionarios)
+    en una sola pasada, incluyendo los traslapes entre trayectos del mismo lote.
+    `numeros` permite reportar las filas con su número en el archivo de origen.
+    Retorna {posicion: [mensajes]} solo para las filas con conflicto.
     """
-    query = db.query(TrayectoModelo).filter(
-        TrayectoModelo.fecha == fecha,
-        or_(
-            and_(
-                TrayectoModelo.hora_salida <= hora_llegada,
-                TrayectoModelo.hora_llegada >= hora_salida
-            )
-        )
+    indice_disponibilidad.asegurar_cargado(db)
+    trayecto_ids = trayecto_ids or [None] * len(trayectos)
+    numeros = numeros or list(range(len(trayectos)))
+    conflictos = indice_disponibilidad.conflictos_lote([
+        (t["fecha"], t["hora_salida"], t["hora_llegada"], t.get("conductor_id"), t.get("vehiculo_id"), trayecto_id)
+        for t, trayecto_id in zip(trayectos, trayecto_ids)
+    ])
+    return {
+        posicion: [
+            _mensaje_conflicto(tipo, trayecto_id, None if fila is None else numeros[fila])
+            for tipo, trayecto_id, fila in lista
+        ]
+        for posicion, lista in conflictos.items()
+    }
+
+# Campos que determinan la ocupación de un conductor o vehículo
+CAMPOS_HORARIO = ("fecha", "hora_salida", "hora_llegada", "conductor_id", "vehiculo_id")
+
+def validar_cambios_trayectos(db: Session, anteriores, nuevos):
+    """
+    Como validar_lote_trayectos para una edición: solo valida los trayectos
+    cuyo horario, conductor o vehículo cambia, de modo que un traslape previo
+    no impide editar, por ejemplo, las observaciones. Los trayectos sin cambios
+    de horario siguen en el índice y cuentan como ocupación de los demás.
+    Retorna {posicion: [mensajes]} con las posiciones de `nuevos`.
+    """
+    posiciones = [
+        posicion for posicion, (anterior, nuevo) in enumerate(zip(anteriores, nuevos))
+        if any(anterior[campo] != nuevo[campo] for campo in CAMPOS_HORARIO)
+    ]
+    if not posiciones:
+        return {}
+    conflictos = validar_lote_trayectos(
+        db, [nuevos[posicion] for posicion in posiciones], trayecto_ids=[nuevos[posicion]["id"] for posicion in posiciones]
+    )
+    return {posiciones[posicion]: errores for posicion, errores in conflictos.items()}
+
+# Columnas de datos del trayecto; `version` la asigna la base de datos en cada escritura
+COLUMNAS_TRAYECTO = [columna for columna in TrayectoModelo.__table__.columns if columna.key != "version"]
+
+# Las mismas columnas en el orden de los campos de la respuesta, para los listados
+COLUMNAS_RESPUESTA = [TrayectoModelo.__table__.c[campo] for campo in Trayecto.model_fields if campo in TrayectoModelo.__table__.c]
+
+def _columnas(db_trayecto):
+    return {columna.key: getattr(db_trayecto, columna.key) for columna in COLUMNAS_TRAYECTO}
+
+def _datos_indice(trayecto):
+    """
+    Extrae los campos que guarda el índice de disponibilidad de un trayecto
+    (como diccionario de columnas)
+    """
+    return (
+        trayecto["id"],
+        trayecto["fecha"],
+        trayecto["hora_salida"],
+        trayecto["hora_llegada"],
+        trayecto["conductor_id"],
+        trayecto["vehiculo_id"],
     )
-    
-    if conductor_id:
-        query = query.filter(TrayectoModelo.conductor_id == conductor_id)
-    
-    if vehiculo_id:
-        query = query.filter(TrayectoModelo.vehiculo_id == vehiculo_id)
-    
-    if trayecto_id:
-        query = query.filter(TrayectoModelo.id != trayecto_id)
-    
-    conflicto = query.first()
-    
-    if conflicto:
-        if conductor_id and conflicto.conductor_id == conductor_id:
-            raise HTTPException(
-                status_code=400,
-                detail=f"El conductor ya está asignado a otro trayecto en ese horario (ID: {conflicto.id})"
-            )
-        if vehiculo_id and conflicto.vehiculo_id == vehiculo_id:
-            raise HTTPException(
-                status_code=400,
-                detail=f"El vehículo ya está asignado a otro trayecto en ese horario (ID: {conflicto.id})"
-            )
 
 @router.post("/trayectos/", response_model=List[Trayecto], tags=["Trayectos"])
 def crear_trayectos(trayectos: List[TrayectoCrear], db: Session = Depends(get_db)): 
-    db_trayectos = []
-    for trayecto in trayectos:
-        # Verificar disponibilidad antes de crear
-        if trayecto.conductor_id or trayecto.vehiculo_id:
-            verificar_disponibilidad(
-                db,
-                trayecto.fecha,
-                trayecto.hora_salida,
-                trayecto.hora_llegada,
-                trayecto.conductor_id,
-                trayecto.vehiculo_id
+    # Con el índice bloqueado, nadie más en el proceso escribe entre la
+    # validación y la indexación; entre procesos lo impide la base de datos
+    with indice_disponibilidad.bloqueo():
+        # Verificar disponibilidad de todo el lote antes de crear
+        conflictos = validar_lote_trayectos(db, [trayecto.model_dump() for trayecto in trayectos])
+        if conflictos:
+            raise HTTPException(
+                status_code=400,
+                detail=[{"fila": posicion, "errores": errores} for posicion, errores in sorted(conflictos.items())]
             )
-        
-        db_Trayecto = TrayectoModelo(**trayecto.model_dump())
-        db.add(db_Trayecto)
-        db_trayectos.append(db_Trayecto)
-    try:    
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Error: Trayecto duplicado.")        
+
+        db_trayectos = []
+        for trayecto in trayectos:
+            db_Trayecto = TrayectoModelo(**trayecto.model_dump())
+            db.add(db_Trayecto)
+            db_trayectos.append(db_Trayecto)
+        try:    
+            db.flush()
+            nuevos = [_columnas(db_trayecto) for db_trayecto in db_trayectos]
+            resumen_operaciones.aplicar_trayectos(db, nuevos)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e.orig))
+        _indexar(nuevos)
+    notificar_cambio("trayectos", "creado", [nuevo["id"] for nuevo in nuevos])
     return db_trayectos
 
-@router.post("/trayectos/bulk", tags=["Trayectos"])
-async def crear_trayectos_bulk(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    decoded_contents = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded_contents), delimiter=';')
+@router.post("/trayectos/asignar", response_model=ResultadoAsignacion, tags=["Trayectos"])
+def asignar_trayectos(solicitud: SolicitudAsignacion, db: Session = Depends(get_db)):
+    """
+    Asigna conductores activos y vehículos operativos con capacidad suficiente
+    a los trayectos del rango que no los tienen, sin traslapes, con un barrido
+    por día sobre el índice de disponibilidad. Con `simular` solo retorna el plan.
+    """
+    if solicitud.fecha_desde > solicitud.fecha_hasta:
+        raise HTTPException(status_code=400, detail="fecha_desde debe ser anterior o igual a fecha_hasta.")
+    indice_disponibilidad.asegurar_cargado(db)
+    anteriores, nuevos, sin_asignar = asignacion.planificar(
+        db,
+        indice_disponibilidad,
+        solicitud.fecha_desde,
+        solicitud.fecha_hasta,
+        solicitud.asignar_conductores,
+        solicitud.asignar_vehiculos,
+    )
 
-    db_trayectos = []
-    errores = []
+    if nuevos and not solicitud.simular:
+        with indice_disponibilidad.bloqueo():
+            # Revalidar contra lo que otras solicitudes del proceso escribieron
+            # mientras se planificaba; con el índice bloqueado no se intercalan
+            # más escrituras hasta indexar. Las de otros procesos las rechaza el
+            # trigger de traslapes de la base de datos (400)
+            conflictos = validar_lote_trayectos(db, nuevos, trayecto_ids=[t["id"] for t in nuevos])
+            if conflictos:
+                sin_asignar += [(nuevos[posicion]["id"], "Conflicto con una escritura concurrente") for posicion in sorted(conflictos)]
+                anteriores = [t for posicion, t in enumerate(anteriores) if posicion not in conflictos]
+                nuevos = [t for posicion, t in enumerate(nuevos) if posicion not in conflictos]
+            try:
+                db.execute(update(TrayectoModelo), [
+                    {"id": t["id"], "conductor_id": t["conductor_id"], "vehiculo_id": t["vehiculo_id"]} for t in nuevos
+                ])
+                resumen_operaciones.aplicar_cambios(db, anteriores, nuevos)
+                db.commit()
+            except IntegrityError as e:
+                db.rollback()
+                raise HTTPException(status_code=400, detail=str(e.orig))
+            _indexar(nuevos)
+        instantanea_trayectos.invalidar()
+        notificar_cambio("trayectos", "actualizado", [t["id"] for t in nuevos])
 
-    for row in csv_reader:
-        try:
-            # Verificar disponibilidad antes de crear
-            verificar_disponibilidad(
-                db,
-                row['fecha'],
-                row['hora_salida'],
-                row['hora_llegada'],
-                row.get('conductor_id'),
-                row.get('vehiculo_id')
-            )
-            db_trayecto = TrayectoModelo(
-                # Asigna los campos necesarios
-                fecha=row['fecha'],
-                hora_salida=row['hora_salida'],
-                hora_llegada=row['hora_llegada'],
-                conductor_id=row.get('conductor_id'),
-                vehiculo_id=row.get('vehiculo_id'),
-                ruta_id=row['ruta_id'],
-            )
-            db.add(db_trayecto)
-            db_trayectos.append(db_trayecto)
-        except Exception as e:
-            errores.append(f"Error al procesar el trayecto: {str(e)}")
+    return {
+        "asignados": len(nuevos),
+        "simulado": solicitud.simular,
+        "asignaciones": [
+            {"trayecto_id": t["id"], "conductor_id": t["conductor_id"], "vehiculo_id": t["vehiculo_id"]} for t in nuevos
+        ],
+        "sin_asignar": [{"trayecto_id": trayecto_id, "motivo": motivo} for trayecto_id, motivo in sin_asignar],
+    }
+
+def _convertir_trayecto(row):
+    trayecto = TrayectoCrear(**{k: v for k, v in row.items() if v not in ("", None)})
+    return {"id": str(uuid.uuid4()), **trayecto.model_dump()}
+
+def _indexar(trayectos):
+    """
+    Actualiza los índices en memoria (disponibilidad y horarios) con los
+    trayectos recién confirmados, dados como diccionarios de columnas.
+    """
+    for t in trayectos:
+        indice_disponibilidad.agregar(*_datos_indice(t))
+        indice_horarios.agregar(t["id"], t["fecha"], t["hora_salida"], t["hora_llegada"], t["ruta_id"])
+
+def _indexar_trayectos(trayectos):
+    _indexar(trayectos)
+    notificar_cambio("trayectos", "creado", [t["id"] for t in trayectos])
+
+def _cargar_trayectos(db: Session, archivo, parametros, **opciones):
+    # Cada lote se valida en una sola pasada y se confirma por separado. El
+    # índice se bloquea solo para validar y reservar los horarios de las filas
+    # aceptadas, no durante la escritura: las demás solicitudes del proceso ven
+    # la reserva, y las carreras con otros procesos las rechaza el trigger de
+    # traslapes (la fila se reporta como inválida y se libera su reserva)
+    reservados = set()
+
+    def validar(db, trayectos, numeros):
+        with indice_disponibilidad.bloqueo():
+            conflictos = validar_lote_trayectos(db, trayectos, numeros=numeros)
+            for posicion, trayecto in enumerate(trayectos):
+                if posicion not in conflictos:
+                    indice_disponibilidad.agregar(*_datos_indice(trayecto))
+                    reservados.add(trayecto["id"])
+        return conflictos
+
+    def liberar(trayecto):
+        reservados.discard(trayecto["id"])
+        indice_disponibilidad.eliminar(trayecto["id"])
+
+    def al_confirmar(trayectos):
+        reservados.difference_update(t["id"] for t in trayectos)
+        _indexar_trayectos(trayectos)
+
+    try:
+        return ingerir_csv(
+            db,
+            archivo,
+            TrayectoModelo.__table__,
+            _convertir_trayecto,
+            parametros["tamano_lote"],
+            parametros["desde_fila"],
+            validar=validar,
+            al_insertar=resumen_operaciones.aplicar_trayectos,
+            al_confirmar=al_confirmar,
+            al_rechazar=liberar,
+            **opciones,
+        )
+    finally:
+        # Un lote que falló sin llegar a confirmarse no ocupa horarios
+        for trayecto_id in reservados:
+            indice_disponibilidad.eliminar(trayecto_id)
+
+ejecutor_trabajos.registrar("carga_trayectos", _cargar_trayectos)
+
+@router.post("/trayectos/bulk", status_code=202, response_model=TrabajoAceptado, tags=["Trayectos"])
+def crear_trayectos_bulk(
+    response: Response,
+    file: UploadFile = File(...),
+    tamano_lote: int = Query(TAMANO_LOTE, gt=0),
+    desde_fila: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Encola la carga del CSV y responde de inmediato con el id del trabajo;
+    el avance se consulta en GET /jobs/{id}.
+    """
+    trabajo_id = ejecutor_trabajos.encolar(db, "carga_trayectos", file, {"tamano_lote": tamano_lote, "desde_fila": desde_fila})
+    return aceptar_trabajo(trabajo_id, response)
+
+def _archivar_trayectos(db: Session, archivo, parametros, al_progresar, **opciones):
+    desde = parametros["desde_fila"]
+
+    def resultado(movidos):
+        return {
+            "filas_procesadas": movidos,
+            "insertados": 0,
+            "actualizados": 0,
+            "omitidos": 0,
+            "total_errores": 0,
+            "ultima_fila_confirmada": desde + movidos,
+            "errores": [],
+        }
+
+    def al_confirmar(ids):
+        # Los trayectos archivados salen de los índices en memoria; la
+        # instantánea se recarga desde la vista que incluye el archivo
+        for trayecto_id in ids:
+            indice_disponibilidad.eliminar(trayecto_id)
+            indice_horarios.eliminar(trayecto_id)
+        instantanea_trayectos.invalidar()
+        notificar_cambio("trayectos", "archivado", filas=len(ids), corte=parametros["corte"])
 
+    movidos = archivar_trayectos(
+        db,
+        date.fromisoformat(parametros["corte"]),
+        parametros["tamano_lote"],
+        al_confirmar=al_confirmar,
+        al_progresar=lambda movidos: al_progresar(resultado(movidos)),
+    )
+    return resultado(movidos)
+
+ejecutor_trabajos.registrar("archivo_trayectos", _archivar_trayectos)
+
+@router.post("/trayectos/archivar", status_code=202, response_model=TrabajoAceptado, tags=["Trayectos"])
+def archivar(
+    response: Response,
+    horizonte_dias: Optional[int] = Query(None, gt=0),
+    tamano_lote: int = Query(ARCHIVO_TAMANO_LOTE, gt=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Encola el archivado de los trayectos con más de `horizonte_dias` días de
+    antigüedad (ARCHIVO_HORIZONTE_DIAS por defecto) en tablas mensuales. Los
+    trayectos archivados dejan los listados y la sincronización, pero siguen
+    en la analítica y en /trayectos/export?incluir_archivados=true.
+    """
+    corte = fecha_corte(horizonte_dias)
+    parametros = {"corte": corte.isoformat(), "tamano_lote": tamano_lote, "filas_totales": contar_archivables(db, corte)}
+    trabajo_id = ejecutor_trabajos.encolar(db, "archivo_trayectos", None, parametros)
+    return aceptar_trabajo(trabajo_id, response)
+
+def _con_relaciones(db: Session, trayectos, armar=None):
+    """
+    Construye las respuestas de los trayectos (diccionarios de columnas)
+    tomando la ruta, el conductor y el vehículo de la caché de datos maestros
+    en lugar de cargarlos con joins.
+    """
+    rutas = obtener_por_ids(db, "rutas", [t["ruta_id"] for t in trayectos])
+    conductores = obtener_por_ids(db, "conductores", [t["conductor_id"] for t in trayectos])
+    vehiculos = obtener_por_ids(db, "vehiculos", [t["vehiculo_id"] for t in trayectos])
+    return (armar or _armar_trayectos)(trayectos, rutas, conductores, vehiculos)
+
+def _normalizar(db: Session, trayectos):
+    """
+    Representación normalizada: cada ruta, conductor y vehículo aparece una
+    sola vez, indexado por id, y los trayectos solo llevan sus ids.
+    """
+    return {
+        "trayectos": trayectos,
+        "rutas": obtener_por_ids(db, "rutas", [t["ruta_id"] for t in trayectos]),
+        "conductores": obtener_por_ids(db, "conductores", [t["conductor_id"] for t in trayectos]),
+        "vehiculos": obtener_por_ids(db, "vehiculos", [t["vehiculo_id"] for t in trayectos]),
+    }
+
+def _armar_trayectos(trayectos, rutas, conductores, vehiculos):
+    return [
+        Trayecto.model_validate({
+            **t,
+            "ruta": rutas.get(t["ruta_id"]),
+            "conductor": conductores.get(t["conductor_id"]),
+            "vehiculo": vehiculos.get(t["vehiculo_id"]),
+        })
+        for t in trayectos
+    ]
+
+def _armar_dicts(trayectos, rutas, conductores, vehiculos):
+    # Como _armar_trayectos, sin validar cada fila: cada ruta, conductor y
+    # vehículo se convierte a dict una sola vez y se comparte entre sus trayectos
+    rutas, conductores, vehiculos = (
+        {clave: esquema.model_dump() for clave, esquema in maestros.items()}
+        for maestros in (rutas, conductores, vehiculos)
+    )
+    return [
+        {
+            **t,
+            "ruta": rutas.get(t["ruta_id"]),
+            "conductor": conductores.get(t["conductor_id"]),
+            "vehiculo": vehiculos.get(t["vehiculo_id"]),
+        }
+        for t in trayectos
+    ]
+
+class FiltrosTrayecto:
+    """
+    Filtros de los listados de trayectos, cubiertos por los índices compuestos de la tabla.
+    """
+
+    def __init__(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        ruta_id: Optional[str] = None,
+        conductor_id: Optional[str] = None,
+        vehiculo_id: Optional[str] = None,
+    ):
+        self.fecha_desde = fecha_desde
+        self.fecha_hasta = fecha_hasta
+        self.ruta_id = ruta_id
+        self.conductor_id = conductor_id
+        self.vehiculo_id = vehiculo_id
+
+    def aplicar(self, query, t=TrayectoModelo):
+        # `t` puede ser el modelo o las columnas de la vista trayectos_historial
+        if self.fecha_desde:
+            query = query.filter(t.fecha >= self.fecha_desde)
+        if self.fecha_hasta:
+            query = query.filter(t.fecha <= self.fecha_hasta)
+        if self.ruta_id:
+            query = query.filter(t.ruta_id == self.ruta_id)
+        if self.conductor_id:
+            query = query.filter(t.conductor_id == self.conductor_id)
+        if self.vehiculo_id:
+            query = query.filter(t.vehiculo_id == self.vehiculo_id)
+        return query
+
+# Orden estable de los listados: fecha, hora de salida y id como desempate
+ORDEN_TRAYECTOS = [TrayectoModelo.fecha, TrayectoModelo.hora_salida, TrayectoModelo.id]
+
+@router.get("/trayectos/", response_model=List[Trayecto], tags=["Trayectos"], dependencies=[Depends(etag_condicional(*TABLAS_TRAYECTO))])
+def leer_trayectos(
+    response: Response,
+    filtros: FiltrosTrayecto = Depends(),
+    paginacion: Paginacion = Depends(),
+    negociacion: Negociacion = Depends(),
+    db: Session = Depends(get_db_lectura),
+):
+    # Consulta de columnas: filas livianas en lugar de objetos ORM en el identity map
+    trayectos = paginar(filtros.aplicar(db.query(*COLUMNAS_RESPUESTA)), ORDEN_TRAYECTOS, paginacion, response)
+    trayectos = [fila._asdict() for fila in trayectos]
+    if negociacion.normalizado:
+        return negociacion.responder(_normalizar(db, trayectos))
+    return negociacion.responder(_con_relaciones(db, trayectos, _armar_dicts), confiable=True)
+
+class FormatoExportacion(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+# Filas que se leen de la base de datos por cada tanda del cursor
+FILAS_POR_TANDA = 1000
+
+def _columnas_exportacion(t):
+    # Columnas de la exportación, con la ruta, el conductor y el vehículo
+    # aplanados. Las del trayecto se etiquetan para que las claves de las filas
+    # sean str también al leer la vista (orjson no acepta subclases de str)
+    def columna(nombre):
+        return getattr(t, nombre).label(nombre)
+
+    return [
+        columna("id"),
+        columna("fecha"),
+        columna("hora_salida"),
+        columna("hora_llegada"),
+        columna("cantidad_pasajeros"),
+        columna("kilometraje"),
+        columna("observaciones"),
+        columna("ruta_id"),
+        RutaModelo.codigo.label("ruta_codigo"),
+        RutaModelo.nombre.label("ruta_nombre"),
+        RutaModelo.origen.label("ruta_origen"),
+        RutaModelo.destino.label("ruta_destino"),
+        columna("conductor_id"),
+        ConductorModelo.nombre.label("conductor_nombre"),
+        ConductorModelo.cedula.label("conductor_cedula"),
+        columna("vehiculo_id"),
+        VehiculoModelo.placa.label("vehiculo_placa"),
+        VehiculoModelo.lateral.label("vehiculo_lateral"),
+        VehiculoModelo.capacidad_pasajeros.label("vehiculo_capacidad_pasajeros"),
+    ]
+
+COLUMNAS_EXPORTACION = _columnas_exportacion(TrayectoModelo)
+
+def _filas_exportacion(filtros: FiltrosTrayecto, incluir_archivados: bool = False):
+    """
+    Recorre los trayectos filtrados con un cursor del lado del servidor.
+    Usa su propia sesión porque se consume mientras se envía la respuesta.
+    Con `incluir_archivados` lee la vista que une la tabla viva y el archivo.
+    """
+    tabla = trayectos_historial if incluir_archivados else TrayectoModelo.__table__
+    t = tabla.c
+    db = SessionLectura()
     try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Error: Trayecto duplicado.")
-
-    return {"trayectos_insertados": len(db_trayectos), "errores": errores}
-
-@router.get("/trayectos/", response_model=List[Trayecto], tags=["Trayectos"])
-def leer_trayectos(db: Session = Depends(get_db)):
-    trayectos = db.query(TrayectoModelo).options(
-        joinedload(TrayectoModelo.ruta),
-        joinedload(TrayectoModelo.conductor),
-        joinedload(TrayectoModelo.vehiculo)
-    ).all()
-    return trayectos
+        consulta = filtros.aplicar(
+            select(*_columnas_exportacion(t))
+            .select_from(tabla)
+            .outerjoin(RutaModelo, t.ruta_id == RutaModelo.id)
+            .outerjoin(ConductorModelo, t.conductor_id == ConductorModelo.id)
+            .outerjoin(VehiculoModelo, t.vehiculo_id == VehiculoModelo.id),
+            t,
+        ).order_by(t.fecha, t.hora_salida, t.id)
+        resultado = db.execute(consulta.execution_options(yield_per=FILAS_POR_TANDA))
+        for tanda in resultado.partitions():
+            yield tanda
+    finally:
+        db.close()
+
+def _exportar_ndjson(filtros: FiltrosTrayecto, incluir_archivados: bool):
+    for tanda in _filas_exportacion(filtros, incluir_archivados):
+        yield b"".join(orjson.dumps(fila._asdict()) + b"\n" for fila in tanda)
+
+def _exportar_csv(filtros: FiltrosTrayecto, incluir_archivados: bool):
+    buffer = StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+    escritor.writerow([columna.key for columna in COLUMNAS_EXPORTACION])
+    for tanda in _filas_exportacion(filtros, incluir_archivados):
+        escritor.writerows(tanda)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+@router.get("/trayectos/export", tags=["Trayectos"])
+def exportar_trayectos(
+    format: FormatoExportacion = FormatoExportacion.ndjson,
+    filtros: FiltrosTrayecto = Depends(),
+    incluir_archivados: bool = False,
+):
+    if format == FormatoExportacion.csv:
+        return StreamingResponse(
+            _exportar_csv(filtros, incluir_archivados),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="trayectos.csv"'},
+        )
+    return StreamingResponse(_exportar_ndjson(filtros, incluir_archivados), media_type="application/x-ndjson")
 
 @router.put("/trayecto/{trayecto_id}", response_model=Trayecto, tags=["Trayectos"])
-async def modificar_trayecto(trayecto_id: str, trayecto: TrayectoCrear, db: Session = Depends(get_db)):
-    db_trayecto = db.query(TrayectoModelo).filter(TrayectoModelo.id == trayecto_id).first()
+def modificar_trayecto(trayecto_id: str, trayecto: TrayectoCrear, db: Session = Depends(get_db)):
+    db_trayecto = db.get(TrayectoModelo, trayecto_id)
     if not db_trayecto:
         raise HTTPException(status_code=404, detail="Trayecto no encontrado.")
     
-    # Verificar disponibilidad antes de actualizar
-    if trayecto.conductor_id or trayecto.vehiculo_id:
-        verificar_disponibilidad(
-            db,
-            trayecto.fecha,
-            trayecto.hora_salida,
-            trayecto.hora_llegada,
-            trayecto.conductor_id,
-            trayecto.vehiculo_id,
-            trayecto_id  # Excluir el trayecto actual de la verificación
-        )
-    
-    # Actualizar los campos del trayecto
-    for key, value in trayecto.model_dump().items():
-        setattr(db_trayecto, key, value)
-    
-    try:
-        db.commit()
-        db.refresh(db_trayecto)
-        
-        # Cargar las relaciones
-        db_trayecto = db.query(TrayectoModelo).options(
-            joinedload(TrayectoModelo.ruta),
-            joinedload(TrayectoModelo.conductor),
-            joinedload(TrayectoModelo.vehiculo)
-        ).filter(TrayectoModelo.id == trayecto_id).first()
-        
-        return db_trayecto
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+    return _guardar_cambios(db, db_trayecto, trayecto.model_dump())
 
 @router.patch("/trayecto/{trayecto_id}", response_model=Trayecto, tags=["Trayectos"])
-async def modificar_trayecto_parcial(trayecto_id: str, trayecto: TrayectoActualizar, db: Session = Depends(get_db)):
-    db_trayecto = db.query(TrayectoModelo).filter(TrayectoModelo.id == trayecto_id).first()
+def modificar_trayecto_parcial(trayecto_id: str, trayecto: TrayectoActualizar, db: Session = Depends(get_db)):
+    db_trayecto = db.get(TrayectoModelo, trayecto_id)
     if not db_trayecto:
         raise HTTPException(status_code=404, detail="Trayecto no encontrado.")
     
-    for key, value in trayecto.model_dump(exclude_unset=True).items():
-        if value is not None:
+    cambios = {key: value for key, value in trayecto.model_dump(exclude_unset=True).items() if value is not None}
+    return _guardar_cambios(db, db_trayecto, cambios)
+
+def _guardar_cambios(db: Session, db_trayecto, cambios):
+    """
+    Valida la disponibilidad, aplica los cambios y confirma con un solo UPDATE.
+    La respuesta se arma con los valores ya conocidos y las relaciones de la
+    caché de datos maestros, sin volver a consultar el trayecto después del commit.
+    """
+    anterior = _columnas(db_trayecto)
+    nuevo = {**anterior, **cambios}
+    with indice_disponibilidad.bloqueo():
+        # La misma validación que la edición por lotes, con un lote de un trayecto
+        conflictos = validar_cambios_trayectos(db, [anterior], [nuevo])
+        if conflictos:
+            raise HTTPException(status_code=400, detail=conflictos[0][0])
+        for key, value in cambios.items():
             setattr(db_trayecto, key, value)
-    
-    try:
-        db.commit()
-        db.refresh(db_trayecto)
-        
-        # Cargar las relaciones
-        db_trayecto = db.query(TrayectoModelo).options(
-            joinedload(TrayectoModelo.ruta),
-            joinedload(TrayectoModelo.conductor),
-            joinedload(TrayectoModelo.vehiculo)
-        ).filter(TrayectoModelo.id == trayecto_id).first()
-        
-        return db_trayecto
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
-
-@router.get("/trayecto/{trayecto_id}", response_model=Trayecto, tags=["Trayectos"])
-async def obtener_trayecto(trayecto_id: str, db: Session = Depends(get_db)):
-    db_trayecto = db.query(TrayectoModelo).options(
-        joinedload(TrayectoModelo.ruta),
-        joinedload(TrayectoModelo.conductor),
-        joinedload(TrayectoModelo.vehiculo)
-    ).filter(TrayectoModelo.id == trayecto_id).first()
+
+        try:
+            resumen_operaciones.aplicar_cambios(db, [anterior], [nuevo])
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e.orig))
+        _indexar([nuevo])
+    instantanea_trayectos.invalidar()
+    notificar_cambio("trayectos", "actualizado", [nuevo["id"]])
+    return _con_relaciones(db, [nuevo])[0]
+
+@router.patch("/trayectos/", response_model=List[Trayecto], tags=["Trayectos"])
+def modificar_trayectos(cambios: List[TrayectoActualizarLote], db: Session = Depends(get_db)):
+    """
+    Edición masiva (por ejemplo reasignar el vehículo de todo un día): carga los
+    trayectos con una consulta, valida la disponibilidad de todo el lote en una
+    pasada y los actualiza con un único UPDATE por lotes.
+    """
+    ids = [cambio.id for cambio in cambios]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="El lote contiene trayectos repetidos.")
+    existentes = {
+        fila.id: fila._asdict()
+        for fila in db.execute(select(*COLUMNAS_TRAYECTO).where(TrayectoModelo.id.in_(ids)))
+    }
+    faltantes = [trayecto_id for trayecto_id in ids if trayecto_id not in existentes]
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Trayectos no encontrados: {', '.join(faltantes)}")
+
+    anteriores = [existentes[trayecto_id] for trayecto_id in ids]
+    nuevos = [
+        {**anterior, **{k: v for k, v in cambio.model_dump(exclude_unset=True, exclude={"id"}).items() if v is not None}}
+        for anterior, cambio in zip(anteriores, cambios)
+    ]
+    with indice_disponibilidad.bloqueo():
+        conflictos = validar_cambios_trayectos(db, anteriores, nuevos)
+        if conflictos:
+            raise HTTPException(
+                status_code=400,
+                detail=[{"fila": posicion, "errores": errores} for posicion, errores in sorted(conflictos.items())]
+            )
+
+        # El trigger de traslapes valida cada fila al actualizarla: se liberan
+        # primero los recursos de los trayectos que cambian de horario, para
+        # que un estado intermedio (por ejemplo, a mitad de un intercambio de
+        # horarios) no choque con el estado final ya validado
+        liberar = [
+            {"id": nuevo["id"], "conductor_id": None, "vehiculo_id": None}
+            for anterior, nuevo in zip(anteriores, nuevos)
+            if any(anterior[campo] != nuevo[campo] for campo in CAMPOS_HORARIO)
+        ]
+        try:
+            if len(liberar) > 1:
+                db.execute(update(TrayectoModelo), liberar)
+            db.execute(update(TrayectoModelo), nuevos)
+            resumen_operaciones.aplicar_cambios(db, anteriores, nuevos)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e.orig))
+        _indexar(nuevos)
+    instantanea_trayectos.invalidar()
+    notificar_cambio("trayectos", "actualizado", ids)
+    return _con_relaciones(db, nuevos)
+
+@router.get("/trayecto/{trayecto_id}", response_model=Trayecto, tags=["Trayectos"], dependencies=[Depends(etag_condicional(*TABLAS_TRAYECTO))])
+async def obtener_trayecto(trayecto_id: str, db: AsyncSession = Depends(get_db_async)):
+    db_trayecto = await db.get(TrayectoModelo, trayecto_id)
     if not db_trayecto:
         raise HTTPException(status_code=404, detail="Trayecto no encontrado.")
-    return db_trayecto
+    rutas = await obtener_por_ids_async(db, "rutas", [db_trayecto.ruta_id])
+    conductores = await obtener_por_ids_async(db, "conductores", [db_trayecto.conductor_id])
+    vehiculos = await obtener_por_ids_async(db, "vehiculos", [db_trayecto.vehiculo_id])
+    return _armar_trayectos([_columnas(db_trayecto)], rutas, conductores, vehiculos)[0]
 
 @router.delete("/trayecto/{trayecto_id}", response_model=dict, tags=["Trayectos"])
-async def eliminar_trayecto(trayecto_id: str, db: Session = Depends(get_db)):
+def eliminar_trayecto(trayecto_id: str, db: Session = Depends(get_db)):
     db_trayecto = db.query(TrayectoModelo).filter(TrayectoModelo.id == trayecto_id).first()
     if not db_trayecto:
         raise HTTPException(status_code=404, detail="Trayecto no encontrado.")
+    resumen_operaciones.aplicar_trayectos(db, [_columnas(db_trayecto)], -1)
     db.delete(db_trayecto)
+    registrar_eliminacion(db, "trayectos", [trayecto_id])
     db.commit()
+    indice_disponibilidad.eliminar(trayecto_id)
+    indice_horarios.eliminar(trayecto_id)
+    instantanea_trayectos.invalidar()
+    notificar_cambio("trayectos", "eliminado", [trayecto_id])
     return {"detail": "Trayecto eliminado exitosamente."}
\ No newline at end of file
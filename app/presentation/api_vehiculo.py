@@ -1,90 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+from app.domain.schemas.carga_schemas import ResumenUpsert
 from app.domain.schemas.vehiculo_schemas import VehiculoCrear, Vehiculo, VehiculoActualizar
-from app.data.database import get_db
-from typing import List
-import csv
-from io import StringIO
+from app.data.database import get_db, get_db_async, get_db_lectura
+from app.data.maestros import columnas_respuesta, obtener_por_campo_async
+from app.data.cambios import notificar_cambio
+from app.data.sincronizacion import registrar_eliminacion
+from app.data.resumen_operaciones import aplicar_capacidades
+from app.presentation.condicional import etag_condicional
+from app.presentation.metricas import RutaMedida
+from app.data.ingesta import ingerir_csv, TAMANO_LOTE
+from app.data.trabajos import ejecutor_trabajos
+from app.domain.schemas.trabajo_schemas import TrabajoAceptado
+from app.presentation.api_trabajos import aceptar_trabajo
+from app.data.upsert import upsert, ModoConflicto
+from app.presentation.negociacion import Negociacion
+from app.presentation.paginacion import Paginacion, paginar
+from typing import List, Optional, Union
 
-router = APIRouter()
+router = APIRouter(route_class=RutaMedida)
 
-@router.post("/vehiculos/", response_model=List[Vehiculo], tags=["Vehiculo"])
-def crear_vehiculos(vehiculos: List[VehiculoCrear], db: Session = Depends(get_db)): 
+def _reaplicar_capacidades(db: Session, anteriores, nuevos):
+    # La ocupación del resumen diario depende de la capacidad de cada vehículo
+    capacidades = {vehiculo["placa"]: vehiculo["capacidad_pasajeros"] for vehiculo in nuevos}
+    aplicar_capacidades(db, {
+        vehiculo["id"]: (vehiculo["capacidad_pasajeros"], capacidades[vehiculo["placa"]])
+        for vehiculo in anteriores
+    })
+
+@router.post("/vehiculos/", response_model=Union[List[Vehiculo], ResumenUpsert], tags=["Vehiculo"])
+def crear_vehiculos(
+    vehiculos: List[VehiculoCrear],
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    if on_conflict:
+        # Una sola sentencia INSERT ... ON CONFLICT sobre el índice único
+        filas = [vehiculo.model_dump() for vehiculo in vehiculos]
+        try:
+            resumen = upsert(db, VehiculoModelo.__table__, filas, "placa", on_conflict, _reaplicar_capacidades)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Error: los datos violan una restricción de la base de datos.")
+        notificar_cambio("vehiculos", "carga", **resumen)
+        return resumen
     db_vehiculos = []
     for vehiculo in vehiculos:
         db_vehiculo = VehiculoModelo(**vehiculo.model_dump())
         db.add(db_vehiculo)
         db_vehiculos.append(db_vehiculo)
     try:    
+        db.flush()
+        ids = [db_vehiculo.id for db_vehiculo in db_vehiculos]
         db.commit()
+        notificar_cambio("vehiculos", "creado", ids)
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Error: Placa duplicada.")        
     return db_vehiculos
 
-@router.post("/vehiculos/bulk", tags=["Vehiculo"])
-async def crear_vehiculos_bulk(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    decoded_contents = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded_contents), delimiter=';')
-
-    db_vehiculos = []
-    errores = []
+def _convertir_vehiculo(row):
+    return {
+        "marca": row['marca'],
+        "placa": row['placa'],
+        "modelo": row['modelo'],
+        "lateral": row['lateral'],
+        "año_de_fabricacion": int(row['año_de_fabricacion']),
+        "capacidad_pasajeros": int(row['capacidad_pasajeros']),
+        "estado_operativo": row['estado_operativo'],
+    }
 
-    for row in csv_reader:
-        try:
-            db_vehiculo = VehiculoModelo(
-                marca=row['marca'],
-                placa=row['placa'],
-                modelo=row['modelo'],
-                lateral=row['lateral'],
-                año_de_fabricacion=int(row['año_de_fabricacion']),
-                capacidad_pasajeros=int(row['capacidad_pasajeros']),
-                estado_operativo=row['estado_operativo']
-            )
-            db.add(db_vehiculo)
-            db_vehiculos.append(db_vehiculo)
-        except Exception as e:
-            errores.append(f"Error al procesar el vehículo {row['placa']}: {str(e)}")
+def _cargar_vehiculos(db: Session, archivo, parametros, **opciones):
+    # Cada lote confirmado se notifica al momento: invalida la caché y los
+    # ETag mientras la carga sigue en curso
+    return ingerir_csv(
+        db,
+        archivo,
+        VehiculoModelo.__table__,
+        _convertir_vehiculo,
+        parametros["tamano_lote"],
+        parametros["desde_fila"],
+        clave="placa",
+        on_conflict=parametros["on_conflict"] and ModoConflicto(parametros["on_conflict"]),
+        al_actualizar=_reaplicar_capacidades,
+        al_confirmar=lambda filas: notificar_cambio("vehiculos", "carga", filas=len(filas)),
+        **opciones,
+    )
 
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Error: Placa duplicada.")
+ejecutor_trabajos.registrar("carga_vehiculos", _cargar_vehiculos)
 
-    return {"vehiculos_insertados": len(db_vehiculos), "errores": errores}
+@router.post("/vehiculos/bulk", status_code=202, response_model=TrabajoAceptado, tags=["Vehiculo"])
+def crear_vehiculos_bulk(
+    response: Response,
+    file: UploadFile = File(...),
+    tamano_lote: int = Query(TAMANO_LOTE, gt=0),
+    desde_fila: int = Query(0, ge=0),
+    on_conflict: Optional[ModoConflicto] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Encola la carga del CSV y responde de inmediato con el id del trabajo;
+    el avance se consulta en GET /jobs/{id}.
+    """
+    trabajo_id = ejecutor_trabajos.encolar(
+        db, "carga_vehiculos", file, {"tamano_lote": tamano_lote, "desde_fila": desde_fila, "on_conflict": on_conflict}
+    )
+    return aceptar_trabajo(trabajo_id, response)
 
-@router.get("/vehiculos/", response_model=List[Vehiculo], tags=["Vehiculo"])
-def leer_vehiculos(db: Session = Depends(get_db)):
-    vehiculos = db.query(VehiculoModelo).all()
-    return [Vehiculo.model_validate(vehiculo.__dict__) for vehiculo in vehiculos]
+@router.get("/vehiculos/", response_model=List[Vehiculo], tags=["Vehiculo"], dependencies=[Depends(etag_condicional("vehiculos"))])
+def leer_vehiculos(
+    response: Response,
+    estado_operativo: Optional[str] = None,
+    paginacion: Paginacion = Depends(),
+    negociacion: Negociacion = Depends(),
+    db: Session = Depends(get_db_lectura),
+):
+    query = db.query(*columnas_respuesta("vehiculos"))
+    if estado_operativo:
+        query = query.filter(VehiculoModelo.estado_operativo == estado_operativo)
+    vehiculos = paginar(query, [VehiculoModelo.id], paginacion, response)
+    return negociacion.responder([fila._asdict() for fila in vehiculos], confiable=True)
 
 @router.put("/vehiculo/{vehiculo_id}", response_model=Vehiculo, tags=["Vehiculo"])
-async def modificar_vehiculo(vehiculo_id: str, vehiculo: Vehiculo, db: Session = Depends(get_db)):
+def modificar_vehiculo(vehiculo_id: str, vehiculo: Vehiculo, db: Session = Depends(get_db)):
     db_vehiculo = db.query(VehiculoModelo).filter(VehiculoModelo.id == vehiculo_id).first()
     if not db_vehiculo:
         raise HTTPException(status_code=404, detail="Vehículo no encontrado.")
+    capacidad = db_vehiculo.capacidad_pasajeros
     for key, value in vehiculo.model_dump().items():
         setattr(db_vehiculo, key, value)
+    aplicar_capacidades(db, {vehiculo_id: (capacidad, db_vehiculo.capacidad_pasajeros)})
     db.commit()
+    notificar_cambio("vehiculos", "actualizado", [vehiculo_id])
     vehiculo_dict = {k: getattr(db_vehiculo, k) for k in Vehiculo.model_fields.keys()}
     return Vehiculo.model_validate(db_vehiculo.__dict__)
 
 @router.patch("/vehiculo/{vehiculo_id}", response_model=Vehiculo, tags=["Vehiculo"])
-async def modificar_vehiculo_parcial(vehiculo_id: str, vehiculo: VehiculoActualizar, db: Session = Depends(get_db)):
+def modificar_vehiculo_parcial(vehiculo_id: str, vehiculo: VehiculoActualizar, db: Session = Depends(get_db)):
     db_vehiculo = db.query(VehiculoModelo).filter(VehiculoModelo.id == vehiculo_id).first()
     if not db_vehiculo:
         raise HTTPException(status_code=404, detail="Vehículo no encontrado.")
     
+    capacidad = db_vehiculo.capacidad_pasajeros
     # Solo actualizar los campos que se envían en la solicitud
     for key, value in vehiculo.model_dump(exclude_unset=True).items():
         if value is not None:  # Asegúrate de que el valor no sea None
             setattr(db_vehiculo, key, value)
+    aplicar_capacidades(db, {vehiculo_id: (capacidad, db_vehiculo.capacidad_pasajeros)})
     
     db.commit()
+    notificar_cambio("vehiculos", "actualizado", [vehiculo_id])
     
     # Crear un diccionario con los valores actualizados
     vehiculo_dict = {
@@ -100,18 +169,22 @@ async def modificar_vehiculo_parcial(vehiculo_id: str, vehiculo: VehiculoActuali
     
     return Vehiculo.model_validate(vehiculo_dict)
 
-@router.get("/vehiculo/{vehiculo_placa}", response_model=Vehiculo, tags=["Vehiculo"])
-async def obtener_vehiculo(vehiculo_placa: str, db: Session = Depends(get_db)):
-    db_vehiculo = db.query(VehiculoModelo).filter(VehiculoModelo.placa == vehiculo_placa).first()
+@router.get("/vehiculo/{vehiculo_placa}", response_model=Vehiculo, tags=["Vehiculo"], dependencies=[Depends(etag_condicional("vehiculos"))])
+async def obtener_vehiculo(vehiculo_placa: str, db: AsyncSession = Depends(get_db_async)):
+    db_vehiculo = await obtener_por_campo_async(db, "vehiculos", "placa", vehiculo_placa)
     if not db_vehiculo:
         raise HTTPException(status_code=404, detail="Vehículo no encontrado.")
-    return Vehiculo.model_validate(db_vehiculo.__dict__)
+    return db_vehiculo
 
 @router.delete("/vehiculo/{vehiculo_id}", response_model=dict, tags=["Vehiculo"])
-async def eliminar_vehiculo(vehiculo_id: str, db: Session = Depends(get_db)):
+def eliminar_vehiculo(vehiculo_id: str, db: Session = Depends(get_db)):
     db_vehiculo = db.query(VehiculoModelo).filter(VehiculoModelo.id == vehiculo_id).first()
     if not db_vehiculo:
         raise HTTPException(status_code=404, detail="Vehículo no encontrado.")
+    # Sus trayectos conservan el vehiculo_id pero dejan de aportar ocupación
+    aplicar_capacidades(db, {vehiculo_id: (db_vehiculo.capacidad_pasajeros, None)})
     db.delete(db_vehiculo)
+    registrar_eliminacion(db, "vehiculos", [vehiculo_id])
     db.commit()
+    notificar_cambio("vehiculos", "eliminado", [vehiculo_id])
     return {"detail": "Vehículo eliminado exitosamente."}
\ No newline at end of file
@@ -0,0 +1,126 @@
+import hashlib
+import os
+from time import monotonic
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.data.cambios import sincronizar_tablas
+from app.data.database import Base, get_db_async
+from app.data.versiones import versiones
+from app.domain.models.archivo_trayectos import ArchivoTrayectos
+from app.domain.models.sincronizacion import Eliminacion
+
+# Segundos durante los que el estado de la base de datos leído para un ETag se
+# reutiliza mientras las versiones locales no cambien. Acota cuánto tarda en
+# notarse una escritura hecha por otro proceso; 0 consulta en cada solicitud
+ETAG_REVALIDACION_SEGUNDOS = float(os.getenv("ETAG_REVALIDACION_SEGUNDOS", "1"))
+
+def _etiquetas(if_none_match: str):
+    return [etiqueta.strip() for etiqueta in if_none_match.split(",")]
+
+def _consulta_estado(tablas):
+    """
+    Consulta de una sola fila que cambia con cualquier escritura confirmada en
+    `tablas`: por tabla, la mayor versión de sus filas y de sus tombstones
+    (resueltas con los índices que empiezan por `version`). Para trayectos
+    suma además las filas archivadas, que salen de la tabla sin tombstone.
+    """
+    columnas = []
+    for tabla in tablas:
+        columnas.append(select(func.max(Base.metadata.tables[tabla].c.version)).scalar_subquery().label(f"{tabla}_filas"))
+        columnas.append(
+            select(func.max(Eliminacion.version)).where(Eliminacion.tabla == tabla).scalar_subquery().label(f"{tabla}_eliminadas")
+        )
+        if tabla == "trayectos":
+            columnas.append(select(func.sum(ArchivoTrayectos.filas)).scalar_subquery().label(f"{tabla}_archivadas"))
+    return select(*columnas)
+
+def etag_condicional(*tablas: str):
+    """
+    Dependencia para GET condicionales. El ETag se calcula a partir de las
+    versiones guardadas en la base de datos de las tablas que componen la
+    respuesta (las mismas de /sync, válidas para todos los procesos) y de la
+    URL y el Accept de la petición. Si coincide con If-None-Match responde 304
+    sin ejecutar el endpoint; si no, lo agrega a la respuesta.
+
+    El estado leído se reutiliza sin consultar la base de datos mientras las
+    versiones locales (las que incrementa notificar_cambio) no cambien y no
+    pasen ETAG_REVALIDACION_SEGUNDOS: las escrituras de este proceso se notan
+    de inmediato y las de otros procesos, a lo sumo en ese plazo.
+    Debe declararse en `dependencies` del endpoint para que se evalúe antes de get_db.
+    """
+    consulta = _consulta_estado(tablas)
+    # Último estado leído: versiones locales de ese momento, estados y vencimiento
+    ultimo = {"locales": None, "estados": None, "vence": 0.0}
+
+    async def _estados(db: AsyncSession):
+        locales = tuple(versiones.version(tabla) for tabla in tablas)
+        if locales == ultimo["locales"] and monotonic() < ultimo["vence"]:
+            return ultimo["estados"]
+        fila = (await db.execute(consulta)).one()._asdict()
+        estados = {tabla: tuple(valor for nombre, valor in fila.items() if nombre.startswith(f"{tabla}_")) for tabla in tablas}
+        # Lo escrito por otros procesos invalida también las cachés de este,
+        # para que el cuerpo de la respuesta corresponda al ETag
+        cambiadas = sincronizar_tablas(estados)
+        # Las versiones locales se toman antes de consultar (más los incrementos
+        # propios de sincronizar_tablas): si una escritura local se confirma en
+        # medio, la siguiente solicitud no reutiliza este estado
+        locales = tuple(version + (tabla in cambiadas) for tabla, version in zip(tablas, locales))
+        ultimo.update(locales=locales, estados=estados, vence=monotonic() + ETAG_REVALIDACION_SEGUNDOS)
+        return estados
+
+    async def dependencia(request: Request, response: Response, db: AsyncSession = Depends(get_db_async)):
+        # Se consulta antes que los datos: si una escritura llega en medio, el
+        # ETag queda atrasado respecto al cuerpo y el cliente solo vuelve a pedirlo
+        estados = await _estados(db)
+        estado = "|".join(
+            [request.url.path, request.url.query, request.headers.get("accept", "")]
+            + [f"{tabla}:{estados[tabla]}" for tabla in tablas]
+        )
+        etag = f'"{hashlib.sha1(estado.encode()).hexdigest()}"'
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            etiquetas = _etiquetas(if_none_match)
+            if etag in etiquetas:
+                raise HTTPException(status_code=304, headers={"ETag": etag})
+            if "*" in etiquetas:
+                # "*" coincide solo si el recurso existe: lo decide la respuesta
+                # del endpoint (ver MiddlewareCondicional)
+                request.state.etag_asterisco = etag
+        response.headers["ETag"] = etag
+
+    return dependencia
+
+class MiddlewareCondicional:
+    """
+    Middleware ASGI que completa los GET con `If-None-Match: *`: "*" coincide
+    solo si el recurso existe, lo que se sabe al terminar el endpoint. Si
+    etag_condicional marcó la solicitud y la respuesta es exitosa, se envía
+    un 304 sin cuerpo; un error (por ejemplo, 404) pasa sin cambios.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        omitir = False
+
+        async def enviar(mensaje):
+            nonlocal omitir
+            if mensaje["type"] == "http.response.start":
+                etag = scope.get("state", {}).get("etag_asterisco")
+                if etag and 200 <= mensaje["status"] < 300:
+                    omitir = True
+                    await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag.encode())]})
+                    return
+            elif mensaje["type"] == "http.response.body" and omitir:
+                if not mensaje.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
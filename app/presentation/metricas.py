@@ -0,0 +1,247 @@
+import inspect
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from fastapi import APIRouter, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+# Solicitudes más lentas que este umbral registran en el log el SQL que ejecutaron
+UMBRAL_LENTO_MS = float(os.getenv("METRICAS_UMBRAL_LENTO_MS", "500"))
+
+# Sentencias por solicitud que se conservan para el log de solicitudes lentas
+MAXIMO_SENTENCIAS = 50
+
+# Límites (en segundos) de los buckets del histograma de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+class Medicion:
+    """
+    Lo medido durante una solicitud: SQL ejecutado, filas devueltas por el
+    endpoint y el momento en que terminó, para estimar la serialización.
+    """
+
+    __slots__ = ("sql_cantidad", "sql_segundos", "sentencias", "filas", "fin_endpoint", "inicio_respuesta")
+
+    def __init__(self):
+        self.sql_cantidad = 0
+        self.sql_segundos = 0.0
+        self.sentencias = []
+        self.filas = 0
+        self.fin_endpoint = None
+        self.inicio_respuesta = None
+
+    @property
+    def serializacion_segundos(self):
+        if self.fin_endpoint is None or self.inicio_respuesta is None:
+            return 0.0
+        return max(self.inicio_respuesta - self.fin_endpoint, 0.0)
+
+# Medición de la solicitud en curso; los endpoints `def` la heredan en el threadpool
+_medicion: ContextVar = ContextVar("medicion", default=None)
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_metricas = perf_counter()
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion.get()
+    if medicion is None:
+        return
+    duracion = perf_counter() - context._inicio_metricas
+    medicion.sql_cantidad += 1
+    medicion.sql_segundos += duracion
+    if len(medicion.sentencias) < MAXIMO_SENTENCIAS:
+        medicion.sentencias.append((duracion, statement))
+
+def instrumentar_motor(motor):
+    """
+    Registra los eventos que cuentan y cronometran cada sentencia SQL del motor.
+    """
+    if not event.contains(motor, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+
+def _contar_filas(resultado):
+    if isinstance(resultado, list):
+        return len(resultado)
+    if isinstance(resultado, dict) and isinstance(resultado.get("trayectos"), list):
+        return len(resultado["trayectos"])
+    return 1 if resultado is not None else 0
+
+def _medir_endpoint(funcion):
+    def terminar(resultado):
+        medicion = _medicion.get()
+        if medicion is not None:
+            medicion.filas = _contar_filas(resultado)
+            medicion.fin_endpoint = perf_counter()
+        return resultado
+
+    if inspect.iscoroutinefunction(funcion):
+        @wraps(funcion)
+        async def envoltura(*args, **kwargs):
+            return terminar(await funcion(*args, **kwargs))
+    else:
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return terminar(funcion(*args, **kwargs))
+    return envoltura
+
+class RutaMedida(APIRoute):
+    """
+    Ruta que marca cuándo termina el endpoint y cuántas filas retornó, de modo
+    que el tiempo hasta el inicio de la respuesta se atribuye a la serialización.
+    Se usa como `route_class` de los routers.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _medir_endpoint(endpoint), **kwargs)
+
+def _etiquetas(**valores):
+    texto = ",".join(
+        '{}="{}"'.format(nombre, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for nombre, valor in valores.items()
+    )
+    return "{" + texto + "}"
+
+class RegistroMetricas:
+    """
+    Acumula las métricas por (método, ruta) y las exporta en el formato de
+    texto de Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas = {}
+        self._estados = {}
+
+    def registrar(self, metodo, ruta, estado, duracion, medicion: Medicion):
+        with self._lock:
+            serie = self._rutas.get((metodo, ruta))
+            if serie is None:
+                serie = self._rutas[(metodo, ruta)] = {
+                    "buckets": [0] * (len(BUCKETS) + 1),
+                    "cantidad": 0,
+                    "segundos": 0.0,
+                    "sql_cantidad": 0,
+                    "sql_segundos": 0.0,
+                    "filas": 0,
+                    "serializacion_segundos": 0.0,
+                }
+            serie["buckets"][bisect_left(BUCKETS, duracion)] += 1
+            serie["cantidad"] += 1
+            serie["segundos"] += duracion
+            serie["sql_cantidad"] += medicion.sql_cantidad
+            serie["sql_segundos"] += medicion.sql_segundos
+            serie["filas"] += medicion.filas
+            serie["serializacion_segundos"] += medicion.serializacion_segundos
+            clave = (metodo, ruta, estado)
+            self._estados[clave] = self._estados.get(clave, 0) + 1
+
+    def exportar(self) -> str:
+        with self._lock:
+            rutas = {clave: dict(serie, buckets=list(serie["buckets"])) for clave, serie in self._rutas.items()}
+            estados = dict(self._estados)
+
+        lineas = [
+            "# HELP http_request_duration_seconds Latencia de las solicitudes por ruta.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (metodo, ruta), serie in sorted(rutas.items()):
+            acumulado = 0
+            for limite, cantidad in zip(BUCKETS + ("+Inf",), serie["buckets"]):
+                acumulado += cantidad
+                lineas.append(f"http_request_duration_seconds_bucket{_etiquetas(method=metodo, route=ruta, le=limite)} {acumulado}")
+            lineas.append(f"http_request_duration_seconds_sum{_etiquetas(method=metodo, route=ruta)} {serie['segundos']}")
+            lineas.append(f"http_request_duration_seconds_count{_etiquetas(method=metodo, route=ruta)} {serie['cantidad']}")
+
+        lineas += [
+            "# HELP http_requests_total Solicitudes atendidas por ruta y código de estado.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (metodo, ruta, estado), cantidad in sorted(estados.items()):
+            lineas.append(f"http_requests_total{_etiquetas(method=metodo, route=ruta, status=estado)} {cantidad}")
+
+        contadores = [
+            ("sql_statements_total", "sql_cantidad", "Sentencias SQL ejecutadas por ruta."),
+            ("sql_duration_seconds_total", "sql_segundos", "Tiempo total en sentencias SQL por ruta."),
+            ("response_rows_total", "filas", "Filas devueltas por los endpoints de cada ruta."),
+            ("serialization_seconds_total", "serializacion_segundos", "Tiempo de validación y serialización de las respuestas por ruta."),
+        ]
+        for nombre, campo, ayuda in contadores:
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} counter"]
+            for (metodo, ruta), serie in sorted(rutas.items()):
+                lineas.append(f"{nombre}{_etiquetas(method=metodo, route=ruta)} {serie[campo]}")
+        return "\n".join(lineas) + "\n"
+
+registro = RegistroMetricas()
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mide cada solicitud HTTP y la registra bajo la
+    plantilla de su ruta (por ejemplo /trayecto/{trayecto_id}).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = perf_counter()
+        estado = 500
+        flujo = False
+
+        async def enviar(mensaje):
+            nonlocal estado, flujo
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                medicion.inicio_respuesta = perf_counter()
+                # Los flujos SSE duran lo que el cliente esté conectado: no son lentos
+                flujo = any(
+                    nombre == b"content-type" and valor.startswith(b"text/event-stream")
+                    for nombre, valor in mensaje.get("headers", ())
+                )
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = perf_counter() - inicio
+            _medicion.reset(token)
+            ruta = scope.get("route")
+            plantilla = getattr(ruta, "path", None) or "sin_ruta"
+            registro.registrar(scope["method"], plantilla, estado, duracion, medicion)
+            if duracion * 1000 >= UMBRAL_LENTO_MS and not flujo:
+                _registrar_lenta(scope["method"], scope["path"], duracion, medicion)
+
+def _registrar_lenta(metodo, path, duracion, medicion: Medicion):
+    sentencias = "\n".join(
+        f"  {segundos * 1000:.1f} ms: {sentencia}"
+        for segundos, sentencia in sorted(medicion.sentencias, reverse=True)
+    )
+    logger.warning(
+        "Solicitud lenta %s %s: %.1f ms, %d sentencias SQL (%.1f ms), serialización %.1f ms\n%s",
+        metodo,
+        path,
+        duracion * 1000,
+        medicion.sql_cantidad,
+        medicion.sql_segundos * 1000,
+        medicion.serializacion_segundos * 1000,
+        sentencias,
+    )
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def leer_metricas():
+    return Response(registro.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,90 @@
+import os
+from datetime import date, time
+import msgpack
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+# Representaciones soportadas, elegidas con el encabezado Accept
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+NORMALIZADO_JSON = "application/vnd.transporte.normalizado+json"
+NORMALIZADO_MSGPACK = "application/vnd.transporte.normalizado+msgpack"
+
+ALIAS = {
+    "application/x-msgpack": MSGPACK,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
+SOPORTADOS = {JSON, MSGPACK, NORMALIZADO_JSON, NORMALIZADO_MSGPACK}
+
+# Con 1 (por defecto), el contenido confiable (dicts armados a partir de
+# columnas de la base de datos, con los tipos del response_model) también se
+# serializa aquí en JSON, sin que FastAPI valide de nuevo cada fila
+SALIDA_CONFIABLE = os.getenv("SALIDA_CONFIABLE", "1") == "1"
+
+def elegir_media_type(accept) -> str:
+    """
+    Retorna la representación soportada con mayor calidad (q) en Accept.
+    Si ninguna coincide se responde JSON.
+    """
+    elegido, mejor = JSON, 0.0
+    for orden, parte in enumerate((accept or "").split(",")):
+        tipo, *parametros = [p.strip() for p in parte.split(";")]
+        tipo = ALIAS.get(tipo.lower(), tipo.lower())
+        if tipo not in SOPORTADOS:
+            continue
+        calidad = 1.0
+        for parametro in parametros:
+            nombre, _, valor = parametro.partition("=")
+            if nombre.strip() == "q":
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0
+        if calidad > mejor:
+            elegido, mejor = tipo, calidad
+    return elegido
+
+def _primitivo(valor):
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+class Negociacion:
+    """
+    Dependencia que elige la representación de la respuesta según Accept:
+    JSON, MessagePack o la forma normalizada (entidades relacionadas una sola
+    vez, referenciadas por id) en cualquiera de los dos formatos.
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.media_type = elegir_media_type(request.headers.get("accept"))
+        self.response = response
+
+    @property
+    def normalizado(self) -> bool:
+        return self.media_type in (NORMALIZADO_JSON, NORMALIZADO_MSGPACK)
+
+    def responder(self, contenido, confiable: bool = False):
+        """
+        Con JSON plano retorna el contenido tal cual, para que FastAPI lo
+        valide y serialice con el response_model, salvo que sea `confiable`
+        y SALIDA_CONFIABLE esté activa. En los demás casos serializa aquí
+        (orjson o msgpack) y conserva los encabezados ya asignados a la
+        respuesta (cursor, ETag).
+        """
+        if self.media_type == JSON and not (confiable and SALIDA_CONFIABLE):
+            self.response.headers["Vary"] = "Accept"
+            return contenido
+        if self.media_type in (MSGPACK, NORMALIZADO_MSGPACK):
+            cuerpo = msgpack.packb(contenido, default=_primitivo)
+        else:
+            cuerpo = orjson.dumps(contenido, default=_primitivo)
+        encabezados = {k: v for k, v in self.response.headers.items() if k != "content-length"}
+        respuesta = Response(cuerpo, media_type=self.media_type, headers=encabezados)
+        respuesta.headers["Vary"] = "Accept"
+        return respuesta
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import date, time
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import literal, tuple_
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+# Encabezado con el cursor para pedir la siguiente página
+ENCABEZADO_CURSOR = "X-Cursor-Siguiente"
+
+def _serializar(valor):
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+    return valor
+
+def _deserializar(columna, valor):
+    tipo = columna.type.python_type
+    if tipo in (date, time) and isinstance(valor, str):
+        return tipo.fromisoformat(valor)
+    return valor
+
+def codificar_cursor(valores) -> str:
+    texto = json.dumps([_serializar(valor) for valor in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def decodificar_cursor(cursor: str, columnas):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(valores) != len(columnas):
+            raise ValueError
+        return [_deserializar(columna, valor) for columna, valor in zip(columnas, valores)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+class Paginacion:
+    """
+    Parámetros de paginación por cursor (keyset) para los listados.
+    """
+
+    def __init__(
+        self,
+        cursor: str = Query(None, description="Cursor devuelto en el encabezado X-Cursor-Siguiente"),
+        limite: int = Query(LIMITE_POR_DEFECTO, gt=0, le=LIMITE_MAXIMO),
+    ):
+        self.cursor = cursor
+        self.limite = limite
+
+def paginar(query, columnas, paginacion: Paginacion, response: Response):
+    """
+    Aplica orden estable y paginación keyset sobre `columnas` (la última debe
+    ser única, como el id). Retorna la página de resultados y, si hay más,
+    publica el cursor de la siguiente en el encabezado X-Cursor-Siguiente.
+    """
+    if paginacion.cursor:
+        valores = decodificar_cursor(paginacion.cursor, columnas)
+        query = query.filter(
+            tuple_(*columnas) > tuple_(*(literal(valor, columna.type) for columna, valor in zip(columnas, valores)))
+        )
+    filas = query.order_by(*columnas).limit(paginacion.limite + 1).all()
+
+    if len(filas) > paginacion.limite:
+        filas = filas[:paginacion.limite]
+        ultima = filas[-1]
+        response.headers[ENCABEZADO_CURSOR] = codificar_cursor(
+            [getattr(ultima, columna.key) for columna in columnas]
+        )
+    return filas
@@ -0,0 +1,6 @@
+"""
+Benchmarks de la API: siembran un conjunto de datos sintético en una base
+SQLite temporal y ejecutan la aplicación real en el mismo proceso.
+
+Uso: python -m benchmarks --help
+"""
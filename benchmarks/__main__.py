@@ -0,0 +1,135 @@
+"""
+python -m benchmarks [opciones]
+
+Siembra una base SQLite temporal, ejecuta los escenarios contra la
+aplicación en el mismo proceso e imprime throughput y p50/p95/p99 por
+endpoint. Con --guardar se escribe el resultado en JSON; con --base se
+compara contra un resultado guardado y el proceso termina con código 1 si
+algún percentil empeora más que --tolerancia.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+def _argumentos():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehiculos", type=int, default=200)
+    parser.add_argument("--conductores", type=int, default=200)
+    parser.add_argument("--rutas", type=int, default=50)
+    parser.add_argument("--trayectos", type=int, default=100000)
+    parser.add_argument("--dias", type=int, default=365, help="días mínimos sobre los que se reparten los trayectos")
+    parser.add_argument("--concurrencia", default="1,8,32", help="niveles de concurrencia separados por comas")
+    parser.add_argument("--solicitudes", type=int, default=200, help="solicitudes por escenario y nivel de concurrencia")
+    parser.add_argument("--cargas-bulk", type=int, default=3, help="archivos subidos a /trayectos/bulk")
+    parser.add_argument("--filas-bulk", type=int, default=5000, help="filas por archivo de /trayectos/bulk")
+    parser.add_argument("--escenario", action="append", help="ejecutar solo este escenario (repetible)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--guardar", type=Path, help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--base", type=Path, help="resultados JSON de referencia para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="empeoramiento relativo admitido frente a --base")
+    return parser.parse_args()
+
+def _tabla(resultados):
+    print(f"{'endpoint':<36} {'conc':>5} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errores':>8}")
+    for nombre, por_concurrencia in resultados["endpoints"].items():
+        for concurrencia, r in por_concurrencia.items():
+            print(f"{nombre:<36} {concurrencia:>5} {r['throughput']:>10} {r['p50']:>10} {r['p95']:>10} {r['p99']:>10} {r['errores']:>8}")
+    if "bulk" in resultados:
+        r = resultados["bulk"]
+        print(f"\n/trayectos/bulk: {r['filas_por_segundo']} filas/s, p50 {r['p50']} ms, p99 {r['p99']} ms, {r['errores']} errores")
+    r = resultados["conflictos"]
+    print(f"Verificación de conflictos: {r['ms_por_lote']} ms por lote de {r['filas']} filas ({r['us_por_fila']} µs/fila)")
+    r = resultados["serializacion"]
+    print(f"Serialización de {r['filas']} trayectos: validado {r['validado']} µs/fila, confiable {r['confiable']} µs/fila")
+
+def _cambio(actual, base):
+    if actual is None or not base:
+        return None
+    return (actual - base) / base
+
+def comparar(resultados, base, tolerancia):
+    """
+    Imprime la variación frente a la base y retorna las métricas que
+    empeoraron más que la tolerancia.
+    """
+    regresiones = []
+    print(f"\n{'endpoint':<36} {'conc':>5} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for nombre, por_concurrencia in resultados["endpoints"].items():
+        for concurrencia, r in por_concurrencia.items():
+            b = base.get("endpoints", {}).get(nombre, {}).get(concurrencia)
+            if not b:
+                continue
+            cambios = {m: _cambio(r[m], b[m]) for m in ("throughput", "p50", "p95", "p99")}
+            print(f"{nombre:<36} {concurrencia:>5} " + " ".join(
+                f"{'':>9}" if c is None else f"{c:>+9.1%}" for c in cambios.values()
+            ))
+            if cambios["throughput"] is not None and cambios["throughput"] < -tolerancia:
+                regresiones.append(f"{nombre} c={concurrencia} throughput {cambios['throughput']:+.1%}")
+            for m in ("p50", "p95", "p99"):
+                if cambios[m] is not None and cambios[m] > tolerancia:
+                    regresiones.append(f"{nombre} c={concurrencia} {m} {cambios[m]:+.1%}")
+    escalares = (
+        # (sección, métrica, etiqueta, True si un valor mayor es mejor)
+        ("bulk", "filas_por_segundo", "/trayectos/bulk filas/s", True),
+        ("conflictos", "us_por_fila", "Verificación de conflictos µs/fila", False),
+        ("serializacion", "confiable", "Serialización confiable µs/fila", False),
+    )
+    for seccion, metrica, etiqueta, mayor_es_mejor in escalares:
+        if seccion not in resultados or seccion not in base:
+            continue
+        cambio = _cambio(resultados[seccion].get(metrica), base[seccion].get(metrica))
+        if cambio is None:
+            # Sin valor en alguno de los dos resultados (o base en cero): no comparable
+            print(f"{etiqueta} sin comparación")
+            continue
+        print(f"{etiqueta} {cambio:+.1%}")
+        if (cambio < -tolerancia) if mayor_es_mejor else (cambio > tolerancia):
+            regresiones.append(f"{etiqueta} {cambio:+.1%}")
+    return regresiones
+
+def main():
+    args = _argumentos()
+    directorio = tempfile.TemporaryDirectory(prefix="benchmark-transporte-")
+    url = f"sqlite:///{Path(directorio.name) / 'benchmark.db'}"
+
+    # La aplicación lee la configuración al importarse: se fija antes
+    os.environ["DATABASE_URL"] = url
+    os.environ.pop("DATABASE_URL_LECTURA", None)
+    os.environ.setdefault("METRICAS_UMBRAL_LENTO_MS", "60000")
+
+    from app.data.migraciones import aplicar_migraciones
+    from benchmarks import carga, datos as sembrado
+
+    aplicar_migraciones(url)
+    print(f"Sembrando {args.trayectos} trayectos en {url} ...", file=sys.stderr)
+    datos = sembrado.sembrar(
+        args.vehiculos, args.conductores, args.rutas, args.trayectos, args.dias,
+        progreso=lambda hechos, total: print(f"  {hechos}/{total}", end="\r", file=sys.stderr),
+    )
+    print(file=sys.stderr)
+
+    from app.main import app
+    concurrencias = [int(c) for c in args.concurrencia.split(",")]
+    resultados = asyncio.run(carga.ejecutar(
+        app, datos, concurrencias, args.solicitudes, args.cargas_bulk, args.filas_bulk, args.semilla, args.escenario,
+        progreso=lambda nombre, c, r: print(f"  {nombre} c={c}: {r['throughput']} req/s", file=sys.stderr),
+    ))
+    resultados["parametros"] = {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}
+    _tabla(resultados)
+
+    if args.guardar:
+        args.guardar.write_text(json.dumps(resultados, indent=2, ensure_ascii=False))
+    directorio.cleanup()
+
+    if args.base:
+        regresiones = comparar(resultados, json.loads(args.base.read_text()), args.tolerancia)
+        if regresiones:
+            print("\nRegresiones:\n  " + "\n  ".join(regresiones))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
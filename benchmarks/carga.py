@@ -0,0 +1,226 @@
+import asyncio
+import csv
+import io
+import itertools
+import random
+from datetime import date
+from time import perf_counter
+import httpx
+import numpy as np
+from app.data.indice_disponibilidad import indice_disponibilidad
+from benchmarks.datos import Datos
+
+# Calendarios separados para los trayectos que crean los escenarios de escritura
+FECHA_CREACIONES = date(2100, 1, 1)
+FECHA_BULK = date(2200, 1, 1)
+
+ACEPTAR_NORMALIZADO = {"Accept": "application/vnd.transporte.normalizado+json"}
+
+class Escenario:
+    """
+    Un endpoint a medir. `solicitud(contexto, n)` retorna (método, url, kwargs)
+    para httpx; `esperado` son los códigos de estado que cuentan como éxito.
+    """
+
+    def __init__(self, nombre, solicitud, esperado=(200,)):
+        self.nombre = nombre
+        self.solicitud = solicitud
+        self.esperado = esperado
+
+class Contexto:
+    def __init__(self, datos: Datos, semilla: int):
+        self.datos = datos
+        self.azar = random.Random(semilla)
+        self.creados = itertools.count()
+
+def _crear(contexto, n):
+    trayecto = contexto.datos.trayecto(next(contexto.creados), FECHA_CREACIONES)
+    return "POST", "/trayectos/", {"json": [_a_json(trayecto)]}
+
+def _crear_con_conflicto(contexto, n, tamano=50):
+    # Copias de trayectos sembrados: todas chocan con el índice de disponibilidad
+    inicio = contexto.azar.randrange(max(contexto.datos.trayectos - tamano, 1))
+    lote = [_a_json(contexto.datos.trayecto_sembrado(i)) for i in range(inicio, inicio + tamano)]
+    return "POST", "/trayectos/", {"json": lote}
+
+def _a_json(trayecto):
+    return {clave: valor.isoformat() if hasattr(valor, "isoformat") else valor for clave, valor in trayecto.items()}
+
+ESCENARIOS = [
+    Escenario("GET /trayectos/", lambda c, n: ("GET", "/trayectos/", {"params": {"limite": 100}})),
+    Escenario("GET /trayectos/ normalizado", lambda c, n: ("GET", "/trayectos/", {"params": {"limite": 100}, "headers": ACEPTAR_NORMALIZADO})),
+    Escenario("GET /trayectos/?vehiculo_id", lambda c, n: ("GET", "/trayectos/", {"params": {"vehiculo_id": c.azar.choice(c.datos.vehiculos), "limite": 100}})),
+    Escenario("GET /trayecto/{id}", lambda c, n: ("GET", f"/trayecto/{c.azar.choice(c.datos.ids_trayectos)}", {})),
+    Escenario("GET /vehiculos/", lambda c, n: ("GET", "/vehiculos/", {})),
+    Escenario("GET /analytics/resumen/ruta", lambda c, n: ("GET", "/analytics/resumen/ruta", {"params": {"por_dia": "false"}})),
+    Escenario("GET /analytics/ocupacion", lambda c, n: ("GET", "/analytics/ocupacion", {})),
+    Escenario("POST /trayectos/", _crear),
+    Escenario("POST /trayectos/ conflicto x50", _crear_con_conflicto, esperado=(400,)),
+]
+
+def percentiles(latencias):
+    if not latencias:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(np.array(latencias) * 1000, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3)}
+
+async def ejecutar_escenario(cliente, contexto, escenario: Escenario, concurrencia: int, solicitudes: int):
+    """
+    Lanza `solicitudes` peticiones repartidas entre `concurrencia` clientes
+    simultáneos y retorna el throughput y los percentiles de latencia.
+    """
+    latencias = []
+    errores = 0
+    pendientes = itertools.count()
+
+    async def trabajador():
+        nonlocal errores
+        while (n := next(pendientes)) < solicitudes:
+            metodo, url, kwargs = escenario.solicitud(contexto, n)
+            inicio = perf_counter()
+            respuesta = await cliente.request(metodo, url, **kwargs)
+            latencias.append(perf_counter() - inicio)
+            if respuesta.status_code not in escenario.esperado:
+                errores += 1
+
+    inicio = perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = perf_counter() - inicio
+    return {
+        "solicitudes": solicitudes,
+        "errores": errores,
+        "throughput": round(solicitudes / duracion, 2),
+        **percentiles(latencias),
+    }
+
+def _csv_bulk(datos: Datos, inicio: int, filas: int):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+    columnas = ["fecha", "hora_salida", "hora_llegada", "cantidad_pasajeros", "kilometraje", "ruta_id", "conductor_id", "vehiculo_id"]
+    escritor.writerow(columnas)
+    for indice in range(inicio, inicio + filas):
+        trayecto = datos.trayecto(indice, FECHA_BULK)
+        escritor.writerow([trayecto[columna] for columna in columnas])
+    return buffer.getvalue().encode()
+
+async def _esperar_trabajo(cliente, url, intervalo=0.02):
+    while True:
+        trabajo = (await cliente.get(url)).json()
+        if trabajo["estado"] in ("completado", "fallido"):
+            return trabajo
+        await asyncio.sleep(intervalo)
+
+async def ejecutar_bulk(cliente, datos: Datos, cargas: int, filas: int):
+    """
+    Sube `cargas` archivos CSV de `filas` trayectos sin conflictos, uno tras
+    otro, y mide la tasa de ingesta en filas por segundo, desde la subida
+    hasta que el trabajo en segundo plano termina.
+    """
+    latencias = []
+    errores = 0
+    for carga in range(cargas):
+        contenido = _csv_bulk(datos, carga * filas, filas)
+        inicio = perf_counter()
+        respuesta = await cliente.post("/trayectos/bulk", files={"file": ("trayectos.csv", contenido, "text/csv")})
+        if respuesta.status_code != 202:
+            latencias.append(perf_counter() - inicio)
+            errores += 1
+            continue
+        trabajo = await _esperar_trabajo(cliente, respuesta.headers["location"])
+        latencias.append(perf_counter() - inicio)
+        if trabajo["estado"] != "completado" or trabajo["total_errores"]:
+            errores += 1
+    return {
+        "solicitudes": cargas,
+        "errores": errores,
+        "filas_por_segundo": round(cargas * filas / sum(latencias), 1),
+        **percentiles(latencias),
+    }
+
+def medir_conflictos(datos: Datos, filas: int, repeticiones: int = 5):
+    """
+    Costo de la verificación de conflictos en memoria (IndiceDisponibilidad.conflictos_lote)
+    para un lote de `filas` trayectos que chocan con los existentes.
+    """
+    lote = [
+        (t["fecha"], t["hora_salida"], t["hora_llegada"], t["conductor_id"], t["vehiculo_id"], None)
+        for t in (datos.trayecto_sembrado(i) for i in range(min(filas, datos.trayectos)))
+    ]
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = perf_counter()
+        indice_disponibilidad.conflictos_lote(lote)
+        tiempos.append(perf_counter() - inicio)
+    mejor = min(tiempos)
+    return {"filas": len(lote), "ms_por_lote": round(mejor * 1000, 3), "us_por_fila": round(mejor * 1e6 / max(len(lote), 1), 3)}
+
+def medir_serializacion(filas: int, repeticiones: int = 3):
+    """
+    Costo por fila de armar y serializar en JSON un listado de `filas`
+    trayectos (con ruta, conductor y vehículo) por las dos vías de GET
+    /trayectos/: objetos ORM validados con Pydantic y luego contra el
+    response_model (como hace FastAPI), y la salida confiable (consulta de
+    columnas y orjson). Las cachés de maestros están calientes en ambas.
+    """
+    from typing import List
+    import orjson
+    from pydantic import TypeAdapter
+    from app.data.database import SessionLectura
+    from app.domain.models.trayecto import Trayecto as TrayectoModelo
+    from app.domain.schemas.trayecto_schemas import Trayecto
+    from app.presentation import api_trayecto
+
+    adaptador = TypeAdapter(List[Trayecto])
+
+    def validado(db):
+        trayectos = db.query(TrayectoModelo).order_by(*api_trayecto.ORDEN_TRAYECTOS).limit(filas).all()
+        contenido = api_trayecto._con_relaciones(db, [api_trayecto._columnas(t) for t in trayectos])
+        return adaptador.dump_json(adaptador.validate_python(contenido))
+
+    def confiable(db):
+        consulta = db.query(*api_trayecto.COLUMNAS_RESPUESTA).order_by(*api_trayecto.ORDEN_TRAYECTOS).limit(filas)
+        trayectos = [fila._asdict() for fila in consulta]
+        return orjson.dumps(api_trayecto._con_relaciones(db, trayectos, api_trayecto._armar_dicts))
+
+    resultado = {}
+    for nombre, via in (("validado", validado), ("confiable", confiable)):
+        tiempos = []
+        for _ in range(repeticiones):
+            db = SessionLectura()
+            try:
+                inicio = perf_counter()
+                cuerpo = via(db)
+                tiempos.append(perf_counter() - inicio)
+            finally:
+                db.close()
+        resultado[nombre] = round(min(tiempos) * 1e6 / max(filas, 1), 3)
+    resultado["filas"] = filas
+    resultado["bytes"] = len(cuerpo)
+    return resultado
+
+async def ejecutar(app, datos: Datos, concurrencias, solicitudes: int, cargas_bulk: int, filas_bulk: int, semilla: int, nombres=None, progreso=None):
+    """
+    Ejecuta todos los escenarios contra la aplicación en el mismo proceso.
+    Retorna {"endpoints": {nombre: {concurrencia: resultado}}, "bulk": ..., "conflictos": ..., "serializacion": ...}.
+    """
+    contexto = Contexto(datos, semilla)
+    resultados = {"endpoints": {}}
+    transporte = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=None) as cliente:
+            for escenario in ESCENARIOS:
+                if nombres and escenario.nombre not in nombres:
+                    continue
+                # Una petición de calentamiento (cachés, instantánea columnar)
+                metodo, url, kwargs = escenario.solicitud(contexto, -1)
+                await cliente.request(metodo, url, **kwargs)
+                por_concurrencia = resultados["endpoints"][escenario.nombre] = {}
+                for concurrencia in concurrencias:
+                    por_concurrencia[str(concurrencia)] = await ejecutar_escenario(cliente, contexto, escenario, concurrencia, solicitudes)
+                    if progreso:
+                        progreso(escenario.nombre, concurrencia, por_concurrencia[str(concurrencia)])
+            if cargas_bulk:
+                resultados["bulk"] = await ejecutar_bulk(cliente, datos, cargas_bulk, filas_bulk)
+            resultados["conflictos"] = medir_conflictos(datos, filas_bulk)
+            resultados["serializacion"] = medir_serializacion(datos.trayectos)
+    return resultados
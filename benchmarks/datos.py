@@ -0,0 +1,142 @@
+import math
+import uuid
+from datetime import date, time, timedelta
+from sqlalchemy import insert
+from app.data.database import SessionLocal
+from app.data import resumen_operaciones
+from app.domain.models.conductor import Conductor as ConductorModelo
+from app.domain.models.ruta import Ruta as RutaModelo
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+# Fecha del primer día de los trayectos sembrados
+FECHA_INICIAL = date(2024, 1, 1)
+
+# Cada vehículo hace como máximo RONDAS_POR_DIA viajes diarios de 30 minutos,
+# separados 45 minutos, desde las 05:00, de modo que nunca se traslapan
+RONDAS_POR_DIA = 24
+PRIMERA_SALIDA = 5 * 3600
+SEPARACION = 45 * 60
+DURACION = 30 * 60
+
+# Filas por sentencia al sembrar los trayectos
+FILAS_POR_LOTE = 10000
+
+# Ids de trayectos que se guardan para las consultas por id
+MUESTRA_IDS = 10000
+
+def _hora(segundos):
+    return time(segundos // 3600, segundos % 3600 // 60)
+
+class Datos:
+    """
+    Ids sembrados y la regla que reparte los trayectos en el calendario, para
+    que los escenarios puedan generar trayectos nuevos sin conflictos (o con
+    conflictos a propósito).
+    """
+
+    def __init__(self, vehiculos, conductores, rutas, trayectos, dias):
+        self.vehiculos = vehiculos
+        self.conductores = conductores
+        self.rutas = rutas
+        self.trayectos = trayectos
+        self.dias = max(dias, math.ceil(trayectos / (len(vehiculos) * RONDAS_POR_DIA)))
+        self.por_dia = math.ceil(trayectos / self.dias) if trayectos else 0
+        self.ids_trayectos = []
+
+    def trayecto(self, indice, fecha_base=FECHA_INICIAL, por_dia=None):
+        """
+        Trayecto número `indice` del calendario que empieza en `fecha_base`.
+        Dos índices distintos nunca comparten vehículo o conductor a la misma hora.
+        """
+        por_dia = por_dia or len(self.vehiculos) * RONDAS_POR_DIA
+        dia, posicion = divmod(indice, por_dia)
+        v, ronda = posicion % len(self.vehiculos), posicion // len(self.vehiculos)
+        salida = PRIMERA_SALIDA + ronda * SEPARACION
+        return {
+            "fecha": fecha_base + timedelta(days=dia),
+            "hora_salida": _hora(salida),
+            "hora_llegada": _hora(salida + DURACION),
+            "cantidad_pasajeros": 10 + indice % 30,
+            "kilometraje": 5 + indice % 20,
+            "observaciones": None,
+            "ruta_id": self.rutas[indice % len(self.rutas)],
+            "conductor_id": self.conductores[v] if v < len(self.conductores) else None,
+            "vehiculo_id": self.vehiculos[v],
+        }
+
+    def trayecto_sembrado(self, indice):
+        return self.trayecto(indice, FECHA_INICIAL, self.por_dia)
+
+def sembrar(vehiculos: int, conductores: int, rutas: int, trayectos: int, dias: int, progreso=None) -> Datos:
+    """
+    Inserta el conjunto de datos en la base configurada en DATABASE_URL, que
+    debe tener el esquema ya migrado.
+    """
+    db = SessionLocal()
+    try:
+        filas_vehiculos = [
+            {
+                "id": str(uuid.uuid4()),
+                "marca": "Marca",
+                "placa": f"BEN{i:05d}",
+                "modelo": "2020",
+                "lateral": str(i),
+                "año_de_fabricacion": 2015 + i % 10,
+                "capacidad_pasajeros": 40,
+                "estado_operativo": "activo",
+            }
+            for i in range(vehiculos)
+        ]
+        filas_conductores = [
+            {
+                "id": str(uuid.uuid4()),
+                "nombre": f"Conductor {i}",
+                "cedula": f"{10000000 + i}",
+                "licencia": f"L{i}",
+                "telefono": "3000000000",
+                "estado": "activo",
+            }
+            for i in range(conductores)
+        ]
+        filas_rutas = [
+            {
+                "id": str(uuid.uuid4()),
+                "nombre": f"Ruta {i}",
+                "codigo": f"R{i:04d}",
+                "origen": "Origen",
+                "destino": "Destino",
+                "duracion_estimada": 30,
+            }
+            for i in range(rutas)
+        ]
+        db.execute(insert(VehiculoModelo), filas_vehiculos)
+        db.execute(insert(ConductorModelo), filas_conductores)
+        db.execute(insert(RutaModelo), filas_rutas)
+        db.commit()
+
+        datos = Datos(
+            [fila["id"] for fila in filas_vehiculos],
+            [fila["id"] for fila in filas_conductores],
+            [fila["id"] for fila in filas_rutas],
+            trayectos,
+            dias,
+        )
+        for inicio in range(0, trayectos, FILAS_POR_LOTE):
+            lote = []
+            for indice in range(inicio, min(inicio + FILAS_POR_LOTE, trayectos)):
+                fila = datos.trayecto_sembrado(indice)
+                fila["id"] = str(uuid.uuid4())
+                lote.append(fila)
+            db.execute(insert(TrayectoModelo), lote)
+            db.commit()
+            if len(datos.ids_trayectos) < MUESTRA_IDS:
+                datos.ids_trayectos.extend(fila["id"] for fila in lote[: MUESTRA_IDS - len(datos.ids_trayectos)])
+            if progreso:
+                progreso(inicio + len(lote), trayectos)
+
+        resumen_operaciones.reconstruir(db)
+        db.commit()
+        return datos
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import uuid
+from pathlib import Path
+import pytest
+
+# La aplicación lee la configuración al importarse: se fija antes, con una
+# base SQLite temporal compartida por toda la sesión de pruebas
+_directorio = tempfile.TemporaryDirectory(prefix="pruebas-transporte-")
+URL = f"sqlite:///{Path(_directorio.name) / 'pruebas.db'}"
+os.environ["DATABASE_URL"] = URL
+os.environ.pop("DATABASE_URL_LECTURA", None)
+os.environ["TRABAJOS_DIRECTORIO"] = str(Path(_directorio.name) / "trabajos")
+os.environ["TRABAJOS_PROCESOS"] = "0"
+
+def _codigo():
+    return uuid.uuid4().hex[:8].upper()
+
+@pytest.fixture(scope="session", autouse=True)
+def base_de_datos():
+    from app.data.migraciones import aplicar_migraciones
+
+    aplicar_migraciones(URL)
+    yield URL
+    _directorio.cleanup()
+
+@pytest.fixture(scope="session")
+def cliente(base_de_datos):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+@pytest.fixture
+def db(base_de_datos):
+    from app.data.database import SessionLocal
+
+    sesion = SessionLocal()
+    yield sesion
+    sesion.close()
+
+@pytest.fixture
+def crear_vehiculo(cliente):
+    # Las pruebas comparten la base: cada registro lleva identificadores únicos
+    def crear(**campos):
+        datos = {
+            "marca": "Chevrolet",
+            "placa": _codigo(),
+            "modelo": "NPR",
+            "lateral": _codigo(),
+            "año_de_fabricacion": 2020,
+            "capacidad_pasajeros": 40,
+            "estado_operativo": "activo",
+        }
+        respuesta = cliente.post("/vehiculos/", json=[{**datos, **campos}])
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()[0]
+    return crear
+
+@pytest.fixture
+def crear_conductor(cliente):
+    def crear(**campos):
+        datos = {"nombre": "Conductor de prueba", "cedula": _codigo(), "licencia": "C2", "telefono": "3000000000", "estado": 1}
+        respuesta = cliente.post("/conductores/", json=[{**datos, **campos}])
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()[0]
+    return crear
+
+@pytest.fixture
+def crear_ruta(cliente):
+    def crear(**campos):
+        datos = {"nombre": "Ruta de prueba", "codigo": _codigo(), "origen": "Centro", "destino": "Universidad", "duracion_estimada": 30}
+        respuesta = cliente.post("/rutas/", json=[{**datos, **campos}])
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()[0]
+    return crear
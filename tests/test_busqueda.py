@@ -0,0 +1,34 @@
+import uuid
+
+def _titulos(respuesta):
+    assert respuesta.status_code == 200, respuesta.text
+    return [resultado["titulo"] for resultado in respuesta.json()]
+
+def test_palabras_cortas_filtran_junto_a_las_largas(cliente, crear_conductor):
+    marca = uuid.uuid4().hex[:10]
+    crear_conductor(nombre=f"Ana {marca} Gómez")
+    crear_conductor(nombre=f"Ana {marca} Pérez")
+    assert _titulos(cliente.get("/buscar", params={"q": f"{marca} gó"})) == [f"Ana {marca} Gómez"]
+    assert _titulos(cliente.get("/buscar", params={"q": f"{marca} pé"})) == [f"Ana {marca} Pérez"]
+    assert sorted(_titulos(cliente.get("/buscar", params={"q": marca}))) == [f"Ana {marca} Gómez", f"Ana {marca} Pérez"]
+    assert _titulos(cliente.get("/buscar", params={"q": f"{marca} zz"})) == []
+
+def test_coincidencia_exacta_de_identificador_va_primero(cliente, crear_conductor):
+    cedula = str(uuid.uuid4().int)[:12]
+    crear_conductor(nombre=f"Otro {cedula}")
+    crear_conductor(nombre="Exacto", cedula=cedula)
+    resultados = cliente.get("/buscar", params={"q": cedula, "tipos": "conductor"}).json()
+    assert [resultado["titulo"] for resultado in resultados] == ["Exacto", f"Otro {cedula}"]
+
+def test_los_cambios_se_reflejan_en_el_indice(cliente, crear_vehiculo):
+    vehiculo = crear_vehiculo()
+    placa = vehiculo["placa"]
+    nueva = uuid.uuid4().hex[:8].upper()
+    assert cliente.patch(f"/vehiculo/{vehiculo['id']}", json={"placa": nueva}).status_code == 200
+    assert _titulos(cliente.get("/buscar", params={"q": placa})) == []
+    assert _titulos(cliente.get("/buscar", params={"q": nueva})) == [f"{nueva} (lateral {vehiculo['lateral']})"]
+    assert cliente.delete(f"/vehiculo/{vehiculo['id']}").status_code in (200, 204)
+    assert _titulos(cliente.get("/buscar", params={"q": nueva})) == []
+
+def test_tipo_invalido(cliente):
+    assert cliente.get("/buscar", params={"q": "abc", "tipos": "avion"}).status_code == 400
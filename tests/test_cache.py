@@ -0,0 +1,24 @@
+from app.data.cache import CacheLRU
+
+def test_carga_anterior_a_una_invalidacion_no_se_guarda():
+    cache = CacheLRU()
+
+    def cargar():
+        # Una escritura invalida la caché mientras se lee el valor anterior
+        cache.invalidar()
+        return "viejo"
+
+    assert cache.obtener_o_cargar("clave", cargar) == "viejo"
+    assert cache.obtener("clave") is None
+    assert cache.obtener_o_cargar("clave", lambda: "nuevo") == "nuevo"
+    assert cache.obtener("clave") == "nuevo"
+
+def test_carga_de_varias_claves_anterior_a_una_invalidacion_no_se_guarda():
+    cache = CacheLRU()
+
+    def cargar(claves):
+        cache.invalidar()
+        return {clave: clave.upper() for clave in claves}
+
+    assert cache.obtener_varios(["a", "b"], cargar) == {"a": "A", "b": "B"}
+    assert cache.obtener("a") is None and cache.obtener("b") is None
@@ -0,0 +1,50 @@
+from sqlalchemy import event
+from app.data.database import async_engine
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+from app.presentation import condicional
+
+def test_etag_cambia_con_escrituras_de_cualquier_proceso(cliente, db, crear_vehiculo, monkeypatch):
+    # Sin plazo de reutilización, cada solicitud vuelve a leer el estado de la base
+    monkeypatch.setattr(condicional, "ETAG_REVALIDACION_SEGUNDOS", 0)
+    vehiculo = crear_vehiculo()
+    url = f"/vehiculo/{vehiculo['placa']}"
+    etag = cliente.get(url).headers["etag"]
+    assert cliente.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Una escritura que no pasa por este proceso (no notifica el cambio)
+    db.get(VehiculoModelo, vehiculo["id"]).marca = "Hino"
+    db.commit()
+    respuesta = cliente.get(url, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["marca"] == "Hino"
+    assert respuesta.headers["etag"] != etag
+
+def test_etag_cambia_al_eliminar(cliente, crear_vehiculo):
+    vehiculo = crear_vehiculo()
+    etag = cliente.get("/vehiculos/").headers["etag"]
+    assert cliente.delete(f"/vehiculo/{vehiculo['id']}").status_code == 200
+    assert cliente.get("/vehiculos/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_asterisco_solo_coincide_si_el_recurso_existe(cliente):
+    datos = {"fecha": "2026-07-01", "hora_salida": "08:00:00", "hora_llegada": "09:00:00", "cantidad_pasajeros": 1, "kilometraje": 1}
+    trayecto = cliente.post("/trayectos/", json=[datos]).json()[0]
+    assert cliente.get("/trayecto/nope", headers={"If-None-Match": "*"}).status_code == 404
+    respuesta = cliente.get(f"/trayecto/{trayecto['id']}", headers={"If-None-Match": "*"})
+    assert respuesta.status_code == 304
+    assert respuesta.headers["etag"]
+
+def test_304_sin_consultar_la_base_de_datos(cliente, crear_vehiculo, monkeypatch):
+    monkeypatch.setattr(condicional, "ETAG_REVALIDACION_SEGUNDOS", 60)
+    crear_vehiculo()
+    etag = cliente.get("/vehiculos/").headers["etag"]
+    sentencias = []
+    escuchar = lambda *argumentos: sentencias.append(argumentos[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", escuchar)
+    try:
+        assert cliente.get("/vehiculos/", headers={"If-None-Match": etag}).status_code == 304
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", escuchar)
+    assert sentencias == []
+    # Una escritura de este proceso cambia el ETag sin esperar el plazo
+    crear_vehiculo()
+    assert cliente.get("/vehiculos/", headers={"If-None-Match": etag}).status_code == 200
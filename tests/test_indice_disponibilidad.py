@@ -0,0 +1,118 @@
+import random
+from datetime import date, time
+from app.data.indice_disponibilidad import CONDUCTOR, VEHICULO, IndiceDisponibilidad
+
+FECHA = date(2026, 3, 2)
+
+def _indice(*trayectos):
+    indice = IndiceDisponibilidad()
+    for trayecto in trayectos:
+        indice.agregar(*trayecto)
+    return indice
+
+def test_lote_sin_conflictos():
+    indice = _indice(("t1", FECHA, time(8), time(9), "c1", "v1"))
+    filas = [
+        (FECHA, time(9, 30), time(10), "c1", "v1", None),
+        (FECHA, time(8), time(9), "c2", "v2", None),
+        (date(2026, 3, 3), time(8), time(9), "c1", "v1", None),
+    ]
+    assert indice.conflictos_lote(filas) == {}
+
+def test_conflicto_con_trayecto_existente():
+    indice = _indice(("t1", FECHA, time(8), time(9), "c1", "v1"))
+    conflictos = indice.conflictos_lote([(FECHA, time(8, 30), time(9, 30), "c1", "v2", None)])
+    assert conflictos == {0: [(CONDUCTOR, "t1", None)]}
+
+def test_intervalos_que_se_tocan_son_conflicto():
+    # Igual que buscar_conflicto: llegar a la misma hora de la siguiente salida choca
+    indice = _indice(("t1", FECHA, time(8), time(9), None, "v1"))
+    assert indice.conflictos_lote([(FECHA, time(9), time(10), None, "v1", None)]) == {0: [(VEHICULO, "t1", None)]}
+    assert indice.buscar_conflicto(FECHA, time(9), time(10), vehiculo_id="v1") == (VEHICULO, "t1")
+
+def test_conflicto_dentro_del_lote_marca_la_fila_posterior():
+    indice = IndiceDisponibilidad()
+    filas = [
+        (FECHA, time(10), time(11), "c1", None, None),
+        (FECHA, time(7), time(8), "c1", None, None),
+        (FECHA, time(10, 30), time(12), "c1", None, None),
+    ]
+    assert indice.conflictos_lote(filas) == {2: [(CONDUCTOR, None, 0)]}
+
+def test_fila_rechazada_no_ocupa_el_horario():
+    # B choca con A y C solo con B: como B no se insertará, C es válida
+    indice = IndiceDisponibilidad()
+    filas = [
+        (FECHA, time(8), time(9), "c1", None, None),
+        (FECHA, time(8, 30), time(10), "c1", None, None),
+        (FECHA, time(9, 30), time(11), "c1", None, None),
+    ]
+    assert indice.conflictos_lote(filas) == {1: [(CONDUCTOR, None, 0)]}
+    # Lo mismo si B se rechaza por un trayecto existente o por el otro recurso
+    indice = _indice(("t1", FECHA, time(8), time(9), None, "v1"))
+    filas = [
+        (FECHA, time(8, 30), time(10), "c1", "v1", None),
+        (FECHA, time(9, 30), time(11), "c1", None, None),
+    ]
+    assert indice.conflictos_lote(filas) == {0: [(VEHICULO, "t1", None)]}
+
+def test_ambos_recursos_en_conflicto():
+    indice = _indice(("t1", FECHA, time(8), time(9), "c1", "v1"))
+    conflictos = indice.conflictos_lote([(FECHA, time(8), time(9), "c1", "v1", None)])
+    assert sorted(conflictos[0]) == [(CONDUCTOR, "t1", None), (VEHICULO, "t1", None)]
+
+def test_excluir_el_trayecto_que_se_modifica():
+    indice = _indice(
+        ("t1", FECHA, time(8), time(9), "c1", "v1"),
+        ("t2", FECHA, time(10), time(11), "c1", "v1"),
+    )
+    # Mover t1 dentro de su propio horario no choca consigo mismo
+    assert indice.conflictos_lote([(FECHA, time(8, 15), time(9, 15), "c1", "v1", "t1")]) == {}
+    # Intercambiar los horarios de t1 y t2 en un mismo lote es válido
+    filas = [
+        (FECHA, time(10), time(11), "c1", "v1", "t1"),
+        (FECHA, time(8), time(9), "c1", "v1", "t2"),
+    ]
+    assert indice.conflictos_lote(filas) == {}
+
+def test_coincide_con_buscar_conflicto():
+    generador = random.Random(7)
+
+    def horario():
+        inicio = generador.randrange(5 * 60, 21 * 60)
+        fin = inicio + generador.randrange(10, 120)
+        return time(inicio // 60, inicio % 60), time(min(fin, 23 * 60 + 59) // 60, min(fin, 23 * 60 + 59) % 60)
+
+    indice = IndiceDisponibilidad()
+    for i in range(300):
+        indice.agregar(f"t{i}", FECHA, *horario(), f"c{generador.randrange(20)}", f"v{generador.randrange(20)}")
+    for _ in range(300):
+        salida, llegada = horario()
+        conductor_id, vehiculo_id = f"c{generador.randrange(20)}", f"v{generador.randrange(20)}"
+        en_lote = indice.conflictos_lote([(FECHA, salida, llegada, conductor_id, vehiculo_id, None)])
+        individual = indice.buscar_conflicto(FECHA, salida, llegada, conductor_id, vehiculo_id)
+        assert bool(en_lote) == (individual is not None)
+
+def test_lote_equivale_a_insertar_fila_por_fila():
+    generador = random.Random(11)
+    for _ in range(50):
+        existentes = IndiceDisponibilidad()
+        for i in range(10):
+            inicio = generador.randrange(6 * 60, 20 * 60)
+            existentes.agregar(f"t{i}", FECHA, time(inicio // 60, inicio % 60), time((inicio + 45) // 60, (inicio + 45) % 60),
+                               f"c{generador.randrange(4)}", f"v{generador.randrange(4)}")
+        filas = []
+        for _ in range(30):
+            inicio = generador.randrange(6 * 60, 20 * 60)
+            fin = inicio + generador.randrange(10, 90)
+            filas.append((FECHA, time(inicio // 60, inicio % 60), time(fin // 60, fin % 60),
+                          f"c{generador.randrange(4)}", f"v{generador.randrange(4)}", None))
+        rechazadas = set(existentes.conflictos_lote(filas))
+        # Referencia: cada fila se valida e inserta antes de la siguiente
+        secuencial = set()
+        for posicion, (fecha, salida, llegada, conductor_id, vehiculo_id, _) in enumerate(filas):
+            if existentes.buscar_conflicto(fecha, salida, llegada, conductor_id, vehiculo_id):
+                secuencial.add(posicion)
+            else:
+                existentes.agregar(f"n{posicion}", fecha, salida, llegada, conductor_id, vehiculo_id)
+        assert rechazadas == secuencial
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.data.migraciones import aplicar_migraciones
+
+def test_placas_repetidas_detienen_la_migracion_con_un_mensaje_claro(tmp_path):
+    url = f"sqlite:///{tmp_path / 'repetidas.db'}"
+    aplicar_migraciones(url, "0001")
+    motor = create_engine(url)
+    with motor.begin() as conexion:
+        for vehiculo_id in ("v1", "v2", "v3"):
+            conexion.execute(text(
+                "INSERT INTO vehiculos (id, marca, placa, modelo, lateral, año_de_fabricacion, capacidad_pasajeros, estado_operativo) "
+                "VALUES (:id, 'Hino', :placa, 'AK', :id, 2019, 40, 'activo')"
+            ), {"id": vehiculo_id, "placa": "ABC123" if vehiculo_id != "v3" else "XYZ789"})
+    with pytest.raises(RuntimeError) as error:
+        aplicar_migraciones(url, "0002")
+    assert "ix_vehiculos_placa" in str(error.value)
+    assert "ABC123 (2 filas)" in str(error.value) and "XYZ789" not in str(error.value)
+
+    # Corregida la placa repetida, la migración continúa
+    with motor.begin() as conexion:
+        conexion.execute(text("UPDATE vehiculos SET placa = 'ABC124' WHERE id = 'v2'"))
+    aplicar_migraciones(url, "0002")
+    motor.dispose()
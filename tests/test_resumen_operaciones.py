@@ -0,0 +1,65 @@
+import pytest
+from app.data.resumen_operaciones import Dimension, consultar, reconstruir
+
+def _viaje(vehiculo_id, fecha, salida, llegada):
+    return {
+        "fecha": fecha, "hora_salida": salida, "hora_llegada": llegada,
+        "cantidad_pasajeros": 20, "kilometraje": 15, "vehiculo_id": vehiculo_id,
+    }
+
+def _comparar_con_reconstruccion(db, clave, fecha, dimension=Dimension.vehiculo):
+    # Lo acumulado por deltas debe coincidir con recalcular desde los trayectos;
+    # la reconstrucción se descarta para no alterar la base compartida
+    incremental = [consultar(db, dimension, clave=clave), consultar(db, Dimension.dia, fecha, fecha)]
+    reconstruir(db)
+    esperado = [consultar(db, dimension, clave=clave), consultar(db, Dimension.dia, fecha, fecha)]
+    db.rollback()
+    assert incremental == [
+        [{**fila, "ocupacion_promedio": pytest.approx(fila["ocupacion_promedio"])} for fila in filas] for filas in esperado
+    ]
+    return incremental
+
+def test_cambio_de_capacidad_reaplica_la_ocupacion(cliente, db, crear_vehiculo):
+    fecha = "2026-06-01"
+    vehiculo = crear_vehiculo(capacidad_pasajeros=40)
+    respuesta = cliente.post("/trayectos/", json=[
+        _viaje(vehiculo["id"], fecha, "08:00:00", "09:00:00"),
+        _viaje(vehiculo["id"], fecha, "10:00:00", "11:00:00"),
+    ])
+    assert respuesta.status_code == 200, respuesta.text
+    assert cliente.patch(f"/vehiculo/{vehiculo['id']}", json={"capacidad_pasajeros": 10}).status_code == 200
+    assert cliente.delete(f"/trayecto/{respuesta.json()[0]['id']}").status_code == 200
+
+    por_vehiculo, _ = _comparar_con_reconstruccion(db, vehiculo["id"], fecha)
+    assert por_vehiculo[0]["viajes"] == 1
+    assert por_vehiculo[0]["ocupacion_promedio"] == pytest.approx(2.0)
+
+def test_upsert_y_eliminacion_de_vehiculo_reaplican_la_ocupacion(cliente, db, crear_vehiculo):
+    fecha = "2026-06-02"
+    vehiculo = crear_vehiculo(capacidad_pasajeros=40)
+    respuesta = cliente.post("/trayectos/", json=[_viaje(vehiculo["id"], fecha, "08:00:00", "09:00:00")])
+    assert respuesta.status_code == 200, respuesta.text
+
+    datos = {k: v for k, v in vehiculo.items() if k != "id"}
+    respuesta = cliente.post("/vehiculos/?on_conflict=update", json=[{**datos, "capacidad_pasajeros": 80}])
+    assert respuesta.json()["actualizados"] == 1
+    por_vehiculo, _ = _comparar_con_reconstruccion(db, vehiculo["id"], fecha)
+    assert por_vehiculo[0]["ocupacion_promedio"] == pytest.approx(0.25)
+
+    # El trayecto conserva el vehiculo_id, pero sin vehículo no hay capacidad
+    assert cliente.delete(f"/vehiculo/{vehiculo['id']}").status_code == 200
+    por_vehiculo, _ = _comparar_con_reconstruccion(db, vehiculo["id"], fecha)
+    assert por_vehiculo[0]["ocupacion_promedio"] is None
+
+def test_eliminar_ruta_la_descuenta_del_resumen(cliente, db, crear_ruta):
+    fecha = "2026-06-03"
+    ruta = crear_ruta()
+    datos = {"fecha": fecha, "hora_salida": "08:00:00", "hora_llegada": "09:00:00", "cantidad_pasajeros": 20, "kilometraje": 15, "ruta_id": ruta["id"]}
+    assert cliente.post("/trayectos/", json=[datos]).status_code == 200
+    assert consultar(db, Dimension.ruta, clave=ruta["id"])[0]["viajes"] == 1
+    db.rollback()
+
+    assert cliente.delete(f"/ruta/{ruta['id']}").status_code == 200
+    por_ruta, por_dia = _comparar_con_reconstruccion(db, ruta["id"], fecha, Dimension.ruta)
+    assert por_ruta == []
+    assert por_dia[0]["viajes"] >= 1
@@ -0,0 +1,71 @@
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+def _paginas(cliente, **parametros):
+    paginas = []
+    respuesta = cliente.get("/sync", params=parametros).json()
+    paginas.append(respuesta)
+    while respuesta["continuar"]:
+        respuesta = cliente.get("/sync", params={"continuar": respuesta["continuar"], "limite": parametros["limite"]}).json()
+        paginas.append(respuesta)
+    return paginas
+
+def _unir(paginas, tabla):
+    cambios = [fila["id"] for pagina in paginas if pagina.get(tabla) for fila in pagina[tabla]["cambios"]]
+    eliminados = [registro_id for pagina in paginas if pagina.get(tabla) for registro_id in pagina[tabla]["eliminados"]]
+    return cambios, eliminados
+
+def test_paginas_completas_y_sin_repetidos(cliente, crear_vehiculo, crear_conductor):
+    token = cliente.get("/sync", params={"limite": 1}).json()["token"]
+    vehiculos = [crear_vehiculo()["id"] for _ in range(5)]
+    conductores = [crear_conductor()["id"] for _ in range(3)]
+    assert cliente.delete(f"/vehiculo/{vehiculos[0]}").status_code == 200
+
+    completa = cliente.get("/sync", params={"since": token, "tablas": "vehiculos,conductores"}).json()
+    assert completa["continuar"] is None
+    paginas = _paginas(cliente, since=token, tablas="vehiculos,conductores", limite=2)
+    # 4 vehículos, 1 eliminado y 3 conductores, de a 2 filas por página
+    assert len(paginas) == 4
+    assert all(pagina["token"] == completa["token"] for pagina in paginas)
+    cambios, eliminados = _unir(paginas, "vehiculos")
+    assert sorted(cambios) == sorted(vehiculos[1:]) == sorted(fila["id"] for fila in completa["vehiculos"]["cambios"])
+    assert eliminados == [vehiculos[0]]
+    cambios, eliminados = _unir(paginas, "conductores")
+    assert sorted(cambios) == sorted(conductores) and eliminados == []
+
+def test_sincronizacion_completa_paginada(cliente):
+    completa = cliente.get("/sync", params={"limite": 10000}).json()
+    paginas = _paginas(cliente, limite=7)
+    for tabla in ("vehiculos", "conductores", "rutas", "trayectos"):
+        cambios, _ = _unir(paginas, tabla)
+        assert len(cambios) == len(set(cambios))
+        assert sorted(cambios) == sorted(fila["id"] for fila in completa[tabla]["cambios"])
+
+def test_escrituras_durante_la_paginacion_llegan_despues(cliente, crear_vehiculo):
+    token = cliente.get("/sync", params={"limite": 1}).json()["token"]
+    primeros = [crear_vehiculo()["id"] for _ in range(3)]
+    pagina = cliente.get("/sync", params={"since": token, "tablas": "vehiculos", "limite": 2}).json()
+    tardio = crear_vehiculo()["id"]
+    resto = cliente.get("/sync", params={"continuar": pagina["continuar"], "limite": 2}).json()
+    assert resto["continuar"] is None
+    cambios, _ = _unir([pagina, resto], "vehiculos")
+    assert sorted(cambios) == sorted(primeros)
+    siguiente = cliente.get("/sync", params={"since": resto["token"], "tablas": "vehiculos"}).json()
+    assert [fila["id"] for fila in siguiente["vehiculos"]["cambios"]] == [tardio]
+
+def test_eliminar_de_nuevo_un_id_reutilizado(cliente, db, crear_vehiculo):
+    vehiculo = crear_vehiculo()
+    assert cliente.delete(f"/vehiculo/{vehiculo['id']}").status_code == 200
+    token = cliente.get("/sync", params={"limite": 1}).json()["token"]
+    # Un cliente vuelve a crear el registro con el mismo id
+    datos = {k: v for k, v in vehiculo.items() if k in VehiculoModelo.__table__.c}
+    db.add(VehiculoModelo(**datos))
+    db.commit()
+    assert cliente.delete(f"/vehiculo/{vehiculo['id']}").status_code == 200
+    cambios = cliente.get("/sync", params={"since": token, "tablas": "vehiculos"}).json()["vehiculos"]
+    assert cambios["eliminados"] == [vehiculo["id"]]
+
+def test_tokens_invalidos(cliente):
+    token = cliente.get("/sync", params={"limite": 1}).json()["token"]
+    assert cliente.get("/sync", params={"since": token + 1000}).status_code == 410
+    assert cliente.get("/sync", params={"continuar": "no-es-un-token"}).status_code == 400
+    assert cliente.get("/sync", params={"tablas": "aviones"}).status_code == 400
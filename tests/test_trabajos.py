@@ -0,0 +1,86 @@
+import io
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from app.data.ingesta import ingerir_csv
+from app.data.trabajos import COMPLETADO, FALLIDO, TRABAJOS_DIRECTORIO, ejecutor_trabajos
+from app.data.versiones import versiones
+from app.domain.models.trabajo import Trabajo as TrabajoModelo
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+from app.presentation.api_vehiculo import _convertir_vehiculo
+
+ENCABEZADO = "marca;placa;modelo;lateral;año_de_fabricacion;capacidad_pasajeros;estado_operativo\n"
+
+def _csv_vehiculos(cantidad):
+    prefijo = uuid.uuid4().hex[:6].upper()
+    filas = [f'Chevrolet;{prefijo}{i:03d};"NPR\nlargo";{prefijo}{i};2020;40;activo\n' for i in range(cantidad)]
+    return ENCABEZADO + "".join(filas), filas
+
+def _esperar(cliente, trabajo_id, estados=(COMPLETADO, FALLIDO)):
+    for _ in range(200):
+        trabajo = cliente.get(f"/jobs/{trabajo_id}").json()
+        if trabajo["estado"] in estados:
+            return trabajo
+        time.sleep(0.05)
+    raise AssertionError(f"El trabajo {trabajo_id} no terminó: {trabajo}")
+
+def test_bytes_confirmados_con_lectura_adelantada(db):
+    texto, filas = _csv_vehiculos(7)
+    contenido = texto.encode()
+    # El byte en el que termina cada fila (los registros ocupan dos líneas)
+    finales = [len((ENCABEZADO + "".join(filas[:i + 1])).encode()) for i in range(len(filas))]
+    archivo = io.BytesIO(contenido)
+    avances = []
+
+    def al_progresar(resultado):
+        # El pool ya leyó lotes posteriores: la posición del archivo va por delante
+        avances.append((resultado["ultima_fila_confirmada"], resultado["bytes_confirmados"], archivo.tell()))
+
+    with ThreadPoolExecutor(2) as pool:
+        resultado = ingerir_csv(db, archivo, VehiculoModelo.__table__, _convertir_vehiculo, 2, pool=pool, al_progresar=al_progresar)
+    assert resultado["insertados"] == 7
+    assert [(fila, confirmados) for fila, confirmados, _ in avances] == [(2, finales[1]), (4, finales[3]), (6, finales[5]), (7, finales[6])]
+    assert finales[-1] == len(contenido)
+    assert any(posicion > confirmados for _, confirmados, posicion in avances)
+
+def test_trabajo_fallido_conserva_el_archivo_y_se_reintenta(cliente, db):
+    llamadas = []
+
+    def procesar(db, archivo, parametros, al_progresar, **opciones):
+        llamadas.append(parametros["desde_fila"])
+        if len(llamadas) == 1:
+            raise RuntimeError("falla simulada")
+        return {"filas_procesadas": 1, "insertados": 1, "actualizados": 0, "omitidos": 0, "total_errores": 0,
+                "ultima_fila_confirmada": 1, "bytes_confirmados": 0, "errores": []}
+
+    ejecutor_trabajos.registrar("prueba_reintento", procesar)
+    subido = SimpleNamespace(file=io.BytesIO(b"a;b\n1;2\n"))
+    trabajo_id = ejecutor_trabajos.encolar(db, "prueba_reintento", subido, {"desde_fila": 0})
+    spool = TRABAJOS_DIRECTORIO / f"{trabajo_id}.csv"
+
+    trabajo = _esperar(cliente, trabajo_id)
+    assert trabajo["estado"] == FALLIDO and trabajo["mensaje"] == "falla simulada"
+    assert spool.exists()
+    assert cliente.post(f"/jobs/{uuid.uuid4()}/reintentar").status_code == 404
+
+    respuesta = cliente.post(f"/jobs/{trabajo_id}/reintentar")
+    assert respuesta.status_code == 202
+    assert respuesta.headers["Location"] == f"/jobs/{trabajo_id}"
+    assert _esperar(cliente, trabajo_id)["estado"] == COMPLETADO
+    assert not spool.exists()
+    assert llamadas == [0, 0]
+    # Un trabajo completado no se puede reintentar
+    assert cliente.post(f"/jobs/{trabajo_id}/reintentar").status_code == 409
+
+def test_carga_masiva_notifica_cada_lote(cliente, db):
+    texto, _ = _csv_vehiculos(5)
+    antes = versiones.version("vehiculos")
+    respuesta = cliente.post("/vehiculos/bulk", params={"tamano_lote": 2}, files={"file": ("v.csv", texto.encode(), "text/csv")})
+    assert respuesta.status_code == 202
+    trabajo = _esperar(cliente, respuesta.json()["trabajo_id"])
+    assert trabajo["estado"] == COMPLETADO and trabajo["insertados"] == 5
+    assert versiones.version("vehiculos") - antes == 3
+    registro = db.get(TrabajoModelo, trabajo["id"])
+    assert registro.bytes_procesados == registro.bytes_totales == len(texto.encode())
@@ -0,0 +1,137 @@
+import io
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time
+from app.domain.models.trayecto import Trayecto as TrayectoModelo
+
+FECHA = "2026-05-04"
+
+@pytest.fixture
+def recursos(crear_conductor, crear_vehiculo, crear_ruta):
+    return {"conductor_id": crear_conductor()["id"], "vehiculo_id": crear_vehiculo()["id"], "ruta_id": crear_ruta()["id"]}
+
+@pytest.fixture
+def crear_trayecto(cliente):
+    def crear(salida, llegada, fecha=FECHA, **campos):
+        datos = {"fecha": fecha, "hora_salida": salida, "hora_llegada": llegada, "cantidad_pasajeros": 20, "kilometraje": 15, **campos}
+        respuesta = cliente.post("/trayectos/", json=[datos])
+        assert respuesta.status_code == 200, respuesta.text
+        return respuesta.json()[0]
+    return crear
+
+def test_crear_trayecto_traslapado(cliente, recursos, crear_trayecto):
+    crear_trayecto("08:00:00", "09:00:00", **recursos)
+    datos = {"fecha": FECHA, "hora_salida": "08:30:00", "hora_llegada": "09:30:00", "cantidad_pasajeros": 1, "kilometraje": 1, **recursos}
+    respuesta = cliente.post("/trayectos/", json=[datos])
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"][0]["fila"] == 0
+
+def test_patch_individual_valida_disponibilidad(cliente, recursos, crear_trayecto):
+    crear_trayecto("08:00:00", "09:00:00", **recursos)
+    segundo = crear_trayecto("10:00:00", "11:00:00", **recursos)
+    respuesta = cliente.patch(f"/trayecto/{segundo['id']}", json={"hora_salida": "08:30:00"})
+    assert respuesta.status_code == 400
+    assert "ya está asignado" in respuesta.json()["detail"]
+    # Moverlo dentro de su propio horario no choca consigo mismo
+    respuesta = cliente.patch(f"/trayecto/{segundo['id']}", json={"hora_salida": "09:30:00"})
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["hora_salida"] == "09:30:00"
+
+def test_put_valida_disponibilidad(cliente, recursos, crear_trayecto):
+    crear_trayecto("08:00:00", "09:00:00", **recursos)
+    segundo = crear_trayecto("10:00:00", "11:00:00", **recursos)
+    datos = {"fecha": FECHA, "hora_salida": "08:59:00", "hora_llegada": "11:00:00", "cantidad_pasajeros": 20, "kilometraje": 15, **recursos}
+    assert cliente.put(f"/trayecto/{segundo['id']}", json=datos).status_code == 400
+    datos["conductor_id"] = None
+    datos["vehiculo_id"] = None
+    assert cliente.put(f"/trayecto/{segundo['id']}", json=datos).status_code == 200
+
+def test_patch_individual_solo_responde_400_por_restricciones(cliente, db, recursos, crear_trayecto, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.data import resumen_operaciones
+    from app.main import app
+
+    trayecto = crear_trayecto("16:00:00", "17:00:00", **recursos)
+    # El trigger rechaza el traslape con un trayecto que el índice no conoce
+    db.add(TrayectoModelo(
+        fecha=date.fromisoformat(FECHA), hora_salida=time(18, 0), hora_llegada=time(19, 0),
+        cantidad_pasajeros=1, kilometraje=1, **recursos,
+    ))
+    db.commit()
+    respuesta = cliente.patch(f"/trayecto/{trayecto['id']}", json={"hora_llegada": "18:30:00"})
+    assert respuesta.status_code == 400
+    assert "ya está asignado" in respuesta.json()["detail"]
+
+    def fallar(*args, **kwargs):
+        raise RuntimeError("falla inesperada")
+
+    # Cualquier otro error es del servidor
+    monkeypatch.setattr(resumen_operaciones, "aplicar_cambios", fallar)
+    respuesta = TestClient(app, raise_server_exceptions=False).patch(f"/trayecto/{trayecto['id']}", json={"kilometraje": 3})
+    assert respuesta.status_code == 500
+
+def test_patch_por_lotes_sin_cambios_de_horario(cliente, recursos, crear_trayecto):
+    primero = crear_trayecto("08:00:00", "09:00:00", **recursos)
+    segundo = crear_trayecto("10:00:00", "11:00:00", **recursos)
+    cambios = [{"id": primero["id"], "observaciones": "lluvia"}, {"id": segundo["id"], "observaciones": "lluvia"}]
+    respuesta = cliente.patch("/trayectos/", json=cambios)
+    assert respuesta.status_code == 200, respuesta.text
+    assert [t["observaciones"] for t in respuesta.json()] == ["lluvia", "lluvia"]
+    # Intercambiar los horarios en un mismo lote es válido
+    cambios = [
+        {"id": primero["id"], "hora_salida": "10:00:00", "hora_llegada": "11:00:00"},
+        {"id": segundo["id"], "hora_salida": "08:00:00", "hora_llegada": "09:00:00"},
+    ]
+    assert cliente.patch("/trayectos/", json=cambios).status_code == 200
+
+def test_la_base_de_datos_rechaza_traslapes_que_el_indice_no_conoce(cliente, db, recursos):
+    # Un trayecto escrito por otro proceso: la base lo tiene, el índice de este no
+    db.add(TrayectoModelo(
+        fecha=date.fromisoformat(FECHA), hora_salida=time(14, 0), hora_llegada=time(15, 0),
+        cantidad_pasajeros=1, kilometraje=1, **recursos,
+    ))
+    db.commit()
+    datos = {"fecha": FECHA, "hora_salida": "14:30:00", "hora_llegada": "15:30:00", "cantidad_pasajeros": 1, "kilometraje": 1, **recursos}
+    respuesta = cliente.post("/trayectos/", json=[datos])
+    assert respuesta.status_code == 400
+    assert "ya está asignado" in respuesta.json()["detail"]
+
+def test_carga_masiva_reserva_sin_bloquear_la_escritura(db, recursos, monkeypatch):
+    from app.data import resumen_operaciones
+    from app.data.indice_disponibilidad import CONDUCTOR, indice_disponibilidad
+    from app.presentation.api_trayecto import _cargar_trayectos
+
+    fecha = "2026-05-05"
+    # Otro proceso ya ocupó las 14:00: la fila de las 14:30 la rechaza el trigger
+    db.add(TrayectoModelo(
+        fecha=date.fromisoformat(fecha), hora_salida=time(14, 0), hora_llegada=time(15, 0),
+        cantidad_pasajeros=1, kilometraje=1, **recursos,
+    ))
+    db.commit()
+    columnas = "fecha;hora_salida;hora_llegada;cantidad_pasajeros;kilometraje;conductor_id;vehiculo_id;ruta_id\n"
+    filas = [f"{fecha};{salida};{llegada};1;1;{recursos['conductor_id']};{recursos['vehiculo_id']};{recursos['ruta_id']}\n"
+             for salida, llegada in (("08:00:00", "09:00:00"), ("14:30:00", "15:30:00"))]
+
+    libre = []
+    aplicar = resumen_operaciones.aplicar_trayectos
+
+    def tomar_indice():
+        bloqueo = indice_disponibilidad.bloqueo()
+        if not bloqueo.acquire(blocking=False):
+            return False
+        bloqueo.release()
+        return True
+
+    def aplicar_trayectos(db, trayectos):
+        # Durante la escritura otro hilo puede tomar el índice
+        with ThreadPoolExecutor(1) as hilo:
+            libre.append(hilo.submit(tomar_indice).result())
+        aplicar(db, trayectos)
+
+    monkeypatch.setattr(resumen_operaciones, "aplicar_trayectos", aplicar_trayectos)
+    resultado = _cargar_trayectos(db, io.BytesIO((columnas + "".join(filas)).encode()), {"tamano_lote": 10, "desde_fila": 0})
+    assert libre and all(libre)
+    assert resultado["insertados"] == 1 and [error["fila"] for error in resultado["errores"]] == [2]
+    # La reserva de la fila rechazada se liberó
+    ocupados = indice_disponibilidad.intervalos(CONDUCTOR, fecha, recursos["conductor_id"])
+    assert [(inicio, fin) for inicio, fin, _ in ocupados] == [(8 * 3600, 9 * 3600)]
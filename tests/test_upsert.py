@@ -0,0 +1,51 @@
+import uuid
+from app.data.upsert import MAXIMO_PARAMETROS
+from app.domain.models.vehiculo import Vehiculo as VehiculoModelo
+
+def _vehiculos(prefijo, desde, hasta, capacidad=40):
+    return [
+        {
+            "marca": "Chevrolet",
+            "placa": f"{prefijo}{i:04d}",
+            "modelo": "NPR",
+            "lateral": f"{prefijo}{i}",
+            "año_de_fabricacion": 2020,
+            "capacidad_pasajeros": capacidad,
+            "estado_operativo": "activo",
+        }
+        for i in range(desde, hasta)
+    ]
+
+def test_upsert_en_varios_bloques(cliente, db):
+    prefijo = uuid.uuid4().hex[:6].upper()
+    # Más filas de las que caben en una sentencia, para cruzar varios bloques
+    filas = MAXIMO_PARAMETROS // len(VehiculoModelo.__table__.c) * 3 + 7
+    respuesta = cliente.post("/vehiculos/", params={"on_conflict": "skip"}, json=_vehiculos(prefijo, 0, filas))
+    assert respuesta.json() == {"insertados": filas, "actualizados": 0, "omitidos": 0}
+
+    mitad = filas // 2
+    respuesta = cliente.post("/vehiculos/", params={"on_conflict": "update"}, json=_vehiculos(prefijo, mitad, filas + mitad, capacidad=12))
+    assert respuesta.json() == {"insertados": mitad, "actualizados": filas - mitad, "omitidos": 0}
+    capacidades = db.query(VehiculoModelo.capacidad_pasajeros).filter(VehiculoModelo.placa.startswith(prefijo)).all()
+    assert sorted(c for c, in capacidades) == [12] * filas + [40] * mitad
+
+def test_upsert_con_error_de_integridad_responde_400(cliente, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+    from app.presentation import api_vehiculo
+
+    def fallar(*args, **kwargs):
+        raise IntegrityError("INSERT INTO vehiculos ...", {}, Exception("restricción"))
+
+    monkeypatch.setattr(api_vehiculo, "upsert", fallar)
+    respuesta = cliente.post("/vehiculos/", params={"on_conflict": "update"}, json=_vehiculos("X", 0, 1))
+    assert respuesta.status_code == 400
+
+def test_claves_repetidas_en_el_lote(cliente):
+    prefijo = uuid.uuid4().hex[:6].upper()
+    assert cliente.post("/vehiculos/", params={"on_conflict": "skip"}, json=_vehiculos(prefijo, 0, 1)).json()["insertados"] == 1
+    # La placa 0 ya existía y se repite; la 1 es nueva y se repite: solo la última fila de la 1 cuenta
+    filas = _vehiculos(prefijo, 0, 2) * 2
+    respuesta = cliente.post("/vehiculos/", params={"on_conflict": "update"}, json=filas)
+    assert respuesta.json() == {"insertados": 1, "actualizados": 2, "omitidos": 1}
+    respuesta = cliente.post("/vehiculos/", params={"on_conflict": "skip"}, json=_vehiculos(prefijo, 2, 3) * 2)
+    assert respuesta.json() == {"insertados": 1, "actualizados": 0, "omitidos": 1}